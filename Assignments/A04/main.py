@@ -1,52 +1,136 @@
 import tkinter as tk
+from tkinter import ttk
 import sys
 import json
+import time
+
+# how many children of a key are shown at once. The rest wait behind a "more" row until it's opened
+PAGE_SIZE = 500
+# how many characters of a value are shown in its row
+VALUE_WIDTH = 200
+
+# the text shown next to a key: the value itself, or a summary if it holds more keys or items
+def describe(value):
+    if isinstance(value, dict):
+        return f"{{{len(value)} keys}}"
+    if isinstance(value, list):
+        # a short list of plain values (like a list of strengths) reads better joined together
+        if len(value) <= 10 and not any(isinstance(item, (dict, list)) for item in value):
+            return ", ".join(str(item) for item in value)[:VALUE_WIDTH]
+        return f"[{len(value)} items]"
+    return str(value)[:VALUE_WIDTH]
+
+# (key, value) pairs `start` up to `start+count` inside a dict or list (list items are keyed by their index)
+def children(value, start, count):
+    if isinstance(value, dict):
+        # islice would have to walk past the first `start` keys anyway, so it's no slower than this
+        keys = list(value)[start:start+count] if start else [key for key, _ in zip(value, range(count))]
+        return [(key, value[key]) for key in keys]
+    return list(enumerate(value[start:start+count], start))
 
 # GUI window is a subclass of the basic tkinter Frame object
 class HelloWorldFrame(tk.Frame):
+    """
+    Shows the contents of a JSON file as a tree: one row per key, with keys that hold more keys or items
+    opened by clicking their arrow. A row's children are only added to the tree the first time it's opened,
+    and only PAGE_SIZE at a time (open the "more" row at the end for the next ones), so a file with tens of
+    thousands of keys opens as fast as a small one. The Treeview only draws the rows that are scrolled into view.
+    """
     def __init__(self, master, content):
-        # used to place labels in the window
-        label_row = 0
-        label_col = 0
         # Call superclass constructor
         tk.Frame.__init__(self, master)
-        # Place frame into main window
-        self.grid()
-        # loops through every key in 'content' dictionary
-        for key in content:
-            # print(key, content[key])
-            # print dictionary key to window
-            label_key = tk.Label(self, text=f"{key}")
-            label_key.grid(row=label_row, column=label_col, sticky='W')
-            # print colon to window
-            label_col = 1
-            label_colon = tk.Label(self, text=f":")
-            label_colon.grid(row=label_row, column=label_col, sticky='W')
-            # print value to window
-            label_col = 2
-            value_string = ""
-            # if the value is a list of items, create a string of all items in list
-            if isinstance(content[key], list):
-                separator = ", "
-                value_string = separator.join(content[key])
-            else:
-                value_string = content[key]
-            label_value = tk.Label(self, text=f"{value_string}")
-            label_value.grid(row=label_row, column=label_col, sticky='W')
-            # adjust label placement variables for next set of key-values
-            label_row += 1
-            label_col = 0
+        # Place frame into main window, filling it as it's resized
+        self.grid(sticky='NSEW')
+        master.rowconfigure(0, weight=1)
+        master.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        # one row per key: the key in the tree column and its value (or a summary) in the 'value' column
+        self.tree = ttk.Treeview(self, columns=('value',), height=20)
+        self.tree.heading('#0', text='key', anchor='w')
+        self.tree.heading('value', text='value', anchor='w')
+        self.tree.column('#0', width=250, stretch=False)
+        self.tree.column('value', width=450)
+        scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky='NSEW')
+        scrollbar.grid(row=0, column=1, sticky='NS')
+        # row id -> the dict or list it holds, for rows whose children haven't all been added yet,
+        #       and how many of them have been added so far
+        self.pending = {}
+        self.loaded = {}
+        # "more" row id -> the row whose next page it stands for
+        self.more_rows = {}
+        self.tree.bind('<<TreeviewOpen>>', self.onOpen)
+        self.tree.bind('<<TreeviewSelect>>', self.onSelect)
+        # the top of the file is usually an object, but a list or a single value works too
+        if not isinstance(content, (dict, list)):
+            content = [content]
+        self.pending[''] = content
+        self.loaded[''] = 0
+        self.loadPage('')
+
+    def addRow(self, parent, key, value):
+        row = self.tree.insert(parent, 'end', text=str(key), values=(describe(value),))
+        # a row that holds something gets one placeholder child, so it shows an arrow to open it
+        if isinstance(value, (dict, list)) and value:
+            self.pending[row] = value
+            self.loaded[row] = 0
+            self.tree.insert(row, 'end', text='...')
+
+    def loadPage(self, row):
+        # adds the next PAGE_SIZE children of `row` (the first time, in place of its placeholder)
+        value = self.pending[row]
+        start = self.loaded[row]
+        if start == 0 and row != '':
+            self.tree.delete(*self.tree.get_children(row))
+        for key, item in children(value, start, PAGE_SIZE):
+            self.addRow(row, key, item)
+        self.loaded[row] = start + PAGE_SIZE
+        left = len(value) - self.loaded[row]
+        if left > 0:
+            more = self.tree.insert(row, 'end', text=f"... {left} more", values=("open to show the next ones",))
+            self.tree.insert(more, 'end', text='...')
+            self.more_rows[more] = row
+        else:
+            # everything is in the tree now, so there's nothing left to remember about it
+            del self.pending[row]
+            del self.loaded[row]
+
+    def loadMore(self, more):
+        # replaces a "more" row with the next page of its parent's children
+        row = self.more_rows.pop(more)
+        self.tree.delete(more)
+        self.loadPage(row)
+
+    def onOpen(self, event):
+        row = self.tree.focus()
+        if row in self.more_rows:
+            self.loadMore(row)
+        elif row in self.pending and self.loaded[row] == 0:
+            self.loadPage(row)
+
+    def onSelect(self, event):
+        # selecting a "more" row (e.g. with the keyboard) shows the next page too
+        for row in self.tree.selection():
+            if row in self.more_rows:
+                self.loadMore(row)
 
 # Spawn window
 if __name__ == "__main__":
-    # extract commandline param that has json file name, open the file, 
-    # and dump the json object into a dictionary
-    player_info = json.load(open(sys.argv[1], 'r'))
+    # extract commandline param that has json file name, open the file,
+    # and dump the json object into a dictionary (json.load reads it in C, which is far faster than
+    #       anything the window does with it, so the whole file is read up front)
+    start = time.perf_counter()
+    with open(sys.argv[1], 'r') as infile:
+        player_info = json.load(infile)
     # Create main window object
     ROOT = tk.Tk()
     # Set title of window
     ROOT.title("Introduction")
     # Instantiate HelloWorldFrame object
     WELCOME_FRAME = HelloWorldFrame(ROOT, player_info)
+    ROOT.update_idletasks()
+    print(f"{sys.argv[1]} opened in {(time.perf_counter()-start)*1000:.0f} ms")
     # Start GUI
     WELCOME_FRAME.mainloop()
@@ -0,0 +1,130 @@
+"""
+Shared animation clocks for groups of sprites.
+
+Sprites that play the same animation at the same time (like a crowd of idling snowmen) are always on
+the same frame, so there is no reason for each of them to count frames and load images on its own.
+An AnimationScheduler keeps one frame counter per animation set and moves them forward by the time
+that has passed, at the "fps" each set's `info.json` entry asks for, so animations play at the same
+speed no matter how fast the game loop runs.
+An AnimatedGroup uses a scheduler for its members, hands each member a new image only when its frame
+actually changed (members whose frame didn't change aren't touched), and draws every member with a single
+`Surface.blits()` call.
+
+A member says which set it is playing through its `animation` attribute. Members that are out of step
+with the rest (e.g. one playing its death animation) set `animation` to None and manage `image` themselves.
+"""
+import pygame
+
+def loadFrames(path_pattern, count, size=None, flipped=False):
+    """
+    Loads the frames of an animation, where `path_pattern` has a {} for the frame number (starting at 1).
+    Example:
+        loadFrames("./mob/idle/idle{}.png", 7)  loads idle1.png through idle7.png
+    Frames can be scaled to `size` and/or flipped left to right. Loading and scaling happen once, here,
+    instead of every time a sprite changes frames.
+    Returns:
+        list of Surfaces, where frame number n is at index n-1
+    """
+    frames = []
+    for num in range(1, count+1):
+        image = pygame.image.load(path_pattern.format(num)).convert_alpha()
+        if size is not None and image.get_size() != tuple(size):
+            image = pygame.transform.smoothscale(image, size)
+        if flipped:
+            image = pygame.transform.flip(image, True, False)
+        frames.append(image)
+    return frames
+
+def skipFrames(num, count, steps):
+    # the frame `steps` frames after `num`. This is the same loop the sprites in this game have always used:
+    #       frames 1 up to count-1, then back to 1
+    loop = max(1, count - 1)
+    return (num - 1 + steps) % loop + 1
+
+class AnimationScheduler():
+    """
+    One frame counter per animation set, moved forward by elapsed milliseconds.
+    Register sets with `add(name, frames, fps)` and call `advance(milliseconds)` once per tick.
+    """
+    def __init__(self):
+        self.animations = {}
+        self.clocks = {}
+        # milliseconds each set has waited since it last changed frames, and how long one frame lasts
+        self.waited = {}
+        self.frame_time = {}
+
+    def add(self, name, frames, fps):
+        self.animations[name] = frames
+        self.clocks[name] = 1
+        self.waited[name] = 0
+        self.frame_time[name] = 1000 / fps
+
+    def advance(self, milliseconds):
+        """
+        Moves every set's clock forward by `milliseconds`. Returns the set of names whose frame changed.
+        """
+        changed = set()
+        for name, frames in self.animations.items():
+            # a slow tick can skip frames, so the animation keeps the same speed
+            frame_time = self.frame_time[name]
+            self.waited[name] += milliseconds
+            steps = int(self.waited[name] // frame_time)
+            self.waited[name] -= steps * frame_time
+            if steps:
+                num = skipFrames(self.clocks[name], len(frames), steps)
+                if num != self.clocks[name]:
+                    self.clocks[name] = num
+                    changed.add(name)
+        return changed
+
+    def frame(self, name):
+        # the current frame of an animation set
+        return self.animations[name][self.clocks[name]-1]
+
+class AnimatedGroup(pygame.sprite.Group):
+    """
+    A sprite group with one animation clock per animation set.
+    Register sets with `addAnimation(name, frames, fps)` and call `advance(milliseconds)` once per tick.
+    `draw()` only swaps a member's image when the frame it should show has changed since it was last drawn.
+    `draw(surface, offset)` shifts every member by `offset` as it draws them (e.g. a camera's, when the members'
+    rects are in world coordinates), and leaves out the ones that end up outside `surface`.
+    """
+    def __init__(self, *sprites):
+        self.scheduler = AnimationScheduler()
+        # what each member showed the last time it was drawn: (set name, frame number), or its own image
+        self.shown = {}
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def addAnimation(self, name, frames, fps):
+        self.scheduler.add(name, frames, fps)
+
+    def advance(self, milliseconds):
+        return self.scheduler.advance(milliseconds)
+
+    def frame(self, name):
+        return self.scheduler.frame(name)
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        self.shown.pop(sprite, None)
+
+    def draw(self, surface, offset=(0, 0)):
+        clocks = self.scheduler.clocks
+        shown = self.shown
+        sequence = []
+        offset_x, offset_y = offset
+        # the part of the members' space that `surface` shows
+        view = surface.get_rect().move(-offset_x, -offset_y)
+        for sprite in self.sprites():
+            name = sprite.animation
+            showing = (name, clocks[name]) if name is not None else sprite.image
+            if shown.get(sprite) != showing:
+                if name is not None:
+                    sprite.image = self.scheduler.frame(name)
+                shown[sprite] = showing
+            # members out of view still get their new frame (their masks are checked for collisions), they just aren't drawn
+            rect = sprite.rect
+            if view.colliderect(rect):
+                sequence.append((sprite.image, (rect.x + offset_x, rect.y + offset_y)))
+        # one call draws every member. Nothing here needs the rectangles that were drawn, so don't build that list
+        surface.blits(sequence, doreturn=False)
@@ -0,0 +1,65 @@
+"""
+Scrolling a world that is bigger than the window.
+
+Every sprite used to be handed the camera offset in its `update()` and move its own `rect` to where it
+shows up in the window, so every sprite made itself a new position every frame whether it had moved or not,
+and its `rect` meant a spot in the window after its update but a spot in the world before it.
+Sprites in a CameraGroup keep their `rect` in world coordinates and never hear about the camera.
+The group adds the camera offset to all of them at once when it draws them, in a single `Surface.blits()`
+call, and leaves out the ones that aren't in the window. A sprite that doesn't move is never touched at all.
+"""
+import pygame
+
+class Camera():
+    """
+    Used to create an offset in pixels, that when added to the world position of everything in the game,
+    creates a scrolling effect, keeping the targeted sprite in the center of the window (`view_size` big).
+    Users can pass in whatever sprite they want centered on when they call the `update` function.
+    `apply` returns the offset, which the CameraGroups (and the background and particles) add when they draw.
+    """
+    def __init__(self, view_size):
+        self.half_width = int(view_size[0] / 2)
+        self.half_height = int(view_size[1] / 2)
+        self.camera_offset = (0,0)
+
+    # moves the camera to focus in on 'target'
+    def update(self, player_target):
+        # grabs the left and top points of the targeted sprite
+        l, t = player_target.actual_position # l = left,  t = top
+        # adjusts the camera position based on targeted sprite
+        #       subtracting half of the window's width and height gets the distance from the sprite's
+        #       current location in the world to the window's center.
+        self.camera_offset = (self.half_width-l, self.half_height-t)
+
+    # returns the offset from the update() call. Adding it to a position in the world gives the position in the window
+    def apply(self):
+        return self.camera_offset
+
+    # where a point in the window (like the mouse pointer) is in the world
+    def toWorld(self, position):
+        return (position[0]-self.camera_offset[0], position[1]-self.camera_offset[1])
+
+    # where a point in the world is in the window
+    def toWindow(self, position):
+        return (position[0]+self.camera_offset[0], position[1]+self.camera_offset[1])
+
+class CameraGroup(pygame.sprite.Group):
+    """
+    A sprite group whose members' rects are in world coordinates. `draw()` shifts them all by the camera's
+    offset as it draws them, and skips the ones that end up outside the surface it draws on.
+    """
+    def __init__(self, camera, *sprites):
+        self.camera = camera
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def draw(self, surface):
+        offset_x, offset_y = self.camera.apply()
+        # the part of the world the surface shows
+        view = surface.get_rect().move(-offset_x, -offset_y)
+        sequence = []
+        for sprite in self.sprites():
+            rect = sprite.rect
+            if view.colliderect(rect):
+                sequence.append((sprite.image, (rect.x + offset_x, rect.y + offset_y)))
+        # one call draws every member that can be seen. Nothing here needs the rectangles that were drawn
+        surface.blits(sequence, doreturn=False)
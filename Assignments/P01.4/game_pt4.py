@@ -29,8 +29,39 @@ from helper_module import mykwargs
 # returns the euclidian distance of two points in 2D space
 from helper_module import straightDistance
 
-# returns a dictionary of color names and their hex/rgb values
-from helper_module import load_json
+# every metadata file (colors and animation info) checked and saved together, so it loads in one go
+from asset_manifest import loadManifest
+
+# KD-tree based index for finding the enemies nearest to a point
+from spatial_index import SpatialIndex
+
+# one shared search that tells every enemy which way to walk to reach the player
+from flow_field import FlowField, gridEdges
+
+# the camera that follows the player, and sprite groups that keep their members in world coordinates and
+#       scroll them all at once when they're drawn
+from camera import Camera, CameraGroup
+
+# decides which enemies work out where to go on each tick: near ones every tick, far ones less often
+from ai_lod import AIScheduler
+
+# sprite group that keeps one animation clock per animation set and draws all its members in one call
+from animation import AnimatedGroup, AnimationScheduler, loadFrames, skipFrames
+
+# collision masks for every animation frame, made once when the frames load, for pixel-accurate hits
+from mask_cache import MaskCache
+
+# background layers that scroll at different speeds, drawing only the part of each that's on screen
+from parallax import ParallaxBackground
+
+# snow bursts kept in NumPy arrays and drawn straight into the screen's pixels, instead of a sprite per snowflake
+from particles import ParticleSystem
+
+# plays sounds on a fixed set of channels, so a burst of hits can't pile up copies of the same sound
+from sound_manager import SoundManager
+
+# logs the shots and kills in each game to files, from a background thread
+from telemetry import Telemetry
 
 # grab command line arguments using the helper function and put them into a dictionary
 _, argDict = mykwargs(sys.argv)
@@ -42,73 +73,87 @@ HALF_WINDOW_WIDTH = int(WINDOW_WIDTH / 2)
 HALF_WINDOW_HEIGHT = int(WINDOW_HEIGHT / 2)
 WINDOW_TITLE = argDict["title"]
 GAME_FPS = int(argDict["fps"])
-
-# grab json info from colors.json and load into a dictionary
-colors = load_json('colors.json')
+# size of the world (the background image) in pixels
+WORLD_WIDTH = 1920
+WORLD_HEIGHT = 1080
+# the enemies' flow field splits the world into square cells this many pixels wide
+CHASE_CELL = 40
+# how many pixels an enemy walks per frame while chasing the player (0 keeps them standing still)
+MOB_SPEED = float(argDict.get("mob_speed", 2))
+# enemies on screen (or within half a window's diagonal of the player) chase the player every tick. Ones within twice that
+#       distance every AI_MID_EVERY ticks, and the rest every AI_FAR_EVERY ticks, with at most `ai_budget=` of those
+#       (default 100) working out where to go in one tick, however many enemies there are. `ai_lod=false` has every enemy chase every tick
+AI_LOD = argDict.get("ai_lod", "true").lower() == "true"
+AI_BUDGET = int(argDict.get("ai_budget", 100))
+AI_NEAR = math.hypot(HALF_WINDOW_WIDTH, HALF_WINDOW_HEIGHT)
+AI_MID = 2 * AI_NEAR
+AI_MID_EVERY = 4
+AI_FAR_EVERY = 16
+# the folder the game's telemetry (what happened while it was played) is saved in, or `telemetry=false` to not save it
+TELEMETRY_FOLDER = argDict.get("telemetry", "./telemetry")
+if TELEMETRY_FOLDER.lower() == "false":
+    TELEMETRY_FOLDER = None
+# verbose=true prints how the collision masks, sounds, enemy AI, and telemetry did (masks when they're made, the rest when the game ends)
+VERBOSE = argDict.get("verbose", "false").lower() == "true"
+# how fast the faded, repeating copy of the world behind it scrolls compared to the world (0 leaves it out)
+PARALLAX = float(argDict.get("parallax", 0))
+# how many snowflakes burst out when a snowball hits an enemy, and when an enemy's death animation ends
+IMPACT_PARTICLES = 60
+DEATH_PARTICLES = 250
+# the colors the snowflakes are picked from
+SNOW_COLORS = ((255, 255, 255), (235, 245, 255), (200, 225, 255), (170, 200, 240))
+# snowballs can fly at any angle, but their frames are only rotated (and masked) for this many angles
+ROTATION_BUCKETS = 24
+
+# colors.json and every animation's info.json are read through the manifest (`manifest=`, default assets.manifest),
+#       which checks them and is only built again when one of them changes. Anything missing or malformed (including
+#       a `color` that isn't in colors.json) stops the game here with a list of what's wrong
+#       (name -> (kind, file, the keys the game needs))
+ASSET_SOURCES = {
+    "colors": ("colors", "colors.json", (argDict["color"],)),
+    "player": ("animations", "./playersprites/info.json", ("Idle", "Dead", "Walk")),
+    "mob": ("animations", "./mob/info.json", ("Idle", "Dead", "Walk")),
+    "bullet": ("animations", "./snowball/info.json", ("Shot",)),
+}
+manifest = loadManifest(ASSET_SOURCES, argDict.get("manifest", "assets.manifest"))
+
+# a dictionary of color names and their hex/rgb values
+colors = manifest["colors"]
 
 # each set of sprite animation frames has an info file that contains the names of the frames, how many exist per set,
 #       and a value for adjusting the rate each frame plays. For example, if you check the `info.json` file in the `playersprites` folder
 #       the player's Idle animation frames all have "Idle (" as part of their name (that's why the 'name' field is "Idle (" ), 
-#       and there are 16 frames in the animation. The `fps` parameter has yet to be implemented, but that value just means the next frame
-#       will play every 30 iterations of the game's main event loop
-player_animations = load_json('./playersprites/info.json')
-mob_animations = load_json('./mob/info.json')
-bullet_animations = load_json('./snowball/info.json')
+#       and there are 16 frames in the animation. The `fps` parameter is how many frames of that animation play per second,
+#       no matter how fast the game's main event loop is running
+player_animations = manifest["player"]
+mob_animations = manifest["mob"]
+bullet_animations = manifest["bullet"]
 
-class Camera():
+def loadBackground():
     """
-    Used to create an offset in pixels, that when added to all sprites in the game,
-    creates a scrolling effect, keeping the targeted sprite in the center of the window.
-    Users can pass in whatever sprite they want centered on when they call the `update` function.
-    The `apply` function must then be called on every sprite (including the one you called `update`
-    with) to apply the offset.
+    Returns the game's ParallaxBackground: the world (the background image), which scrolls with the camera,
+    in front of the window color. With `parallax=` on the command line, a smaller, faded copy of the world
+    repeats behind it, scrolling that many times as fast as the world so it looks far away
     """
-    def __init__(self):
-        self.camera_offset = (0,0)
-
-    # moves the camera to focus in on 'target'
-    def update(self, player_target):
-        # grabs the left and top points of the targeted sprite
-        l, t = player_target.actual_position # l = left,  t = top
-        # adjusts the camera position based on targeted sprite
-        #       subtracting half of the window's width and height gets the distance from the sprite's
-        #       current location in the world to the window's center.
-        self.camera_offset = (HALF_WINDOW_WIDTH-l, HALF_WINDOW_HEIGHT-t)
-
-    # returns the offset from the update() call to all sprites in the game, including the player.
-    # The actual addition doesn't happen in this function, though. It's performed in each sprite's update() class member
-    def apply(self):
-        return self.camera_offset
-
-class Background(pygame.sprite.Sprite):
-    """
-    A pygame sprite class visible on screen as an image
-    A sprite in pygame is a moveable object on the screen
-    The sprite created with this class in this program will be static, acting as the background of the game.
-    """
-    def __init__(self):
-        pygame.sprite.Sprite.__init__(self)
-        # load the sprite as an image
-        self.image = pygame.image.load(argDict["background_image"]).convert()
-
-        # create a pygame rectangle from the dimensions of the background image
-        self.rect = self.image.get_rect()
-
-        # place it at 0, 0
-        self.rect.topleft = (0, 0)
-
-    # The update method for sprites doesn't do anything unless defined by the programmer.
-    # Sets the position of the background with respect to the offset generated in the camera class and passed in as an argument
-    # No addition is performed here because the background image was initially placed at 0, 0 and never moves
-    def update(self, position):
-        self.rect.topleft = (position[0], position[1])
+    background = ParallaxBackground((WINDOW_WIDTH, WINDOW_HEIGHT), colors[argDict["color"]]['rgb'])
+    world = pygame.image.load(argDict["background_image"]).convert()
+    if PARALLAX:
+        far = pygame.transform.smoothscale(world, (world.get_width()//2, world.get_height()//2))
+        # fade it halfway to the window color
+        fade = pygame.Surface(far.get_size())
+        fade.fill(colors[argDict["color"]]['rgb'])
+        fade.set_alpha(128)
+        far.blit(fade, (0, 0))
+        background.add(far, factor=PARALLAX, repeat=(True, True))
+    background.add(world)
+    return background
 
 class Enemy(pygame.sprite.Sprite):
     """
     A pygame sprite class visible on screen as an image
     A sprite in pygame is a moveable object on the screen
-    The sprite created with this class in this program will be unmovable, acting
-        as a stationary target for the player character to shoot at. 
+    The sprite created with this class in this program will walk toward the player, acting
+        as a target for the player character to shoot at.
     The enemy dies when hit by a Bullet
     """
     def __init__(self):
@@ -117,22 +162,22 @@ class Enemy(pygame.sprite.Sprite):
         # the current set of sprite images to use
         self.dead_pictureset = mob_animations["Dead"]
         self.idle_pictureset = mob_animations["Idle"]
-
-        # load the sprite as an image
-        # There are two animations that will play in this game: Idle and Dead, located in the `./mob` folder
-        # Animations are loop-played, meaning, since each frame of every animation are numbered (e.g. `dead1.png`, `dead2.png`, etc.),
-        #       we can loop through them using the `<animation_name>_imagenum` variable. `<animation_name>_imagelimit`
-        #       keeps the program from trying to load an image that doesn't exist. (We don't want to open `dead8.png` if
-        #       there are only 7 frames in the 'dead' animation.) `<animation_name>_imagelimit` gets its value from the `info.json`
-        #       file in the `mob` folder.
-        self.idle_imagenum = 1
+        self.walk_pictureset = mob_animations["Walk"]
+
+        # There are three animations that will play in this game: Idle, Walk, and Dead, located in the `./mob` folder.
+        # Their frames are loaded once in `main` (into `mob_frames`). Every enemy that is idling or walking is on the same
+        #       frame as the others, so the `MobGroup` keeps the frame count for those and picks the image when it draws.
+        #       `self.animation` tells it which animation this enemy is playing.
+        # Dying enemies are out of step with the rest, so they count their own frames with `dead_imagenum`. `dead_imagelimit`
+        #       keeps the program from trying to show a frame that doesn't exist. (There are only 7 frames in the 'dead' animation.)
+        #       It gets its value from the `info.json` file in the `mob` folder. `dead_waited` is how many milliseconds
+        #       the current 'dead' frame has been showing, and `dead_frame_time` how long each one shows for.
+        self.animation = 'idle'
         self.dead_imagenum = 0
-        self.idle_imagelimit = self.idle_pictureset["count"]
         self.dead_imagelimit = self.dead_pictureset["count"]
-        # this is how we will load any frame of an animation. (Here, we load the first `idle` frame)
-        # For example, the first image that loads will be at "./mob/+idle+/+idle+1+.png". I kept the plus signs in so you can see how each part
-        #       of the below instruction contributes. The plus's aren't actually in the string.
-        self.image = pygame.image.load("./mob/"+self.idle_pictureset["name"]+'/'+self.idle_pictureset["name"]+str(self.idle_imagenum)+".png")
+        self.dead_waited = 0
+        self.dead_frame_time = 1000 / self.dead_pictureset["fps"]
+        self.image = mob_frames['idle'][0]
 
         # create a pygame rectangle from the dimensions of the image
         self.rect = self.image.get_rect()
@@ -143,34 +188,214 @@ class Enemy(pygame.sprite.Sprite):
         self.y = random.randint(0,WINDOW_HEIGHT)
 
         # place the sprite at the location determined above, record its actual position in world coordinates
+        #       (the rect is in world coordinates too. The `MobGroup` moves it into the window when it draws)
         self.rect.topleft = self.actual_position = (self.x, self.y)
 
+        # the center of the sprite in world coordinates. This is what the `MobGroup` spatial index stores,
+        #       since "nearest enemy" should be measured to the middle of the snowman, not its top left corner
+        self.center_position = (self.x + self.rect.width/2, self.y + self.rect.height/2)
+
         # hit will stay true if the sprite has NOT been hit by a Bullet. False, otherwise. We'll use this
         #       variable in the `update` member function
         self.hit = True
 
-    # adds the offset calculated in the camera class to the enemy's actual position in the world (not with respect to the game window)
-    def update(self, position):
+        # true if the enemy is facing left (the walk frames face right, so they get flipped)
+        self.facing_left = False
 
-        # if the enemy has not been hit by a Bullet, play its 'idle' animation
+    def chase(self, field, target, ticks=1):
+        """
+        Walks the enemy toward `target` (the player's center in world coordinates) by following the flow field,
+        one step for each of the `ticks` ticks since it last chased (far enemies don't chase every tick).
+        Returns True if the enemy moved.
+        """
+        cx, cy = self.center_position
+        # the way to the next cell on the path to the player
+        dx, dy = field.direction(int(cx // CHASE_CELL), int(cy // CHASE_CELL))
+        # once in the same cell as the player, walk straight at them until they're close enough to touch
+        if (dx, dy) == (0, 0):
+            dx, dy = target[0]-cx, target[1]-cy
+            if dx*dx + dy*dy <= (self.rect.width/2)**2:
+                return False
+        # take a `MOB_SPEED` pixel step in that direction for each tick
+        length = math.hypot(dx, dy)
+        self.x += MOB_SPEED * ticks * dx / length
+        self.y += MOB_SPEED * ticks * dy / length
+        if dx != 0:
+            self.facing_left = dx < 0
+        self.rect.topleft = self.actual_position = (self.x, self.y)
+        self.center_position = (self.x + self.rect.width/2, self.y + self.rect.height/2)
+        return True
+
+    # walks the enemy toward the player and picks its animation. An enemy that doesn't move keeps its rect as it is
+    # `field` and `target` are the flow field and the player's center. Without them the enemy stands still.
+    # `milliseconds` is the time since the last update. Without it the death animation plays one frame per update.
+    # `ticks` is how many ticks went by since the enemy last chased the player (see `MobGroup`)
+    def update(self, field=None, target=None, milliseconds=None, ticks=1):
+
+        # if the enemy has not been hit by a Bullet, chase the player and play its 'walk' animation,
+        #       or play its 'idle' animation if it's standing still. The group picks the actual frame when it draws.
         if self.hit:
-            # We use the `max` function since there are no animation frames with a 0 in their name,
-            #       and the mod function will return a 0 if self.<animation>_imagenum = self.<animation>_imagelimit
-            self.idle_imagenum = max(1, (self.idle_imagenum + 1) % self.idle_imagelimit)
-            self.image = pygame.image.load("./mob/"+self.idle_pictureset["name"]+'/'+self.idle_pictureset["name"]+str(self.idle_imagenum)+".png")
+            if MOB_SPEED > 0 and field is not None and self.chase(field, target, ticks):
+                self.animation = 'walk_left' if self.facing_left else 'walk'
+            else:
+                self.animation = 'idle'
         # if it has been hit
         elif not self.hit:
-            self.dead_imagenum += 1
+            # the death animation starts whenever the enemy gets hit, so it plays its own frames
+            self.animation = None
+            if milliseconds is None:
+                steps = 1
+            else:
+                self.dead_waited += milliseconds
+                steps = int(self.dead_waited // self.dead_frame_time)
+                self.dead_waited -= steps * self.dead_frame_time
             # if the entire 'dead' animation has played, kill the enemy and remove it from view
-            if self.dead_imagenum == self.dead_imagelimit:
+            if self.dead_imagenum + steps >= self.dead_imagelimit:
                 self.dead_imagenum = 1
                 self.kill()
-            # if the animation hasn't finished, play the next frame
-            else:
-                self.image = pygame.image.load("./mob/"+self.dead_pictureset["name"]+'/'+self.dead_pictureset["name"]+str(self.dead_imagenum)+".png")
+                # the snowman bursts into snow
+                particles.emit(self.center_position, DEATH_PARTICLES, speed=(60, 260), life=(400, 1200), colors=SNOW_COLORS)
+            # if it's time for the next frame, play it
+            elif steps:
+                self.dead_imagenum += steps
+                self.image = mob_frames['dead'][self.dead_imagenum-1]
+
+# every frame of the enemies' animations, loaded once by `loadMobFrames`
+mob_frames = {}
+
+def loadMobFrames():
+    """
+    Loads the enemies' animation frames into `mob_frames`. This has to happen after the window is created.
+    The walk frames are much bigger than the idle frames, so they are shrunk down to the idle size here, once,
+    and a flipped copy is made for walking left.
+    """
+    def pattern(pictureset):
+        # e.g. "./mob/idle/idle{}.png"
+        return "./mob/"+pictureset["name"]+'/'+pictureset["name"]+"{}.png"
+    mob_frames['idle'] = loadFrames(pattern(mob_animations["Idle"]), mob_animations["Idle"]["count"])
+    size = mob_frames['idle'][0].get_size()
+    mob_frames['walk'] = loadFrames(pattern(mob_animations["Walk"]), mob_animations["Walk"]["count"], size)
+    mob_frames['walk_left'] = loadFrames(pattern(mob_animations["Walk"]), mob_animations["Walk"]["count"], size, flipped=True)
+    mob_frames['dead'] = loadFrames(pattern(mob_animations["Dead"]), mob_animations["Dead"]["count"])
+    for frames in mob_frames.values():
+        masks.add(frames)
+
+class MobGroup(AnimatedGroup):
+    """
+    A sprite group for enemies that keeps a spatial index of where its members are in the world.
+    It's an AnimatedGroup, so idling and walking enemies share one frame count per animation, and it draws them
+    shifted by `camera`'s offset, like a CameraGroup.
+    Enemies are added to the index when they join the group and removed when they leave it (`kill()`).
+    Enemies that have started their death animation (`hit` is False) are dropped from the index the
+    first time a query runs into them, so "nearest enemy" only ever returns enemies that are still alive.
+    With `ai` (an AIScheduler), `update` only chases with the enemies on screen every tick, and the ones farther
+    away every few ticks (see ai_lod.py). Enemies hit with `hit(mob)` play their death animation every tick.
+    """
+    def __init__(self, camera, *sprites, ai=None):
+        self.camera = camera
+        self.ai = ai
+        # enemies playing their death animation
+        self.dying = set()
+        self.index = SpatialIndex()
+        # half the diagonal of the biggest member. Anything farther than this (plus the other sprite's
+        #       half diagonal) from an enemy's center can't be touching that enemy.
+        self.max_reach = 0
+        AnimatedGroup.__init__(self, *sprites)
+        # each animation plays at the speed its `info.json` entry asks for
+        self.addAnimation('idle', mob_frames['idle'], mob_animations["Idle"]["fps"])
+        self.addAnimation('walk', mob_frames['walk'], mob_animations["Walk"]["fps"])
+        self.addAnimation('walk_left', mob_frames['walk_left'], mob_animations["Walk"]["fps"])
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        self.index.insert(sprite, sprite.center_position)
+        self.max_reach = max(self.max_reach, math.hypot(sprite.rect.width, sprite.rect.height) / 2)
+        if self.ai is not None:
+            self.ai.add(sprite)
+
+    def remove_internal(self, sprite):
+        AnimatedGroup.remove_internal(self, sprite)
+        self.index.discard(sprite)
+        self.dying.discard(sprite)
+        if self.ai is not None:
+            self.ai.discard(sprite)
+
+    def hit(self, mob):
+        # switch the mob's hit variable to false so it starts playing its death animation
+        mob.hit = False
+        self.dying.add(mob)
+        if self.ai is not None:
+            self.ai.discard(mob)
+
+    def update(self, field=None, target=None, milliseconds=None):
+        if self.ai is None:
+            pygame.sprite.Group.update(self, field, target, milliseconds)
+            moved = self.sprites()
+        else:
+            # every living enemy that could be on screen (anything within half the window's diagonal of its center,
+            #       plus the size of an enemy) chases every tick, and the scheduler picks which of the rest do
+            view = self.camera.toWorld((HALF_WINDOW_WIDTH, HALF_WINDOW_HEIGHT))
+            near = [mob for _, mob in self.within(view, AI_NEAR + self.max_reach)]
+            moved = []
+            for mob, ticks in self.ai.plan(near, lambda mob: math.dist(mob.center_position, target)):
+                mob.update(field, target, milliseconds, ticks)
+                moved.append(mob)
+            for mob in list(self.dying):
+                mob.update(field, target, milliseconds)
+        # enemies walk around, so move them in the index too. Dying ones are left for the queries to drop
+        self.index.moveMany([(mob, mob.center_position) for mob in moved if mob.hit and mob in self.index])
+
+    def draw(self, surface):
+        AnimatedGroup.draw(self, surface, self.camera.apply())
+
+    def nearest(self, position, k=1):
+        """
+        Returns up to `k` (distance, enemy) pairs of living enemies closest to `position` (world coordinates)
+        """
+        return self.index.nearest(position, k, accept=isAlive)
+
+    def within(self, position, radius):
+        """
+        Returns (distance, enemy) pairs of living enemies at most `radius` away from `position` (world coordinates)
+        """
+        return self.index.within(position, radius, accept=isAlive)
+
+# used by `MobGroup` queries to skip (and forget about) enemies that are playing their death animation
+def isAlive(mob):
+    return mob.hit
+
+# every frame of the snowball's animation, rotated to each of the `ROTATION_BUCKETS` angles: bullet_frames[bucket][frame number-1].
+#       Loaded once by `loadBulletFrames`
+bullet_frames = []
+
+def loadBulletFrames():
+    """
+    Loads the snowball's frames and rotates each one to every angle a Bullet can be drawn at.
+    Rotating every frame of every snowball while the game runs is slow, and so is making masks for the results,
+    so both happen here, once.
+    """
+    pictureset = bullet_animations["Shot"]
+    frames = loadFrames("./snowball/"+pictureset["name"]+"{}.png", pictureset["count"])
+    for bucket in range(ROTATION_BUCKETS):
+        rotated = [pygame.transform.rotate(frame, bucket * 360 / ROTATION_BUCKETS) for frame in frames]
+        masks.add(rotated)
+        bullet_frames.append(rotated)
+
+# the collision masks of every enemy and snowball frame
+masks = MaskCache()
+
+# every snowflake from snowball hits and enemy deaths
+particles = ParticleSystem()
+
+# every sound in the game, loaded in `main`
+sounds = SoundManager()
 
-        # add the camera offset
-        self.rect.topleft = (self.actual_position[0]+position[0], self.actual_position[1]+position[1])
+# what happens in the game, by kind of event and the numbers saved with it (positions are in world coordinates).
+#       `main` starts the thread that writes them
+telemetry = Telemetry(TELEMETRY_FOLDER, "P01.4", {
+    "shot": ("x", "y", "auto_aim"),
+    "kill": ("x", "y"),
+})
 
 class Player(pygame.sprite.Sprite):
     """
@@ -188,20 +413,17 @@ class Player(pygame.sprite.Sprite):
         self.dead_pictureset = player_animations["Dead"]
         self.walk_pictureset = player_animations["Walk"]
 
-        # load the sprite as an image
         # There are three animations that will play in this game: Idle, Dead, and Walk.
         # Animations are loop-played, meaning, since each frame of every animation are numbered (e.g. `Dead (1).png`, `Dead (2).png`, etc.),
-        #       we can loop through them using the `<animation_name>_imagenum` variable. `<animation_name>_imagelimit`
-        #       keeps the program from trying to load an image that doesn't exist. (We don't want to open `Dead (17).png` if
-        #       there are only 16 frames in the Dead animation.) `<animation_name>_imagelimit` gets its value from the `info.json`
-        #       file in the `playersprites` folder.
-        self.idle_imagenum = 1
-        self.dead_imagenum = 1
-        self.walk_imagenum = 1
-        self.idle_imagelimit = self.idle_pictureset["count"]
-        self.dead_imagelimit = self.dead_pictureset["count"]
-        self.walk_imagelimit = self.walk_pictureset["count"]
-        # this is how we will load any frame of an animation (here, we load the first frame indicated in the commandline parameters)
+        #       we can loop through them. Every frame is loaded once, here, and the scheduler keeps track of which frame of each
+        #       animation is showing, moving them along at the `fps` found in the `info.json` file in the `playersprites` folder.
+        self.animations = AnimationScheduler()
+        for pictureset in (self.idle_pictureset, self.dead_pictureset, self.walk_pictureset):
+            frames = loadFrames("./playersprites/"+pictureset["name"]+"{}).png", pictureset["count"])
+            self.animations.add(pictureset["name"], frames, pictureset["fps"])
+        # the animation and frame number the player is showing, so the image only gets swapped when that changes
+        self.showing = None
+        # the first frame shown is the one indicated in the commandline parameters
         self.image = pygame.image.load(argDict["player_image"])
 
         # create a pygame rectangle from the dimensions of the image
@@ -239,9 +461,8 @@ class Player(pygame.sprite.Sprite):
         # calculate the position of the mouse
         self.MoveWithMouse()
 
-        # A distinction has to be made between the sprite's position in the game window (self.rect.topleft) and in the game world (self.actual_position)
-        #       The sprite's game window position is what the user sees, but for that positioning to be calculated correctly, the sprite's
-        #       actual position must be remembered.
+        # record the sprite's actual position in the game world. Where that is in the game window is worked out
+        #       when it's drawn (see `CameraGroup`)
         self.actual_position = (self.x, self.y)
 
     def MoveWithMouse(self):
@@ -272,24 +493,33 @@ class Player(pygame.sprite.Sprite):
         self.y += int(min(5, self.distance/10) * math.sin(angle))
 
     # applies changes to the player sprite, such as animation and position
-    def update(self, position):
+    # `milliseconds` is the time since the last update. Without it the animations move one frame per update.
+    def update(self, milliseconds=None):
+        # move every animation along
+        if milliseconds is None:
+            milliseconds = 1000 / GAME_FPS
+        self.animations.advance(milliseconds)
+
         # If the distance from the mouse to the player is less than 10, loop-play the "Idle" animation, because the player isn't moving
         if self.distance < 10:
-            self.idle_imagenum = max(1, (self.idle_imagenum + 1) % self.idle_imagelimit)
-            self.image = pygame.image.load("./playersprites/"+self.idle_pictureset["name"]+str(self.idle_imagenum)+").png")
+            pictureset = self.idle_pictureset
         # otherwise, loop-play the "Walk" animation
         elif self.distance >= 10:
-            self.walk_imagenum = max(1, (self.walk_imagenum + 1) % self.walk_imagelimit)
-            self.image = pygame.image.load("./playersprites/"+self.walk_pictureset["name"]+str(self.walk_imagenum)+").png")
+            pictureset = self.walk_pictureset
 
         # if the new position of the sprite would put it outside the boundaries of the window, revert to the previous position stored in `self.old_loc`
-        # Also, load the "Dead" animation frames when the player hits a wall
-        if self.actual_position[0] <= 0 or self.actual_position[0]+self.IMAGE_WIDTH >= 1920 or self.actual_position[1] <= 0 or self.actual_position[1]+self.IMAGE_HEIGHT >= 1080:
-            self.dead_imagenum = max(1, (self.dead_imagenum + 1) % self.dead_imagelimit)
-            self.image = pygame.image.load("./playersprites/"+self.dead_pictureset["name"]+str(self.dead_imagenum)+").png")
+        # Also, play the "Dead" animation frames when the player hits a wall
+        if self.actual_position[0] <= 0 or self.actual_position[0]+self.IMAGE_WIDTH >= WORLD_WIDTH or self.actual_position[1] <= 0 or self.actual_position[1]+self.IMAGE_HEIGHT >= WORLD_HEIGHT:
+            pictureset = self.dead_pictureset
             self.actual_position = self.old_loc
-        # add the camera offset to the player sprite's actual position in the game world, "moving" them to the center of the window
-        self.rect.topleft = (self.actual_position[0]+position[0], self.actual_position[1]+position[1])
+
+        # only swap the image if the player should be showing a different frame than last update
+        showing = (pictureset["name"], self.animations.clocks[pictureset["name"]])
+        if showing != self.showing:
+            self.showing = showing
+            self.image = self.animations.frame(pictureset["name"])
+        # keep the rect at the player's actual position in the game world. The camera keeps that in the center of the window
+        self.rect.topleft = self.actual_position
 
 class Bullet(pygame.sprite.Sprite):
     """
@@ -305,30 +535,31 @@ class Bullet(pygame.sprite.Sprite):
         # the current set of sprite images to use
         self.bullet_pictureset = bullet_animations["Shot"]
 
-        # load the sprite as an image
-        # There are three animations that will play in this game: Idle, Dead, and Walk.
-        # Animations are loop-played, meaning, since each frame of every animation are numbered (e.g. `Dead (1).png`, `Dead (2).png`, etc.),
+        # There is one animation that will play in this game: the snowball flying.
+        # Animations are loop-played, meaning, since each frame of every animation are numbered (e.g. `snowball_01.png`, `snowball_02.png`, etc.),
         #       we can loop through them using the `<animation_name>_imagenum` variable. `<animation_name>_imagelimit`
-        #       keeps the program from trying to load an image that doesn't exist. (We don't want to open `Dead (17).png` if
-        #       there are only 16 frames in the Dead animation.) `<animation_name>_imagelimit` gets its value from the `info.json`
-        #       file in the `playersprites` folder.
+        #       keeps the program from trying to show an image that doesn't exist. `<animation_name>_imagelimit` gets its value
+        #       from the `info.json` file in the `snowball` folder. `bullet_waited` is how many milliseconds the current frame
+        #       has been showing, and `bullet_frame_time` how long each one shows for (from the `fps` in the same file).
         self.bullet_imagenum = 1
         self.bullet_imagelimit = self.bullet_pictureset["count"]
-        # this is how we will load any frame of an animation (here, we load the first `Idle` frame).
-        # Here, we save the upright, unrotated version of the sprite (we want to rotate it so that it faces the direction it's shot at)
-        self.image_unrot = pygame.image.load("./snowball/"+self.bullet_pictureset["name"]+str(self.bullet_imagenum)+".png")
-        
-        # create a pygame rectangle from the dimensions of the image
-        self.rect = self.image_unrot.get_rect()
+        self.bullet_waited = 0
+        self.bullet_frame_time = 1000 / self.bullet_pictureset["fps"]
 
         # angle between the horizontal and the mouse pointer.
         # Using the same trigonometry to move the player sprite, we will save the angle the bullet will
         #       fly at.
         self.angle = self.getBulletDirection(mouse_pos)
 
-        # rotate the sprite to face the direction saved in `self.angle`. We convert it from radians to degrees
-        #       and add 180 to it (because when I did the math, bullets were facing the opposite direction)
-        self.image = pygame.transform.rotate(self.image_unrot, (self.angle*57.29578)+180)
+        # the sprite has to be rotated to face the direction saved in `self.angle`. We convert it from radians to degrees
+        #       and add 180 to it (because when I did the math, bullets were facing the opposite direction).
+        #       The frames were already rotated to `ROTATION_BUCKETS` angles by `loadBulletFrames`, so pick the closest one
+        rotation = (self.angle*-57.29578 + 180) % 360
+        self.rotation = round(rotation / (360 / ROTATION_BUCKETS)) % ROTATION_BUCKETS
+        self.image = bullet_frames[self.rotation][self.bullet_imagenum-1]
+
+        # create a pygame rectangle from the dimensions of the image
+        self.rect = self.image.get_rect()
 
         # set the position of the sprite on the window
         self.x = player_pos[0]
@@ -353,38 +584,37 @@ class Bullet(pygame.sprite.Sprite):
         # use the arctan function to find the angle from the horizontal to the desired position
         return math.atan2(dy, dx)
 
-    # adds the offset calculated in the camera class to its actual position in the world (not with respect to the game window)
-    def update(self, position):
-        # get next frame of the bullet animation
-        self.bullet_imagenum = max(1, (self.bullet_imagenum + 1) % self.bullet_imagelimit)
-        self.image_unrot = pygame.image.load("./snowball/"+self.bullet_pictureset["name"]+str(self.bullet_imagenum)+".png")
+    # moves the bullet along and plays its animation (`milliseconds` since the last update)
+    def update(self, milliseconds):
+        # if it's time for the next frame of the bullet animation (a slow tick can skip frames), get it, already rotated
+        #       to face the right direction
+        self.bullet_waited += milliseconds
+        steps = int(self.bullet_waited // self.bullet_frame_time)
+        self.bullet_waited -= steps * self.bullet_frame_time
+        if steps:
+            self.bullet_imagenum = skipFrames(self.bullet_imagenum, self.bullet_imagelimit, steps)
+            self.image = bullet_frames[self.rotation][self.bullet_imagenum-1]
+            self.rect.size = self.image.get_size()
 
-        # rotate the bullet to face the right direction and load
-        self.image = pygame.transform.rotate(self.image_unrot, (self.angle*-57.29578)+180)
-        
         # adjust the position of the bullet with respect to the `self.angle`. Speed of bullet is "10"
         self.x += int(10 * math.cos(self.angle))
         self.y += int(10 * math.sin(self.angle))
 
         # save new position in world coords
-        self.actual_position = (self.x,self.y)
+        self.rect.topleft = self.actual_position = (self.x,self.y)
         # if the new position of the sprite would put it outside the boundaries of the window,
         #       kill the sprite
-        if self.actual_position[0] <= 0 or self.actual_position[0] >= 1920 or self.actual_position[1] <= 0 or self.actual_position[1] >= 1080:
+        if self.actual_position[0] <= 0 or self.actual_position[0] >= WORLD_WIDTH or self.actual_position[1] <= 0 or self.actual_position[1] >= WORLD_HEIGHT:
             self.kill()
-        # add the camera offset to the player sprite's actual position in the game world, "moving" them to the center of the window
-        else:
-            self.rect.topleft = (self.actual_position[0]+position[0], self.actual_position[1]+position[1])
 
 def main():
     pygame.init()
+    telemetry.start()
 
-    # initialize the mixer and load the sounds effects
-    pygame.mixer.init(buffer=64)
-    snowball_thrown = pygame.mixer.Sound("./sounds/throw.wav")
-    snowball_hit = pygame.mixer.Sound("./sounds/hit.wav")
-    snowball_thrown.set_volume(0.5)
-    snowball_hit.set_volume(0.5)
+    # initialize the mixer and load the sounds effects. At most three copies of each play at once (another one
+    #       cuts off the oldest), and a hit can take a channel from a throw if they're all busy
+    sounds.load("throw", "./sounds/throw.wav", "sfx", priority=0, max_voices=3, volume=0.5)
+    sounds.load("hit", "./sounds/hit.wav", "sfx", priority=1, max_voices=3, volume=0.5)
 
     # sets the window title using title found in command line instruction
     pygame.display.set_caption(WINDOW_TITLE)
@@ -401,21 +631,30 @@ def main():
     # construct the ball
     p1 = Player()
 
-    # construct the background image
-    bkgr = Background()
+    # construct the background layers
+    bkgr = loadBackground()
 
     # construct the camera
-    camera = Camera()
+    camera = Camera((WINDOW_WIDTH, WINDOW_HEIGHT))
 
-    # groups for all sprites that are not the player
-    main_sprites = pygame.sprite.Group()
-    bullet_sprites = pygame.sprite.Group()
-    mob_sprites = pygame.sprite.Group()
+    # split the world into cells for the enemies' flow field. The world is open, so every cell can be walked through
+    field_cols = math.ceil(WORLD_WIDTH / CHASE_CELL)
+    field_rows = math.ceil(WORLD_HEIGHT / CHASE_CELL)
+    flow_field = FlowField(field_cols, field_rows, gridEdges(field_cols, field_rows, lambda col, row: True))
+
+    # load every frame of the enemies' and snowball's animations, along with their collision masks
+    loadMobFrames()
+    loadBulletFrames()
+    if VERBOSE:
+        print(masks.report())
+
+    # groups for all sprites. Their members stay in world coordinates, and the groups scroll them with the camera when they draw
+    main_sprites = CameraGroup(camera)
+    bullet_sprites = CameraGroup(camera)
+    mob_sprites = MobGroup(camera, ai=AIScheduler(AI_NEAR, AI_MID, AI_MID_EVERY, AI_FAR_EVERY, AI_BUDGET) if AI_LOD else None)
 
     # add sprites to the sprite group
-    # The order we add these to the group is the order they are drawn to the screen,
-    #       so we add the background first to keep the player from being covered
-    main_sprites.add(bkgr)
+    # The background isn't in a group: it's drawn first, on its own, to keep the player from being covered
     main_sprites.add(p1)
 
     # create the enemy objects and add them to the `mob_sprites` group
@@ -426,24 +665,34 @@ def main():
     running = True
     while running:
 
-        # fill screen with color from commandline
-        screen.fill(colors[argDict["color"]]['rgb'])
-
         # sets frames per second to what's found in commandline instruction
-        clock.tick(GAME_FPS)
+        # `elapsed` is how many milliseconds passed since the last frame, which is how far the animations move
+        elapsed = clock.tick(GAME_FPS)
+        sounds.tick()
 
         # Did the user click the window close button?
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             # if the user clicks the left mouse button
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button != 3:
                 # play the sound of a thrown snowball
-                snowball_thrown.play()
+                sounds.play("throw")
                 # create the snowball object
                 snow_bullet = Bullet(p1.actual_position,mouse_pos)
                 # add it to the bullet_sprites group
                 bullet_sprites.add(snow_bullet)
+                telemetry.log("shot", p1.x, p1.y, 0)
+            # if the user clicks the right mouse button, auto-aim at the living enemy closest to the mouse pointer
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                # the mouse pointer's position in world coordinates
+                target = mob_sprites.nearest(camera.toWorld(event.pos))
+                if target:
+                    # Bullet aims at a point on the screen, so convert the enemy's center back to screen coordinates
+                    _, mob = target[0]
+                    sounds.play("throw")
+                    bullet_sprites.add(Bullet(p1.actual_position,camera.toWindow(mob.center_position)))
+                    telemetry.log("shot", p1.x, p1.y, 1)
 
         # attempt to move the player by sending the positioning of the mouse
         if pygame.mouse.get_focused():
@@ -453,34 +702,53 @@ def main():
         # focuses in on the player so that it is always centered in the game window
         camera.update(p1)
 
-        # loop through all sprites in all groups and apply the camera offset to them
-        for sprite in main_sprites:
-            sprite.update(camera.apply())
-        for sprite in bullet_sprites:
-            sprite.update(camera.apply())
-        for sprite in mob_sprites:
-            sprite.update(camera.apply())
-
-        # loop through all bullet and mob sprites and check for collisions between bullets and mobs
+        # scroll the background with the camera, and move the sprites and their animations along
+        #       (the sprite groups apply the camera offset themselves when they draw)
+        bkgr.update(camera.apply())
+        p1.update(elapsed)
+        bullet_sprites.update(elapsed)
+        # point the flow field at the player's cell (this only searches again if the player changed cells),
+        #       then let every enemy follow it
+        player_center = (p1.actual_position[0] + p1.IMAGE_WIDTH/2, p1.actual_position[1] + p1.IMAGE_HEIGHT/2)
+        flow_field.update(flow_field.cell(int(player_center[0] // CHASE_CELL), int(player_center[1] // CHASE_CELL)))
+        mob_sprites.advance(elapsed)
+        mob_sprites.update(flow_field, player_center, elapsed)
+        particles.update(elapsed)
+
+        # loop through all bullets and check for collisions with the mobs near them. Rather than checking every mob,
+        #       ask the mob group's spatial index for the few close enough to possibly touch the bullet
         for bullet in bullet_sprites:
-            for mob in mob_sprites:
-                # if a bullet hits a mob
-                if bullet.rect.colliderect(mob.rect):
-                    # play the sound
-                    snowball_hit.play()
+            bullet_center = (bullet.actual_position[0] + bullet.rect.width/2, bullet.actual_position[1] + bullet.rect.height/2)
+            reach = mob_sprites.max_reach + math.hypot(bullet.rect.width, bullet.rect.height) / 2
+            for _, mob in mob_sprites.within(bullet_center, reach):
+                # if a bullet hits a mob (their rectangles overlap, and so do the pixels that aren't see-through)
+                if masks.collide(bullet, mob):
+                    # play the sound, and spray snow from where the snowball was
+                    sounds.play("hit")
+                    particles.emit(bullet_center, IMPACT_PARTICLES, colors=SNOW_COLORS)
                     # kill the bullet
                     bullet.kill()
-                    # switch the mob's hit variable to false so it starts playing its death animation
-                    mob.hit = False
+                    # start the mob's death animation
+                    mob_sprites.hit(mob)
+                    telemetry.log("kill", int(mob.center_position[0]), int(mob.center_position[1]))
 
-        # draw the sprites to the screen
+        # draw the background (the window color only shows where the background layers don't cover it),
+        #       then the sprites on top of it
+        bkgr.draw(screen)
         main_sprites.draw(screen)
         bullet_sprites.draw(screen)
         mob_sprites.draw(screen)
+        particles.draw(screen, camera.apply())
         # show screen
         pygame.display.flip()
 
     # Done! Time to quit.
+    telemetry.close()
+    if VERBOSE:
+        print(sounds.report())
+        if mob_sprites.ai is not None:
+            print(mob_sprites.ai.report())
+        print(telemetry.report())
     pygame.quit()
 
 if __name__=='__main__':
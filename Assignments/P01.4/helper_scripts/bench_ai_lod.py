@@ -0,0 +1,77 @@
+# measures how long the enemies take to chase the player each frame, with every enemy chasing every frame
+#       (ai_lod=false) and with the far ones chasing less often (ai_lod.py), as the number of enemies grows
+# the enemies are spread over the whole world and the player stands still in the top left corner,
+#       so most of them start out of sight
+#
+# run from the P01.4 folder:   python helper_scripts/bench_ai_lod.py counts=100,1000,5000 frames=200 ai_budget=100
+#       it also accepts the same parameters as game_pt4.py (width, height, mob_speed, etc.)
+
+import os
+import sys
+import time
+import random
+
+# game_pt4.py and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# no window is needed, but pygame has to think it has one to load images
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# game_pt4.py reads its settings from the command line when it's imported, so fill in any that weren't given
+DEFAULTS = {"title": "bench", "width": "1280", "height": "720", "startx": "20", "starty": "20", "fps": "60",
+            "player_image": "./playersprites/Idle (1).png", "color": "white", "background_image": "./background.jpg",
+            "enemy_count": "0"}
+given = {arg.split('=')[0] for arg in sys.argv if '=' in arg}
+sys.argv += [key+'='+value for key, value in DEFAULTS.items() if key not in given]
+
+import math
+import pygame
+import game_pt4 as game
+from ai_lod import AIScheduler
+from flow_field import FlowField, gridEdges
+from helper_module import mykwargs
+
+def timeChase(count, frames, ai):
+    # the average milliseconds one frame of `MobGroup.update` takes, and the scheduler (if there is one)
+    random.seed(1)
+    camera = game.Camera((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    player = game.Player()
+    camera.update(player)
+    mobs = game.MobGroup(camera, ai=ai)
+    for _ in range(count):
+        mob = game.Enemy()
+        mob.x, mob.y = random.uniform(0, game.WORLD_WIDTH), random.uniform(0, game.WORLD_HEIGHT)
+        mob.rect.topleft = mob.actual_position = (mob.x, mob.y)
+        mob.center_position = (mob.x + mob.rect.width/2, mob.y + mob.rect.height/2)
+        mobs.add(mob)
+    cols, rows = math.ceil(game.WORLD_WIDTH / game.CHASE_CELL), math.ceil(game.WORLD_HEIGHT / game.CHASE_CELL)
+    field = FlowField(cols, rows, gridEdges(cols, rows, lambda col, row: True))
+    target = (player.actual_position[0] + player.IMAGE_WIDTH/2, player.actual_position[1] + player.IMAGE_HEIGHT/2)
+    field.update(field.cell(int(target[0] // game.CHASE_CELL), int(target[1] // game.CHASE_CELL)))
+    start = time.perf_counter()
+    for _ in range(frames):
+        mobs.update(field, target, 1000 / 60)
+    return (time.perf_counter() - start) / frames * 1000
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    counts = [int(n) for n in kargs.get("counts", "100,1000,5000").split(',')]
+    frames = int(kargs.get("frames", 200))
+
+    pygame.init()
+    pygame.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    game.loadMobFrames()
+
+    print(f"world {game.WORLD_WIDTH}x{game.WORLD_HEIGHT}, window {game.WINDOW_WIDTH}x{game.WINDOW_HEIGHT}, "
+          f"budget {game.AI_BUDGET}, average of {frames} frames")
+    print(f"{'enemies':>8} {'every ms':>9} {'lod ms':>9} {'thought':>8}")
+    for count in counts:
+        every = timeChase(count, frames, None)
+        ai = AIScheduler(game.AI_NEAR, game.AI_MID, game.AI_MID_EVERY, game.AI_FAR_EVERY, game.AI_BUDGET)
+        lod = timeChase(count, frames, ai)
+        print(f"{count:>8} {every:>9.3f} {lod:>9.3f} {ai.thought/ai.ticks:>8.1f}")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# measures how long particles.py takes to move and draw a screen full of snowflakes each frame
+# the particles are kept alive for the whole run, so the count stays at `particles` the entire time
+#
+# run from the P01.4 folder:   python helper_scripts/bench_particles.py particles=20000 frames=300
+
+import os
+import sys
+import time
+
+# particles.py and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# no window is needed, but pygame has to think it has one to draw into
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from helper_module import mykwargs
+from particles import ParticleSystem
+
+# how long a frame's particles are allowed to take
+BUDGET = 2.0
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    count = int(kargs.get("particles", 20000))
+    frames = int(kargs.get("frames", 300))
+    width = int(kargs.get("width", 1280))
+    height = int(kargs.get("height", 720))
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    particles = ParticleSystem(count)
+    # bursts spread over the screen, living longer than the run
+    bursts = 100
+    for burst in range(bursts):
+        particles.emit(((burst * 97) % width, (burst * 61) % height), count // bursts, speed=(10, 200),
+                       life=(60000, 90000))
+
+    update_time = draw_time = 0
+    for frame in range(frames):
+        start = time.perf_counter()
+        particles.update(1000 / 60)
+        middle = time.perf_counter()
+        particles.draw(screen)
+        end = time.perf_counter()
+        update_time += middle - start
+        draw_time += end - middle
+    per_frame = (update_time + draw_time) / frames * 1000
+    print(f"{particles.count} particles: update {update_time/frames*1000:.3f} ms, draw {draw_time/frames*1000:.3f} ms, "
+          f"total {per_frame:.3f} ms a frame ({'ok' if per_frame <= BUDGET else 'OVER'} the {BUDGET} ms budget)")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
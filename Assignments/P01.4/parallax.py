@@ -0,0 +1,104 @@
+"""
+Parallax scrolling: a background made of layers that scroll at different speeds, so the ones that move
+slower look farther away.
+
+Each layer's image is converted to the screen's pixel format (and, if it repeats, tiled into one bigger
+image) once, when it's added. Every frame only the part of each layer that's on screen is blitted, with
+one blit per layer, and layers hidden behind a solid layer that covers the whole window aren't drawn at all.
+"""
+import math
+import pygame
+
+class ParallaxLayer():
+    """
+    One image of a ParallaxBackground.
+        factor    - how many pixels it scrolls for every pixel the camera moves. 1 moves with the world,
+                    less than 1 looks farther away (0 never moves)
+        repeat    - (x, y), whether the image repeats forever left/right and up/down
+        position  - where its top left corner is on screen when the camera offset is (0, 0)
+    """
+    def __init__(self, image, view_size, factor=1.0, repeat=(False, False), position=(0, 0)):
+        self.factor = factor
+        self.repeat = repeat
+        self.position = position
+        self.view_width, self.view_height = view_size
+        # images without see-through pixels are converted without an alpha channel, which blits faster
+        #       (and lets the background skip drawing whatever is behind them)
+        self.opaque = not image.get_flags() & pygame.SRCALPHA
+        image = image.convert() if self.opaque else image.convert_alpha()
+        self.width, self.height = image.get_size()
+        # a repeating image is tiled until any window-sized piece of it, starting inside the first copy, fits in one piece
+        copies_x = math.ceil(self.view_width / self.width) + 1 if repeat[0] else 1
+        copies_y = math.ceil(self.view_height / self.height) + 1 if repeat[1] else 1
+        if copies_x == 1 and copies_y == 1:
+            self.image = image
+        else:
+            self.image = pygame.Surface((self.width*copies_x, self.height*copies_y), 0 if self.opaque else pygame.SRCALPHA, image)
+            for col in range(copies_x):
+                for row in range(copies_y):
+                    self.image.blit(image, (col*self.width, row*self.height))
+
+    def slice(self, camera_offset):
+        """
+        Returns (where on screen, which part of `self.image`) for the part of the layer that's visible
+        with the camera at `camera_offset`, as two pygame Rects, or None if none of it is on screen
+        """
+        screen_x = self.position[0] + camera_offset[0]*self.factor
+        screen_y = self.position[1] + camera_offset[1]*self.factor
+        left, source_x, width = self.axis(screen_x, self.width, self.view_width, self.repeat[0])
+        top, source_y, height = self.axis(screen_y, self.height, self.view_height, self.repeat[1])
+        if width <= 0 or height <= 0:
+            return None
+        return pygame.Rect(left, top, width, height), pygame.Rect(source_x, source_y, width, height)
+
+    @staticmethod
+    def axis(screen, size, view, repeat):
+        # for one direction: the first visible pixel on screen, where that is in the image, and how many pixels are visible
+        screen = int(screen)
+        if repeat:
+            return 0, -screen % size, view
+        start = max(0, screen)
+        return start, start - screen, min(screen + size, view) - start
+
+class ParallaxBackground():
+    """
+    Layers drawn back to front, with `fill_color` behind them wherever no layer covers the window.
+    Call `update(camera_offset)` every frame, then `draw(surface)` before drawing the sprites.
+    `pixels` is how many pixels the last `draw` covered.
+    """
+    def __init__(self, view_size, fill_color=(0, 0, 0)):
+        self.view_size = view_size
+        self.view = pygame.Rect((0, 0), view_size)
+        self.fill_color = fill_color
+        self.layers = []
+        self.camera_offset = (0, 0)
+        self.pixels = 0
+
+    def add(self, image, factor=1.0, repeat=(False, False), position=(0, 0)):
+        """
+        Adds a layer in front of the ones already added (see ParallaxLayer for the parameters) and returns it
+        """
+        layer = ParallaxLayer(image, self.view_size, factor, repeat, position)
+        self.layers.append(layer)
+        return layer
+
+    def update(self, camera_offset):
+        self.camera_offset = camera_offset
+
+    def draw(self, surface):
+        slices = [layer.slice(self.camera_offset) for layer in self.layers]
+        # nothing behind the front-most solid layer that fills the whole window can be seen
+        first = None
+        for index in range(len(self.layers)-1, -1, -1):
+            if self.layers[index].opaque and slices[index] is not None and slices[index][0] == self.view:
+                first = index
+                break
+        self.pixels = 0
+        if first is None:
+            surface.fill(self.fill_color)
+            self.pixels = self.view.width * self.view.height
+            first = 0
+        for layer, visible in zip(self.layers[first:], slices[first:]):
+            if visible is not None:
+                surface.blit(layer.image, visible[0], visible[1])
+                self.pixels += visible[1].width * visible[1].height
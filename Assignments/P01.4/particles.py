@@ -0,0 +1,104 @@
+"""
+Snow bursts without a sprite per snowflake.
+
+A Sprite object for every particle would mean thousands of Python objects to update, `kill()` and blit
+every frame. The ParticleSystem keeps every particle in a few NumPy arrays instead (positions, velocities,
+time left to live, and colors), moves them all at once with array math, drops the finished ones with a
+boolean mask, and writes them straight into the screen's pixels with `pygame.surfarray`.
+"""
+import math
+import numpy as np
+import pygame
+
+class ParticleSystem():
+    """
+    Up to `capacity` particles, in world coordinates. Each one is a `size` x `size` square of one color.
+    `emit` starts a burst, `update(milliseconds)` moves everything along, and `draw(surface, camera_offset)`
+    paints the living particles. `gravity` (pixels per second, per second) pulls them down, and `drag` is
+    the fraction of their speed they keep each second.
+    When the system is full, new particles replace the ones closest to the end of their lives.
+    """
+    def __init__(self, capacity=20000, size=2, gravity=300.0, drag=0.3):
+        self.capacity = capacity
+        self.size = size
+        self.gravity = gravity
+        self.drag = drag
+        # only the first `count` rows of each array are living particles
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.rng = np.random.default_rng()
+
+    def emit(self, position, count, speed=(40, 160), life=(300, 800), colors=((255, 255, 255),), spread=(0, 2*math.pi)):
+        """
+        Starts `count` particles at `position` (world coordinates), flying out at a random angle within `spread`
+        (radians, 0 is right and pi/2 is down) at `speed` pixels a second, each living `life` milliseconds
+        (both (lowest, highest), picked at random), with a color picked at random from `colors`.
+        """
+        count = min(count, self.capacity)
+        if self.count + count > self.capacity:
+            # make room by dropping the particles with the least time left
+            keep = self.capacity - count
+            order = np.argsort(self.life[:self.count])[self.count-keep:]
+            for array in (self.position, self.velocity, self.life, self.color):
+                array[:keep] = array[order]
+            self.count = keep
+        start, end = self.count, self.count + count
+        angle = self.rng.uniform(spread[0], spread[1], count)
+        speeds = self.rng.uniform(speed[0], speed[1], count)
+        self.position[start:end] = position
+        self.velocity[start:end, 0] = np.cos(angle) * speeds
+        self.velocity[start:end, 1] = np.sin(angle) * speeds
+        self.life[start:end] = self.rng.uniform(life[0], life[1], count)
+        palette = np.asarray(colors, dtype=np.uint8)
+        self.color[start:end] = palette[self.rng.integers(0, len(palette), count)]
+        self.count = end
+
+    def update(self, milliseconds):
+        """
+        Moves every particle `milliseconds` forward and removes the ones whose time ran out
+        """
+        n = self.count
+        if n == 0:
+            return
+        seconds = milliseconds / 1000
+        velocity = self.velocity[:n]
+        velocity[:, 1] += self.gravity * seconds
+        velocity *= self.drag ** seconds
+        self.position[:n] += velocity * seconds
+        life = self.life[:n]
+        life -= milliseconds
+        alive = life > 0
+        living = int(np.count_nonzero(alive))
+        if living < n:
+            # pack the living particles into the front of the arrays
+            for array in (self.position, self.velocity, self.life, self.color):
+                array[:living] = array[:n][alive]
+            self.count = living
+
+    def draw(self, surface, camera_offset=(0, 0)):
+        """
+        Writes the living particles into `surface`, shifted by `camera_offset` like every other sprite.
+        Returns how many were on screen.
+        """
+        n = self.count
+        if n == 0:
+            return 0
+        width, height = surface.get_size()
+        size = self.size
+        # screen position of each particle's top left pixel, and only the ones whose whole square fits on screen
+        x = (self.position[:n, 0] + camera_offset[0]).astype(np.int32)
+        y = (self.position[:n, 1] + camera_offset[1]).astype(np.int32)
+        visible = (x >= 0) & (y >= 0) & (x <= width - size) & (y <= height - size)
+        x, y, color = x[visible], y[visible], self.color[:n][visible]
+        if len(x) == 0:
+            return 0
+        # the array is a view of the surface's own pixels, so it has to be let go (deleted) before the surface is blitted
+        pixels = pygame.surfarray.pixels3d(surface)
+        for dx in range(size):
+            for dy in range(size):
+                pixels[x + dx, y + dy] = color
+        del pixels
+        return len(x)
@@ -0,0 +1,223 @@
+"""
+Spatial index for answering "what is near this point?" questions without looping
+through every sprite in a group.
+
+The index is split into two parts:
+    - a KD-tree built over every entry at the time of the last rebuild (the static part)
+    - a small dictionary of entries inserted or moved since then (the dynamic part)
+Removing or moving an entry only marks its tree copy as stale. Once enough of the tree has gone
+stale, or enough entries pile up in the dynamic part, the whole tree is rebuilt in one go.
+"""
+import heapq
+import itertools
+from operator import itemgetter
+
+# how many entries a KD-tree leaf holds before it is split in two.
+#       Checking a handful of points in a plain loop is cheaper than recursing all the way down.
+LEAF_SIZE = 8
+
+class KDTree():
+    """
+    A static 2D KD-tree over (x, y, item) entries.
+    Internal nodes are (axis, split, left, right) tuples and leaves are lists of entries.
+    The tree is never modified after it is built. `skip` is a set of items the queries ignore.
+    """
+    def __init__(self, entries):
+        self.size = len(entries)
+        self.root = self._build(list(entries), 0)
+
+    def _build(self, entries, depth):
+        # small enough to be a leaf
+        if len(entries) <= LEAF_SIZE:
+            return entries
+        # alternate between splitting on x (axis 0) and y (axis 1) at every level of the tree
+        axis = depth % 2
+        entries.sort(key=itemgetter(axis))
+        mid = len(entries) // 2
+        return (axis, entries[mid][axis], self._build(entries[:mid], depth+1), self._build(entries[mid:], depth+1))
+
+    def nearest(self, x, y, k, heap, skip, accept, rejected, counter):
+        """
+        Pushes the k closest entries into `heap`, a max-heap of (-squared distance, tiebreak, item)
+        shared with the caller so results from the dynamic part of the index can be merged in.
+        """
+        self._nearest(self.root, x, y, k, heap, skip, accept, rejected, counter)
+
+    def _nearest(self, node, x, y, k, heap, skip, accept, rejected, counter):
+        # leaf: check every entry in it
+        if isinstance(node, list):
+            for ex, ey, item in node:
+                if item in skip:
+                    continue
+                if accept is not None and not accept(item):
+                    rejected.append(item)
+                    continue
+                dist = (ex-x)*(ex-x) + (ey-y)*(ey-y)
+                if len(heap) < k:
+                    heapq.heappush(heap, (-dist, next(counter), item))
+                elif dist < -heap[0][0]:
+                    heapq.heapreplace(heap, (-dist, next(counter), item))
+            return
+        axis, split, left, right = node
+        # how far the query point is from the splitting line
+        diff = (x if axis == 0 else y) - split
+        near, far = (left, right) if diff < 0 else (right, left)
+        self._nearest(near, x, y, k, heap, skip, accept, rejected, counter)
+        # only look on the other side of the line if something there could beat the worst result so far
+        if len(heap) < k or diff*diff < -heap[0][0]:
+            self._nearest(far, x, y, k, heap, skip, accept, rejected, counter)
+
+    def within(self, x, y, radius, found, skip, accept, rejected):
+        """
+        Appends (squared distance, item) for every entry at most `radius` away from (x, y) to `found`
+        """
+        self._within(self.root, x, y, radius, radius*radius, found, skip, accept, rejected)
+
+    def _within(self, node, x, y, radius, radius_sq, found, skip, accept, rejected):
+        if isinstance(node, list):
+            for ex, ey, item in node:
+                if item in skip:
+                    continue
+                dist = (ex-x)*(ex-x) + (ey-y)*(ey-y)
+                if dist <= radius_sq:
+                    if accept is not None and not accept(item):
+                        rejected.append(item)
+                    else:
+                        found.append((dist, item))
+            return
+        axis, split, left, right = node
+        diff = (x if axis == 0 else y) - split
+        # the circle can only reach a side of the line it overlaps
+        if diff - radius < 0:
+            self._within(left, x, y, radius, radius_sq, found, skip, accept, rejected)
+        if diff + radius >= 0:
+            self._within(right, x, y, radius, radius_sq, found, skip, accept, rejected)
+
+class SpatialIndex():
+    """
+    A KD-tree plus a dynamic buffer, so items can be inserted, moved, and removed at any time
+    while nearest-k and radius queries stay sub-linear.
+    Items can be any hashable object (here, sprites) and positions are (x, y) world coordinates.
+
+    Every query takes an optional `accept` function. Items it returns False for are left out of the
+    results AND dropped from the index, so a condition that never becomes true again
+    (like an enemy that has started dying) cleans itself out of the index the first time it is seen.
+    """
+    def __init__(self, rebuild_fraction=0.25, min_rebuild=16):
+        # the position of every item currently in the index
+        self.positions = {}
+        # items inserted or moved since the tree was last built
+        self.pending = {}
+        # items whose copy in the tree is out of date (removed or moved since the last build)
+        self.stale = set()
+        # the tree gets rebuilt once the pending + stale entries pass
+        #       max(min_rebuild, rebuild_fraction * number of items)
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild = min_rebuild
+        self.tree = KDTree([])
+        # the items that were in the index when the tree was built
+        self.tree_items = set()
+        self.rebuilds = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def insert(self, item, position):
+        # inserting an item that's already in the tree just moves it, so its tree copy goes stale
+        if item in self.tree_items:
+            self.stale.add(item)
+        self.positions[item] = position
+        self.pending[item] = position
+        self._maybeRebuild()
+
+    # moving is the same as re-inserting at a new position
+    move = insert
+
+    def discard(self, item):
+        # removes an item, doing nothing if it isn't in the index
+        if item not in self.positions:
+            return
+        del self.positions[item]
+        if item in self.pending:
+            del self.pending[item]
+        # an item only has a copy in the tree if it was there for the last rebuild
+        if item in self.tree_items:
+            self.stale.add(item)
+        self._maybeRebuild()
+
+    def moveMany(self, moves):
+        """
+        Moves (or inserts) many items at once, from a list of (item, position) pairs.
+        When enough of them move to need a rebuild anyway (e.g. every enemy walked this tick),
+        the tree is rebuilt once at the end instead of several times along the way.
+        """
+        if len(self.pending) + len(self.stale) + len(moves) > max(self.min_rebuild, self.rebuild_fraction * len(self.positions)):
+            for item, position in moves:
+                self.positions[item] = position
+            self.rebuild()
+        else:
+            for item, position in moves:
+                self.insert(item, position)
+
+    def rebuild(self):
+        # throw the old tree away and build one over every item's current position
+        entries = [(pos[0], pos[1], item) for item, pos in self.positions.items()]
+        self.tree = KDTree(entries)
+        self.tree_items = set(self.positions)
+        self.pending.clear()
+        self.stale.clear()
+        self.rebuilds += 1
+
+    def _maybeRebuild(self):
+        if len(self.pending) + len(self.stale) > max(self.min_rebuild, self.rebuild_fraction * len(self.positions)):
+            self.rebuild()
+
+    def nearest(self, position, k=1, accept=None):
+        """
+        Returns a list of up to `k` (distance, item) pairs, closest first
+        """
+        x, y = position
+        heap = []
+        rejected = []
+        counter = itertools.count()
+        self.tree.nearest(x, y, k, heap, self.stale, accept, rejected, counter)
+        # the dynamic part is small, so a plain loop over it is fine
+        for item, (ex, ey) in self.pending.items():
+            if accept is not None and not accept(item):
+                rejected.append(item)
+                continue
+            dist = (ex-x)*(ex-x) + (ey-y)*(ey-y)
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist, next(counter), item))
+            elif dist < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist, next(counter), item))
+        self._dropRejected(rejected)
+        return [((-neg_dist)**0.5, item) for neg_dist, _, item in sorted(heap, reverse=True)]
+
+    def within(self, position, radius, accept=None):
+        """
+        Returns a list of (distance, item) pairs for every item at most `radius` away, closest first
+        """
+        x, y = position
+        found = []
+        rejected = []
+        self.tree.within(x, y, radius, found, self.stale, accept, rejected)
+        radius_sq = radius*radius
+        for item, (ex, ey) in self.pending.items():
+            dist = (ex-x)*(ex-x) + (ey-y)*(ey-y)
+            if dist <= radius_sq:
+                if accept is not None and not accept(item):
+                    rejected.append(item)
+                else:
+                    found.append((dist, item))
+        self._dropRejected(rejected)
+        found.sort(key=itemgetter(0))
+        return [(dist**0.5, item) for dist, item in found]
+
+    def _dropRejected(self, rejected):
+        # removal has to wait until the search is done since it can trigger a rebuild
+        for item in rejected:
+            self.discard(item)
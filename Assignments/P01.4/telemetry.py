@@ -0,0 +1,223 @@
+"""
+A record of what happens in real games (items picked up, deaths, levels played, shots, kills), written
+to disk without ever making the game wait.
+
+Writing every event to a file as it happens would put the game loop at the mercy of the disk: one slow
+write and a frame is late. Telemetry.log() only packs the event into a fixed-size record (RECORD) in a ring
+buffer kept in memory, which takes a couple of microseconds. A background thread wakes up every
+`flush_interval` seconds (or as soon as the buffer is half full), copies out everything logged since it last
+looked, and appends it to a file in `folder`. Once a file reaches `max_bytes` it starts a new one, and only
+the newest `keep` files of each game are kept. If the thread falls so far behind that the buffer fills up,
+new events are dropped (and counted) rather than waiting for room.
+
+Every file starts with a header describing its events, so it can be read on its own. To turn logs into a
+spreadsheet, run from the game's folder:
+    python telemetry.py folder=./telemetry out=telemetry.csv
+"""
+import os
+import sys
+import csv
+import json
+import time
+import glob
+import struct
+import datetime
+import threading
+
+# helper function that processes commandline arguments into key-value pairs or a list of arguments
+from helper_module import mykwargs
+
+# the start of every log file, followed by the length of the JSON header and the header itself
+MAGIC = b'TLM1'
+HEADER_LENGTH = struct.Struct('<I')
+# one event: when it happened (seconds since 1970), what kind it is, up to FIELDS whole numbers, and a short label
+#       (like a level name, cut off at 16 bytes). 44 bytes, whatever the event
+FIELDS = 4
+RECORD = struct.Struct('<dH2x4i16s')
+NO_VALUES = (0,) * FIELDS
+
+class Telemetry():
+    """
+    Logs events to files in `folder` from a background thread. `kinds` is event name -> the names of its
+    fields (at most FIELDS), e.g. {"item": ("index", "score")}.
+    `start()` starts the thread. Until then (and always, with no `folder`), `log` does nothing.
+    `log(kind, *values, label='')` is meant to be called from one thread (the game loop).
+    Call `close()` when the game ends to write what's left; `report()` describes what happened.
+    """
+    def __init__(self, folder, game, kinds, capacity=4096, max_bytes=1024*1024, keep=20, flush_interval=1.0):
+        self.folder = folder
+        self.game = game
+        self.kinds = {name: tuple(fields) for name, fields in kinds.items()}
+        for name, fields in self.kinds.items():
+            if len(fields) > FIELDS:
+                raise ValueError(f"{name}: events have at most {FIELDS} fields, not {len(fields)}")
+        self.codes = {name: code for code, name in enumerate(self.kinds)}
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self.session = time.strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}"
+        # the ring buffer. Only `log` moves `head` (the number of records ever logged) and only the flushing thread
+        #       moves `tail` (the number ever copied out), so neither has to wait for the other
+        self.buffer = bytearray(capacity * RECORD.size)
+        self.head = 0
+        self.tail = 0
+        # the file being written, how many bytes it has, and how many files this session has started
+        self.file = None
+        self.file_bytes = 0
+        self.files = 0
+        # statistics for `report()`
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.error = None
+        self.stopping = False
+        self.wake = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.folder is not None and self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+            self.thread.start()
+
+    def log(self, kind, *values, label=''):
+        """
+        Adds an event to the buffer (never waits: if the buffer is full, the event is dropped)
+        """
+        if self.thread is None:
+            return
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        RECORD.pack_into(self.buffer, (head % self.capacity) * RECORD.size, time.time(), self.codes[kind],
+                         *(values + NO_VALUES)[:FIELDS], label.encode())
+        # the record is complete before `head` says it's there, so the flushing thread never copies half of one
+        self.head = head + 1
+        if head + 1 - self.tail == self.capacity // 2:
+            self.wake.set()
+
+    def run(self):
+        # the flushing thread: writes whatever was logged every `flush_interval` seconds until `close()`
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            # checked before flushing, so everything logged before `close()` is written before the thread ends
+            stopping = self.stopping
+            self.flush()
+            if stopping:
+                break
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def flush(self):
+        # copies every record logged since the last flush out of the buffer, frees their space, and writes them
+        head, tail = self.head, self.tail
+        if head == tail:
+            return
+        size = RECORD.size
+        start = (tail % self.capacity) * size
+        end = (head % self.capacity) * size
+        if start < end:
+            data = bytes(self.buffer[start:end])
+        else:
+            # the records wrap around the end of the buffer
+            data = bytes(self.buffer[start:]) + bytes(self.buffer[:end])
+        self.tail = head
+        try:
+            if self.file is None or self.file_bytes + len(data) > self.max_bytes:
+                self.rotate()
+            self.file.write(data)
+            self.file.flush()
+            self.file_bytes += len(data)
+            self.written += head - tail
+        except OSError as error:
+            # the game keeps going without these events; the next flush tries a new file
+            self.failed += head - tail
+            self.error = str(error)
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def rotate(self):
+        # starts the next file (with its header), and deletes this game's oldest files past the newest `keep`
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        os.makedirs(self.folder, exist_ok=True)
+        self.files += 1
+        path = os.path.join(self.folder, f"{self.game}-{self.session}-{self.files:04d}.tlm")
+        header = json.dumps({"game": self.game, "session": self.session, "record": RECORD.format,
+                             "kinds": [[name, list(fields)] for name, fields in self.kinds.items()]}).encode()
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+        self.file_bytes = self.file.tell()
+        for old in sorted(glob.glob(os.path.join(self.folder, f"{self.game}-*.tlm")))[:-self.keep]:
+            os.remove(old)
+
+    def close(self, timeout=2.0):
+        # writes what's left in the buffer and stops the thread (waiting at most `timeout` seconds for a slow disk)
+        if self.thread is None:
+            return
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout)
+
+    def report(self):
+        """
+        Returns a line describing how many events were written, dropped, or lost
+        """
+        if self.thread is None:
+            return "telemetry: off"
+        line = (f"telemetry: {self.written} events written to {self.folder} ({self.files} files), "
+                f"{self.dropped} dropped with the buffer full, {self.failed} lost to write errors")
+        if self.error is not None:
+            line += f" (last error: {self.error})"
+        return line
+
+def readLog(path):
+    """
+    Returns (header, events) for a log file, where events is a list of (time, kind, {field: value}, label).
+    A record cut short at the end of the file (the game was killed mid-write) is left out.
+    """
+    with open(path, 'rb') as infile:
+        data = infile.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path}: not a telemetry log")
+    offset = len(MAGIC)
+    (length,) = HEADER_LENGTH.unpack_from(data, offset)
+    offset += HEADER_LENGTH.size
+    header = json.loads(data[offset:offset+length])
+    offset += length
+    kinds = header["kinds"]
+    events = []
+    for when, code, *values, label in RECORD.iter_unpack(data[offset:offset + (len(data)-offset) // RECORD.size * RECORD.size]):
+        name, fields = kinds[code]
+        events.append((when, name, dict(zip(fields, values)), label.rstrip(b'\0').decode(errors='replace')))
+    return header, events
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    folder = kargs.get("folder", "./telemetry")
+    out = kargs.get("out", "telemetry.csv")
+    paths = sorted(glob.glob(os.path.join(folder, "*.tlm")))
+    logs = [readLog(path) for path in paths]
+    # one column for every field of every kind of event, left empty for events that don't have it
+    columns = []
+    for header, _ in logs:
+        for _, fields in header["kinds"]:
+            columns += [field for field in fields if field not in columns]
+    rows = 0
+    with open(out, 'w', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(["game", "session", "time", "event", "label"] + columns)
+        for header, events in logs:
+            for when, name, values, label in events:
+                stamp = datetime.datetime.fromtimestamp(when).isoformat(timespec='milliseconds')
+                writer.writerow([header["game"], header["session"], stamp, name, label] + [values.get(column, '') for column in columns])
+                rows += 1
+    print(f"{out}: {rows} events from {len(paths)} files")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Level of detail for enemy AI: enemies far from the player think less often.
+
+Every enemy used to work out where to go on every tick, so the cost of a tick grew with the number of
+enemies in the whole world, even though most of them were nowhere near the player and couldn't be seen.
+The AIScheduler picks which enemies think on each tick:
+    near  - on screen or within `near_distance` of the player: every tick
+    mid   - within `mid_distance`: every `mid_every` ticks
+    far   - everyone else: every `far_every` ticks
+Mid and far enemies wait in a timing wheel, a ring of `far_every` slots with one slot per tick, each holding
+the enemies due to think on that tick. The wheel turns one slot a tick. Enemies join on different ticks, so they
+end up spread around the ring instead of all thinking on the same tick. On top of the near ones, at most
+`budget` enemies think in a tick; the rest of that tick's slot waits (first in line) for the next one.
+So however many enemies are out of sight, they never cost more than `budget` updates a tick.
+
+An enemy that thinks is told how many ticks went by since it last did, so it can catch up (e.g. walk that much farther).
+"""
+
+class AIScheduler():
+    """
+    Members are anything that can be a dictionary key (sprites, enemy numbers, ...).
+    `add(member)` and `discard(member)` as enemies appear and disappear.
+    Every tick, call `plan(near, distance)` with the members that must think this tick (on screen or close to
+    the player) and a function that returns how far a member is from the player. It returns (member, ticks)
+    pairs for everyone that thinks this tick, `ticks` being how many ticks since that member last thought.
+    `report()` describes how many thought per tick.
+    """
+    def __init__(self, near_distance, mid_distance, mid_every=4, far_every=16, budget=100):
+        self.near_distance = near_distance
+        self.mid_distance = mid_distance
+        self.mid_every = max(1, mid_every)
+        self.far_every = max(self.mid_every, far_every)
+        self.budget = budget
+        # one slot per tick of the longest wait. Slot (tick % far_every) holds the members due on `tick`
+        self.wheel = [[] for _ in range(self.far_every)]
+        # members left over from an earlier tick because the budget ran out, oldest first
+        self.waiting = []
+        # member -> the tick it's due to think on. A member that thinks early (because it came near) leaves its old
+        #       entry in the wheel behind, and that entry is skipped when its slot comes around
+        self.due = {}
+        # member -> the tick it last thought on
+        self.last = {}
+        self.tick = 0
+        # statistics for `report()`: ticks planned, members that thought (all of them, and just the near ones),
+        #       the most that thought in one tick, and how many times a member had to wait for a later tick
+        self.ticks = 0
+        self.thought = 0
+        self.thought_near = 0
+        self.most = 0
+        self.deferred = 0
+
+    def __contains__(self, member):
+        return member in self.due
+
+    def __len__(self):
+        return len(self.due)
+
+    def add(self, member):
+        # a new member thinks on the next tick
+        self.last[member] = self.tick
+        self.schedule(member, 1)
+
+    def discard(self, member):
+        # the wheel may still hold it, but without a due tick it's skipped
+        self.due.pop(member, None)
+        self.last.pop(member, None)
+
+    def clear(self):
+        self.wheel = [[] for _ in range(self.far_every)]
+        self.waiting = []
+        self.due.clear()
+        self.last.clear()
+
+    def schedule(self, member, ticks):
+        # `member` thinks again `ticks` ticks from now
+        due = self.due[member] = self.tick + ticks
+        self.wheel[due % self.far_every].append(member)
+
+    def interval(self, distance):
+        # how many ticks a member `distance` away from the player waits between thinks
+        if distance <= self.near_distance:
+            return 1
+        if distance <= self.mid_distance:
+            return self.mid_every
+        return self.far_every
+
+    def plan(self, near, distance):
+        """
+        Turns the wheel one tick. Returns (member, ticks since it last thought) for every member that thinks this tick:
+        every member in `near`, then the ones due this tick (the ones that were waiting first), up to `budget` of them.
+        Each one that was due is put back in the wheel for when it should think next, depending on `distance(member)`.
+        """
+        self.tick += 1
+        tick = self.tick
+        due = self.due
+        slot = self.wheel[tick % self.far_every]
+        self.wheel[tick % self.far_every] = []
+        thinking = [member for member in near if member in due]
+        chosen = set(thinking)
+        near_count = len(thinking)
+        left = self.budget
+        waiting = []
+        for queue in (self.waiting, slot):
+            for member in queue:
+                # skip entries that are out of date (the member thought early, left, or is already thinking)
+                if member in chosen or due.get(member, tick+1) > tick:
+                    continue
+                chosen.add(member)
+                if left > 0:
+                    thinking.append(member)
+                    left -= 1
+                else:
+                    waiting.append(member)
+        self.waiting = waiting
+        self.deferred += len(waiting)
+        result = []
+        last = self.last
+        for member in thinking:
+            result.append((member, tick - last[member]))
+            last[member] = tick
+            # a near member that isn't due yet keeps its place in the wheel, so staying on screen costs nothing extra.
+            #       If it leaves the screen, it thinks again when that place comes around
+            if due[member] <= tick:
+                self.schedule(member, self.interval(distance(member)))
+        # members left waiting keep their due tick, so they go first next tick
+        self.ticks += 1
+        self.thought += len(result)
+        self.thought_near += near_count
+        self.most = max(self.most, len(result))
+        return result
+
+    def report(self):
+        """
+        Returns a line describing how many members thought per tick
+        """
+        if not self.ticks:
+            return f"enemy AI: {len(self)} enemies, no ticks planned"
+        return (f"enemy AI: {len(self)} enemies, {self.thought/self.ticks:.1f} thought per tick on average "
+                f"({self.thought_near/self.ticks:.1f} of them near), {self.most} at most; "
+                f"{self.deferred} waited for a later tick (budget {self.budget})")
@@ -0,0 +1,69 @@
+"""
+Animation clocks driven by time instead of game ticks.
+
+An AnimationScheduler keeps one frame counter per animation set and moves them forward by the time
+that has passed, at the "fps" each set's `info.json` entry asks for, so animations play at the same
+speed no matter how fast the game loop runs (or how long it sleeps while nothing is happening).
+A sprite only has to swap its image when the counter of the set it's playing has changed.
+"""
+import pygame
+
+def loadFrames(path_pattern, count, flipped=False):
+    """
+    Loads the frames of an animation, where `path_pattern` has a {} for the frame number (starting at 1).
+    Example:
+        loadFrames("./resources/mob/idle/{}.png", 7)  loads 1.png through 7.png
+    Frames can be flipped left to right. That happens once, here, instead of every time a sprite changes frames.
+    Returns:
+        list of Surfaces, where frame number n is at index n-1
+    """
+    frames = []
+    for num in range(1, count+1):
+        image = pygame.image.load(path_pattern.format(num)).convert_alpha()
+        if flipped:
+            image = pygame.transform.flip(image, True, False)
+        frames.append(image)
+    return frames
+
+def skipFrames(num, count, steps):
+    # the frame `steps` frames after `num`. This is the same loop the sprites in this game have always used:
+    #       frames 1 up to count-1, then back to 1
+    loop = max(1, count - 1)
+    return (num - 1 + steps) % loop + 1
+
+class AnimationScheduler():
+    """
+    One frame counter per animation set, moved forward by elapsed milliseconds.
+    Register sets with `add(name, frames, fps)` and call `advance(milliseconds)` once per tick.
+    `clocks[name]` is the frame number set `name` is showing, and `frame(name)` its image.
+    """
+    def __init__(self):
+        self.animations = {}
+        self.clocks = {}
+        # milliseconds each set has waited since it last changed frames, and how long one frame lasts
+        self.waited = {}
+        self.frame_time = {}
+
+    def add(self, name, frames, fps):
+        self.animations[name] = frames
+        self.clocks[name] = 1
+        self.waited[name] = 0
+        self.frame_time[name] = 1000 / fps
+
+    def advance(self, milliseconds):
+        # moves every set's clock forward by `milliseconds`. A slow tick can skip frames, so the animation keeps the same speed
+        for name, frames in self.animations.items():
+            frame_time = self.frame_time[name]
+            self.waited[name] += milliseconds
+            steps = int(self.waited[name] // frame_time)
+            self.waited[name] -= steps * frame_time
+            if steps:
+                self.clocks[name] = skipFrames(self.clocks[name], len(frames), steps)
+
+    def frame(self, name):
+        # the current frame of an animation set
+        return self.animations[name][self.clocks[name]-1]
+
+    def untilNext(self, name):
+        # milliseconds until set `name` shows its next frame
+        return max(0, self.frame_time[name] - self.waited[name])
@@ -0,0 +1,191 @@
+"""
+Every metadata file a game reads at startup (colors, animation info, level info) in one checked, ready-to-load file.
+
+Each run used to open and parse every `info.json` and `colors.json` on its own, and a typo in one of them
+(a missing "count", an "fps" of 0, a "next_level" that doesn't exist) only showed up as a KeyError
+whenever the game first needed that value. `buildManifest` reads all of them, checks each one against what
+the game expects, reports every problem it finds at once, and saves the result as one pickle file.
+`loadManifest` loads that file in one go, and builds it again first if any of the files it came from
+changed (their modification time or size is different) or it doesn't exist yet.
+
+Build it ahead of time (e.g. to check edited metadata without starting the game) from the game's folder:
+    python asset_manifest.py out=assets.manifest colors=colors:colors.json player=animations:./playersprites/info.json:Idle,Dead,Walk
+where every other argument is name=kind:path[:required keys], and kind is one of CHECKS.
+"""
+import os
+import sys
+import json
+import pickle
+
+# helper function that processes commandline arguments into key-value pairs or a list of arguments
+from helper_module import mykwargs
+
+# changes whenever the layout of the manifest file changes, so an old file gets built again
+VERSION = 1
+
+class ManifestError(ValueError):
+    """
+    Metadata that isn't what the game expects. `problems` lists every one that was found
+    """
+    def __init__(self, problems):
+        self.problems = problems
+        ValueError.__init__(self, "bad metadata:\n    " + "\n    ".join(problems))
+
+def isNumber(value):
+    # True for ints and floats, but not for True/False (which Python counts as ints)
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def checkColors(data, required=()):
+    """
+    colors.json: color name -> {"hex": "#rrggbb", "rgb": [red, green, blue]}, each channel 0 to 255
+    """
+    problems = []
+    if not isinstance(data, dict):
+        return ["should be an object of color names"]
+    for name, color in data.items():
+        if not isinstance(color, dict):
+            problems.append(f"{name}: should be an object with 'hex' and 'rgb'")
+            continue
+        rgb = color.get("rgb")
+        if not (isinstance(rgb, list) and len(rgb) == 3 and all(isinstance(c, int) and 0 <= c <= 255 for c in rgb)):
+            problems.append(f"{name}: 'rgb' should be three whole numbers from 0 to 255, not {rgb!r}")
+        hex_code = color.get("hex")
+        if not (isinstance(hex_code, str) and len(hex_code) == 7 and hex_code[0] == '#'):
+            problems.append(f"{name}: 'hex' should look like '#rrggbb', not {hex_code!r}")
+    problems += [f"{name}: missing" for name in required if name not in data]
+    return problems
+
+def checkAnimations(data, required=()):
+    """
+    An animation info.json: animation name -> {"count": frames (1 or more), "fps": frames a second (more than 0), ...}
+    """
+    problems = []
+    if not isinstance(data, dict):
+        return ["should be an object of animation names"]
+    for name, animation in data.items():
+        if not isinstance(animation, dict):
+            problems.append(f"{name}: should be an object with 'count' and 'fps'")
+            continue
+        count = animation.get("count")
+        if not (isinstance(count, int) and not isinstance(count, bool) and count >= 1):
+            problems.append(f"{name}: 'count' should be a whole number of frames (1 or more), not {count!r}")
+        fps = animation.get("fps")
+        if not (isNumber(fps) and fps > 0):
+            problems.append(f"{name}: 'fps' should be a number more than 0, not {fps!r}")
+        if "name" in animation and not isinstance(animation["name"], str):
+            problems.append(f"{name}: 'name' should be text, not {animation['name']!r}")
+    problems += [f"{name}: missing (the game plays this animation)" for name in required if name not in data]
+    return problems
+
+def checkLevels(data, required=()):
+    """
+    A levels info.json: level name -> {"objectives": {"points": n, "enemies": n}, "stipulations": {"life": true/false},
+    "next_level": the name of another level, or false if it's the last one}
+    """
+    problems = []
+    if not isinstance(data, dict):
+        return ["should be an object of level names"]
+    for name, level in data.items():
+        if not isinstance(level, dict):
+            problems.append(f"{name}: should be an object with 'objectives', 'stipulations', and 'next_level'")
+            continue
+        objectives = level.get("objectives")
+        if not isinstance(objectives, dict):
+            problems.append(f"{name}: 'objectives' should be an object with 'points' and 'enemies'")
+        else:
+            for key in ("points", "enemies"):
+                value = objectives.get(key)
+                if not (isinstance(value, int) and not isinstance(value, bool) and value >= 0):
+                    problems.append(f"{name}: objectives '{key}' should be a whole number (0 or more), not {value!r}")
+        stipulations = level.get("stipulations")
+        if not (isinstance(stipulations, dict) and isinstance(stipulations.get("life"), bool)):
+            problems.append(f"{name}: stipulations 'life' should be true or false")
+        next_level = level.get("next_level", None)
+        if next_level is not False and next_level not in data:
+            problems.append(f"{name}: 'next_level' should be another level's name (or false), not {next_level!r}")
+    problems += [f"{name}: missing" for name in required if name not in data]
+    return problems
+
+# kind of metadata -> the function that checks it (returns a list of problems, empty if there are none)
+CHECKS = {
+    "colors": checkColors,
+    "animations": checkAnimations,
+    "levels": checkLevels,
+}
+
+def stamps(sources):
+    """
+    What the manifest for `sources` (name -> (kind, path, required keys)) is checked against:
+    name -> (kind, path, required keys, modification time, size), with None for the time and size of a missing file
+    """
+    result = {}
+    for name, (kind, path, required) in sources.items():
+        try:
+            info = os.stat(path)
+            changed, size = info.st_mtime_ns, info.st_size
+        except OSError:
+            changed, size = None, None
+        result[name] = (kind, os.path.normpath(path), tuple(required), changed, size)
+    return result
+
+def buildManifest(sources, path):
+    """
+    Reads and checks every file in `sources` (name -> (kind, path, required keys)) and saves them to `path`.
+    Raises ManifestError (listing every problem in every file) instead if anything is wrong.
+    Returns name -> the file's contents.
+    """
+    data = {}
+    problems = []
+    for name, (kind, source, required) in sources.items():
+        if kind not in CHECKS:
+            problems.append(f"{source} ({name}): unknown kind of metadata {kind!r} (should be one of {', '.join(CHECKS)})")
+            continue
+        try:
+            with open(source, 'r') as infile:
+                data[name] = json.load(infile)
+        except OSError as error:
+            problems.append(f"{source} ({name}): can't be read: {error.strerror}")
+            continue
+        except ValueError as error:
+            problems.append(f"{source} ({name}): isn't valid JSON: {error}")
+            continue
+        problems += [f"{source} ({name}) {problem}" for problem in CHECKS[kind](data[name], required)]
+    if problems:
+        raise ManifestError(problems)
+    # written next to the old file and swapped in, so a game starting at the same time never reads half a file
+    with open(path+'.tmp', 'wb') as outfile:
+        pickle.dump({"version": VERSION, "stamps": stamps(sources), "data": data}, outfile, pickle.HIGHEST_PROTOCOL)
+    os.replace(path+'.tmp', path)
+    return data
+
+def loadManifest(sources, path):
+    """
+    Returns name -> contents for every file in `sources` (name -> (kind, path, required keys)), from the manifest
+    at `path` if it's up to date with them, otherwise building it again first (see `buildManifest`)
+    """
+    try:
+        with open(path, 'rb') as infile:
+            manifest = pickle.load(infile)
+        if manifest["version"] == VERSION and manifest["stamps"] == stamps(sources):
+            return manifest["data"]
+    # missing, from another version, or damaged: build it again
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError, AttributeError):
+        pass
+    return buildManifest(sources, path)
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    out = kargs.pop("out", "assets.manifest")
+    sources = {}
+    for name, spec in kargs.items():
+        kind, source, *required = spec.split(':')
+        sources[name] = (kind, source, required[0].split(',') if required else ())
+    try:
+        data = buildManifest(sources, out)
+    except ManifestError as error:
+        print(error)
+        sys.exit(1)
+    print(f"{out}: {len(data)} files checked and saved ({os.path.getsize(out)} bytes)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Notices when files change on disk, so the game can reload them while it's running.
+
+It checks each file's modification time (no operating system file events needed), and only
+every `interval` milliseconds, since looking at the disk every frame would be wasteful.
+"""
+import os
+import time
+
+def modifiedTime(path):
+    # when the file was last changed (None if it doesn't exist)
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class FileWatcher():
+    """
+    Watches a list of files. `poll()` returns the ones that changed (or appeared or disappeared)
+    since the last time it looked. Files can be added with `watch` at any time.
+    """
+    def __init__(self, paths=(), interval=500):
+        self.interval = interval
+        # path -> modification time the last time it was looked at
+        self.times = {}
+        self.last_poll = time.perf_counter()
+        for path in paths:
+            self.watch(path)
+
+    def watch(self, path):
+        if path not in self.times:
+            self.times[path] = modifiedTime(path)
+
+    def poll(self):
+        """
+        Returns the list of watched files that changed. Checks the disk at most once every `interval` milliseconds
+        (an empty list is returned in between).
+        """
+        now = time.perf_counter()
+        if (now - self.last_poll) * 1000 < self.interval:
+            return []
+        self.last_poll = now
+        changed = []
+        for path, last in self.times.items():
+            current = modifiedTime(path)
+            if current != last:
+                self.times[path] = current
+                changed.append(path)
+        return changed
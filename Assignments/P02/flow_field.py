@@ -0,0 +1,140 @@
+"""
+Flow field pathfinding, shared by every enemy chasing the same target.
+
+Instead of every enemy searching for its own path to the player, one breadth-first search runs
+outward from the player's cell and records, for every cell, which neighbouring cell is one step
+closer. An enemy then only has to look up the cell it's standing in. The search costs the same
+whether there is one enemy or a thousand, and it only has to run again when the player moves
+into a different cell.
+
+Cells are numbered `row*width + col`. The moves allowed between cells come from a list of edges,
+so the same field works for an open top-down world (`gridEdges`) or a platformer where enemies can
+only walk along floors and drop off ledges.
+"""
+from bisect import insort
+from collections import deque
+
+# marks cells the target can't be reached from
+UNREACHABLE = -1
+
+def gridEdges(width, height, passable, diagonal=True):
+    """
+    Builds the edges for a grid where you can step to any passable neighbouring cell.
+    `passable` is a function of (col, row). Diagonal steps aren't allowed to cut a blocked corner.
+    Returns:
+        list where edges[cell] is the list of cells reachable from `cell` in one step
+    """
+    open_cells = [passable(cell % width, cell // width) for cell in range(width*height)]
+    edges = [[] for _ in range(width*height)]
+    for row in range(height):
+        for col in range(width):
+            cell = row*width + col
+            if not open_cells[cell]:
+                continue
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)):
+                if (dx and dy) and not diagonal:
+                    continue
+                c, r = col+dx, row+dy
+                if not (0 <= c < width and 0 <= r < height) or not open_cells[r*width + c]:
+                    continue
+                # both cells next to a diagonal step have to be open too
+                if dx and dy and not (open_cells[row*width + c] and open_cells[r*width + col]):
+                    continue
+                edges[cell].append(r*width + c)
+    return edges
+
+class FlowField():
+    """
+    Distances to a goal cell and the next cell to step into, for every cell of a width x height grid.
+    `edges[cell]` lists the cells you can move to from `cell` (a list with an entry for every cell, or a dict
+    that leaves out the cells with no moves).
+    Call `update(goal)` every tick; the search only runs again when the goal cell changes.
+    The goal can also be a tuple of cells, and then every cell leads to the closest of them.
+    """
+    def __init__(self, width, height, edges):
+        self.width = width
+        self.height = height
+        # the search runs backwards from the goal, so it needs to know which cells lead INTO each cell.
+        #       The moves out of each cell are kept too, in case some of them change (`setEdges`).
+        #       Only cells with moves are stored, so a huge level that's mostly empty space or solid
+        #       terrain costs no more than the floors in it
+        self.incoming = {}
+        self.outgoing = {}
+        for cell, targets in (edges.items() if isinstance(edges, dict) else enumerate(edges)):
+            if targets:
+                self.outgoing[cell] = list(targets)
+            for target in targets:
+                self.incoming.setdefault(target, []).append(cell)
+        self.goal = None
+        # steps to the goal from each cell, and the cell to move to from each cell. Only the cells
+        #       the search reached are in them, so look them up with `.get(cell, UNREACHABLE)`
+        self.distance = {}
+        self.next_cell = {}
+        # how many times the search has actually run
+        self.searches = 0
+
+    def update(self, goal):
+        """
+        Points the field at `goal` (a cell number, or a tuple of them). Returns True if the search had to run again.
+        """
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        self.searches += 1
+        distance = {}
+        next_cell = {}
+        goals = goal if isinstance(goal, tuple) else (goal,)
+        queue = deque()
+        for start in goals:
+            if start is not None and 0 <= start < self.width*self.height:
+                distance[start] = 0
+                queue.append(start)
+        incoming = self.incoming
+        while queue:
+            cell = queue.popleft()
+            step = distance[cell] + 1
+            for previous in incoming.get(cell, ()):
+                if previous not in distance:
+                    distance[previous] = step
+                    # from `previous`, moving into `cell` gets you one step closer
+                    next_cell[previous] = cell
+                    queue.append(previous)
+        self.distance = distance
+        self.next_cell = next_cell
+        return True
+
+    def setEdges(self, changed):
+        """
+        Replaces the moves out of some cells. `changed` is a dict of cell -> list of cells you can move to from it.
+        The search runs again on the next `update`, even if the goal is the same.
+        Cells are put back in the incoming lists in order, like they are in a field built from edges given in
+        cell order (as `LevelData.mobEdges` gives them), so where two ways are just as short, the search picks
+        the same one a field built from scratch would.
+        """
+        for cell, targets in changed.items():
+            for target in self.outgoing.pop(cell, ()):
+                self.incoming[target].remove(cell)
+            if targets:
+                self.outgoing[cell] = list(targets)
+            for target in targets:
+                insort(self.incoming.setdefault(target, []), cell)
+        # forget the goal so `update` can't skip the search
+        self.goal = None
+
+    def cell(self, col, row):
+        # cell number of a column/row, or None if it's outside the grid
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return row*self.width + col
+        return None
+
+    def direction(self, col, row):
+        """
+        Returns (dx, dy), how many columns and rows away the next cell on the way to the goal is
+        (one step for grid moves, possibly several rows down for a drop off a ledge).
+        (0, 0) means the cell is the goal itself, can't reach the goal, or is outside the grid.
+        """
+        cell = self.cell(col, row)
+        target = UNREACHABLE if cell is None else self.next_cell.get(cell, UNREACHABLE)
+        if target == UNREACHABLE:
+            return (0, 0)
+        return ((target % self.width) - col, (target // self.width) - row)
@@ -0,0 +1,85 @@
+"""
+Adaptive frame rate for the game loop.
+
+Redrawing the same picture `GAME_FPS` times a second keeps a whole core busy even when nothing on
+screen is changing (the start screen, or the player standing still with no enemy moving). The
+FrameScheduler runs the loop at the full frame rate while things are happening. After a tick where
+nothing changed, it skips drawing and, instead of waiting for the next frame, sleeps until either an
+event arrives (a key press, the window being closed, etc.) or the next animation frame is due.
+Any input wakes it up straight away and puts it back at the full frame rate.
+"""
+import math
+import time
+import pygame
+
+class FrameScheduler():
+    """
+    Call `tick(until_next)` at the top of every loop, with the milliseconds until the next animation frame
+    is due (None if nothing is animating). It returns the milliseconds since the last tick.
+    Call `endTick(changed)` once the tick knows whether anything changed, and only draw when it returns True.
+    `report()` describes how many frames were skipped and how much time that saved.
+    """
+    def __init__(self, fps, max_wait=1000):
+        self.fps = fps
+        self.frame_time = 1000 / fps
+        # the longest an idle loop sleeps without an event, so it still checks in now and then
+        self.max_wait = max_wait
+        self.clock = pygame.time.Clock()
+        # True if the last tick changed nothing
+        self.idle = False
+        self.last = time.perf_counter()
+        # statistics for `report()`: ticks, ticks drawn, ticks skipped, seconds spent drawing, and seconds slept while idle
+        self.ticks = 0
+        self.drawn = 0
+        self.skipped = 0
+        self.draw_time = 0
+        self.slept = 0
+        self.draw_start = None
+
+    def tick(self, until_next=None):
+        """
+        Waits until it's time for the next tick and returns how many milliseconds passed since the last one
+        """
+        if self.idle:
+            # sleep until the next animation frame (never sooner than a normal frame) or an event, whichever comes first
+            timeout = self.max_wait if until_next is None else min(self.max_wait, max(until_next, self.frame_time))
+            start = time.perf_counter()
+            event = pygame.event.wait(int(math.ceil(timeout)))
+            self.slept += time.perf_counter() - start
+            # hand the event back so the main loop's `pygame.event.get()` still sees it
+            if event.type != pygame.NOEVENT:
+                pygame.event.post(event)
+        else:
+            self.clock.tick(self.fps)
+        now = time.perf_counter()
+        elapsed = (now - self.last) * 1000
+        self.last = now
+        self.ticks += 1
+        return elapsed
+
+    def endTick(self, changed):
+        """
+        Records whether this tick changed anything. Returns True if the frame should be drawn.
+        """
+        self.idle = not changed
+        if self.idle:
+            self.skipped += 1
+            return False
+        self.drawn += 1
+        self.draw_start = time.perf_counter()
+        return True
+
+    def frameShown(self):
+        # call right after the frame is shown (`pygame.display.flip()`) to time how long drawing takes
+        if self.draw_start is not None:
+            self.draw_time += time.perf_counter() - self.draw_start
+            self.draw_start = None
+
+    def report(self):
+        """
+        Returns a line describing how many frames were skipped and about how much time that saved
+        """
+        average_draw = self.draw_time / self.drawn if self.drawn else 0
+        return (f"{self.ticks} ticks: drew {self.drawn}, skipped {self.skipped} "
+                f"({100*self.skipped/max(1, self.ticks):.0f}%), saving about {self.skipped*average_draw:.2f}s of drawing; "
+                f"slept {self.slept:.2f}s waiting for input")
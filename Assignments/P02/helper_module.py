@@ -3,6 +3,9 @@
 import sys
 import json
 
+# the batch functions below use numpy. It's imported inside each of them, so scripts that only need
+#       mykwargs, load_json, or the single-pair distances work without numpy installed
+
 def straightDistance(x1,y1,x2,y2):
     distance = ((x1-x2)**2 + (y1-y2)**2)**0.5
     return distance
@@ -11,6 +14,99 @@ def taxicabDistance(xA,yA,xB,yB):
     distance = abs(xA-xB) + abs(yA-yB)
     return distance
 
+def _asPoints(points):
+    # turns a single (x, y) pair or any list/array of (x, y) pairs into an (N, 2) float array
+    import numpy as np
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+def batchSquaredDistance(point, points):
+    '''
+    Squared euclidian distance from one point to many points.
+    Skipping the square root is enough for comparing distances (nearest, within a radius, etc.)
+    Example:
+        batchSquaredDistance((0,0), [(3,4), (6,8)])  ->  array([ 25., 100.])
+    Returns:
+        numpy array with one distance per point in `points`
+    '''
+    import numpy as np
+    delta = _asPoints(points) - _asPoints(point)
+    return np.einsum('ij,ij->i', delta, delta)
+
+def batchStraightDistance(point, points):
+    '''
+    Euclidian distance from one point to many points. Same result as calling
+    straightDistance once per point, but in a single call.
+    Returns:
+        numpy array with one distance per point in `points`
+    '''
+    import numpy as np
+    return np.sqrt(batchSquaredDistance(point, points))
+
+def batchTaxicabDistance(point, points):
+    '''
+    Taxicab (manhattan) distance from one point to many points.
+    Returns:
+        numpy array with one distance per point in `points`
+    '''
+    import numpy as np
+    return np.abs(_asPoints(points) - _asPoints(point)).sum(axis=1)
+
+def pairwiseSquaredDistance(points_a, points_b):
+    '''
+    Squared euclidian distance between every point in `points_a` and every point in `points_b`.
+    Returns:
+        numpy array of shape (len(points_a), len(points_b)), where [i, j] is the distance
+        from points_a[i] to points_b[j]
+    '''
+    import numpy as np
+    delta = _asPoints(points_a)[:, np.newaxis, :] - _asPoints(points_b)[np.newaxis, :, :]
+    return np.einsum('ijk,ijk->ij', delta, delta)
+
+def pairwiseStraightDistance(points_a, points_b):
+    '''
+    Euclidian distance between every point in `points_a` and every point in `points_b`.
+    Returns:
+        numpy array of shape (len(points_a), len(points_b))
+    '''
+    import numpy as np
+    return np.sqrt(pairwiseSquaredDistance(points_a, points_b))
+
+def pairwiseTaxicabDistance(points_a, points_b):
+    '''
+    Taxicab (manhattan) distance between every point in `points_a` and every point in `points_b`.
+    Returns:
+        numpy array of shape (len(points_a), len(points_b))
+    '''
+    import numpy as np
+    delta = _asPoints(points_a)[:, np.newaxis, :] - _asPoints(points_b)[np.newaxis, :, :]
+    return np.abs(delta).sum(axis=2)
+
+def withinRadius(point, points, radius):
+    '''
+    Finds which of `points` are at most `radius` away (euclidian) from `point`.
+    Example:
+        withinRadius((0,0), [(3,4), (6,8), (1,1)], 5)  ->  array([0, 2])
+    Returns:
+        numpy array of the indices (into `points`) that are inside the radius
+    '''
+    import numpy as np
+    return np.flatnonzero(batchSquaredDistance(point, points) <= radius*radius)
+
+def kNearest(point, points, k):
+    '''
+    Finds the `k` points closest (euclidian) to `point`.
+    Uses argpartition so only the k closest get sorted, not the whole list.
+    Returns:
+        numpy array of at most k indices (into `points`), closest first
+    '''
+    import numpy as np
+    distances = batchSquaredDistance(point, points)
+    k = min(k, len(distances))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    nearest = np.argpartition(distances, k-1)[:k]
+    return nearest[np.argsort(distances[nearest], kind='stable')]
+
 def mykwargs(argv):
     '''
     Processes argv list into plain args and kwargs.
@@ -0,0 +1,51 @@
+# microbenchmark for the distance functions in helper_module.py
+# compares calling the scalar functions once per point against one call to the batch versions
+#
+# run from the P02 folder:   python helper_scripts/bench_distance.py count=1000 repeat=200
+
+import os
+import sys
+import random
+import timeit
+import numpy as np
+
+# helper_module.py lives one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from helper_module import mykwargs
+from helper_module import straightDistance, taxicabDistance
+from helper_module import batchStraightDistance, batchTaxicabDistance, withinRadius, kNearest, pairwiseStraightDistance
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    count = int(kargs.get("count", 1000))
+    repeat = int(kargs.get("repeat", 200))
+
+    random.seed(0)
+    target = (640, 360)
+    points = [(random.randint(0, 1920), random.randint(0, 1080)) for _ in range(count)]
+    # the batch functions accept lists, but converting the list is most of their cost,
+    #       so callers that query every frame should keep their positions in an array
+    point_array = np.array(points, dtype=np.float64)
+
+    # each entry is a label and a function that answers the same question for every point
+    cases = [
+        ("straightDistance   (loop)", lambda: [straightDistance(target[0], target[1], x, y) for x, y in points]),
+        ("batchStraightDistance (list)", lambda: batchStraightDistance(target, points)),
+        ("batchStraightDistance",      lambda: batchStraightDistance(target, point_array)),
+        ("taxicabDistance    (loop)", lambda: [taxicabDistance(target[0], target[1], x, y) for x, y in points]),
+        ("batchTaxicabDistance",       lambda: batchTaxicabDistance(target, point_array)),
+        ("radius 200         (loop)", lambda: [i for i, (x, y) in enumerate(points) if straightDistance(target[0], target[1], x, y) <= 200]),
+        ("withinRadius 200",           lambda: withinRadius(target, point_array, 200)),
+        ("5 nearest          (loop)", lambda: sorted(range(count), key=lambda i: straightDistance(target[0], target[1], points[i][0], points[i][1]))[:5]),
+        ("kNearest 5",                 lambda: kNearest(target, point_array, 5)),
+        ("pairwise 64 x N",            lambda: pairwiseStraightDistance(point_array[:64], point_array)),
+    ]
+
+    print(f"{count} points, best of 3 x {repeat} calls")
+    for label, case in cases:
+        best = min(timeit.repeat(case, number=repeat, repeat=3)) / repeat
+        print(f"  {label:<30} {best*1e6:10.1f} us/call")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# shows how the level pipeline copes as levels get bigger, using random levels from level_generator.py
+# for each size it writes a level file, then measures:
+#       load    - reading and parsing the .txt file (loadLevel)
+#       memory  - the most memory that took, and what the parsed level plus its Simulation hold on to
+#       bake    - painting the level image (Level in main.py)
+#       start   - making the Simulation (items, enemies, enemy paths)
+#       tick    - the average time of one simulation tick, with the enemies chasing the player
+#       lod     - the same, with the enemies outside the window moving less often (ai_lod.py, see `ai_budget`)
+#
+# run from the P02 folder:   python helper_scripts/bench_level_scale.py sizes=25x16,100x50,1000x100,10000x1000 seed=1
+#       it also accepts the same parameters as main.py (tile_width, map_images, etc.) and level_generator.py (items, enemies)
+
+import os
+import sys
+import time
+import json
+import shutil
+import tempfile
+import tracemalloc
+
+# main.py, simulation.py, and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# no window is needed, but pygame has to think it has one to load images
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# the generated levels go in a folder of their own, which main.py has to be told about when it's imported
+#       (with an info.json, which main.py reads straight away; the levels are added to it once they're made)
+LEVELS = tempfile.mkdtemp(prefix="levels_")
+with open(LEVELS+'/info.json', 'w') as outfile:
+    outfile.write('{}')
+
+# main.py reads its settings from the command line when it's imported, so fill in any that weren't given
+DEFAULTS = {"title": "bench", "levels": LEVELS, "tile_width": "32", "tile_height": "32", "width": "25",
+            "height": "16", "fps": "30", "player_images": "./resources/player", "map_images": "./resources/map_gen",
+            "mob_images": "./resources/mob", "item_images": "./resources/item", "sounds": "./resources/sounds"}
+given = {arg.split('=')[0] for arg in sys.argv if '=' in arg}
+sys.argv += [key+'='+value for key, value in DEFAULTS.items() if key not in given]
+
+import pygame
+import main as game
+from helper_module import mykwargs
+from level_generator import generateLevel
+from simulation import loadLevel, Simulation, LEFT, RIGHT, JUMP
+from ai_lod import AIScheduler
+from asset_manifest import checkLevels, ManifestError
+
+PATTERN = [RIGHT]*40 + [RIGHT | JUMP]*10 + [0]*10 + [LEFT]*40 + [LEFT | JUMP]*10 + [0]*10
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    sizes = [tuple(int(n) for n in size.split('x')) for size in kargs.get("sizes", "25x16,100x50,1000x100,10000x1000").split(',')]
+    seed = int(kargs.get("seed", 1))
+    ticks = int(kargs.get("ticks", 600))
+    item_density = float(kargs.get("items", 0.05))
+    enemy_density = float(kargs.get("enemies", 0.02))
+    levels = game.ARGDICT["levels"]
+
+    pygame.init()
+    pygame.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    game.loadSpriteFrames()
+
+    info = {}
+    for width, height in sizes:
+        name = f"{width}x{height}"
+        # a level that can't be finished, and starts over if it somehow is (like the real levels in info.json)
+        info[name] = {"objectives": {"points": 10**9, "enemies": 0}, "stipulations": {"life": False}, "next_level": name}
+        with open(levels+'/'+name+'.txt', 'w') as outfile:
+            outfile.write(generateLevel(width, height, seed, item_density, enemy_density))
+    problems = checkLevels(info)
+    if problems:
+        raise ManifestError(problems)
+    with open(levels+'/info.json', 'w') as outfile:
+        json.dump(info, outfile)
+    game.level_info.update(info)
+
+    print(f"{'size':>12} {'items':>8} {'enemies':>8} {'load':>9} {'peak mem':>10} {'kept mem':>10} "
+          f"{'bake':>9} {'start':>9} {'tick':>9} {'lod':>9}")
+    for width, height in sizes:
+        name = f"{width}x{height}"
+        start = time.perf_counter()
+        level_data = loadLevel(levels, name, game.TILE_WIDTH, game.TILE_HEIGHT)
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        sim = Simulation(level_data, 10**9, (54, 64), (32, 32), (39, 64))
+        begin = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for tick in range(ticks):
+            sim.step(PATTERN[tick % len(PATTERN)])
+        tick_time = (time.perf_counter() - start) / ticks
+
+        sim = Simulation(level_data, 10**9, (54, 64), (32, 32), (39, 64))
+        sim.useAI(AIScheduler(game.AI_NEAR, 2*game.AI_NEAR, budget=game.AI_BUDGET), (0, 0, game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+        start = time.perf_counter()
+        for tick in range(ticks):
+            sim.step(PATTERN[tick % len(PATTERN)])
+        lod_time = (time.perf_counter() - start) / ticks
+        del sim, level_data
+
+        # the same again while tracking memory, which slows everything down too much to time it at the same time
+        tracemalloc.start()
+        level_data = loadLevel(levels, name, game.TILE_WIDTH, game.TILE_HEIGHT)
+        sim = Simulation(level_data, 10**9, (54, 64), (32, 32), (39, 64))
+        kept, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        game.Level(name)
+        bake = time.perf_counter() - start
+        print(f"{name:>12} {len(level_data.item_locs):>8} {len(level_data.enemy_locs):>8} {load*1000:>7.1f}ms "
+              f"{peak/2**20:>8.1f}MB {kept/2**20:>8.1f}MB {bake*1000:>7.1f}ms {begin*1000:>7.1f}ms {tick_time*1000:>7.3f}ms {lod_time*1000:>7.3f}ms")
+        del sim, level_data
+
+    shutil.rmtree(levels, ignore_errors=True)
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# compares collision checks using only rectangles against rectangles plus the cached masks in mask_cache.py
+# pairs of sprites (player frame vs. enemy or item frame) are scattered close together so many rectangles overlap,
+#       then each kind of check is timed over the same pairs. It also shows how many rectangle hits the masks throw out.
+#
+# run from the P02 folder:   python helper_scripts/bench_masks.py pairs=100000
+
+import os
+import sys
+import time
+import random
+
+# mask_cache.py, animation.py, and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# no window is needed, but pygame has to think it has one to load images
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from helper_module import mykwargs, load_json
+from animation import loadFrames
+from mask_cache import MaskCache
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    pairs = int(kargs.get("pairs", 100000))
+    player_images = kargs.get("player_images", "./resources/player")
+    mob_images = kargs.get("mob_images", "./resources/mob")
+    item_images = kargs.get("item_images", "./resources/item")
+    random.seed(int(kargs.get("seed", 1)))
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    player_animations = load_json(player_images+"/info.json")
+    mob_animations = load_json(mob_images+"/info.json")
+    player_frames = []
+    for folder in ('idle', 'walk', 'dead'):
+        player_frames += loadFrames(player_images+'/'+folder+'/{}.png', player_animations[folder]["count"])
+    other_frames = loadFrames(mob_images+'/idle/{}.png', mob_animations["idle"]["count"]) + loadFrames(item_images+'/{}.png', 1)
+
+    masks = MaskCache()
+    start = time.perf_counter()
+    masks.add(player_frames)
+    masks.add(other_frames)
+    print(f"built {masks.report()} in {(time.perf_counter()-start)*1000:.1f} ms")
+
+    # each pair: player frame and rectangle at (0, 0), other frame and rectangle somewhere nearby
+    tests = []
+    for _ in range(pairs):
+        a = random.choice(player_frames)
+        b = random.choice(other_frames)
+        rect_b = b.get_rect(topleft=(random.randint(-80, 80), random.randint(-80, 80)))
+        tests.append((a, a.get_rect(), b, rect_b))
+
+    start = time.perf_counter()
+    rect_hits = 0
+    for a, rect_a, b, rect_b in tests:
+        if rect_a.colliderect(rect_b):
+            rect_hits += 1
+    rect_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask_hits = 0
+    for a, rect_a, b, rect_b in tests:
+        if rect_a.colliderect(rect_b) and masks.overlap(a, rect_a.topleft, b, rect_b.topleft):
+            mask_hits += 1
+    mask_time = time.perf_counter() - start
+
+    print(f"rect only    {pairs/rect_time:12,.0f} checks/sec  {rect_hits} hits")
+    print(f"rect + mask  {pairs/mask_time:12,.0f} checks/sec  {mask_hits} hits "
+          f"({rect_hits-mask_hits} rectangle hits were only see-through pixels)")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
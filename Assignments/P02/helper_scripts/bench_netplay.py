@@ -0,0 +1,90 @@
+# shows how a netplay.py server copes as more clients connect, all on this computer (localhost)
+# for each number of clients it starts a server, connects that many clients, runs `ticks` server ticks with
+#       every client holding its own pattern of keys, and measures:
+#       tick       - the average (and slowest 5%) time of one server tick: reading inputs, stepping the level,
+#                    and building and sending every client's snapshot
+#       down       - bytes a second the server sends each client, at `tick_rate` ticks a second
+#       snapshot   - the average snapshot size, next to the size of a full snapshot of the same state (no baseline)
+#       up         - bytes a second each client sends the server
+#
+# run from the P02 folder:   python helper_scripts/bench_netplay.py clients=2,4,8,16,32,64 ticks=300 level=1 tick_rate=30
+
+import os
+import sys
+import time
+
+# netplay.py, simulation.py, and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from helper_module import mykwargs
+from simulation import LEFT, RIGHT, JUMP
+import netplay
+
+PATTERN = [RIGHT]*40 + [RIGHT | JUMP]*10 + [0]*10 + [LEFT]*40 + [LEFT | JUMP]*10 + [0]*10
+
+def run(settings, level, count, ticks, tick_rate):
+    server = netplay.Server(settings, level, tick_rate=tick_rate)
+    clients = [netplay.Client(server.address) for _ in range(count)]
+    for client in clients:
+        client.join()
+    # let every HELLO arrive and every WELCOME come back
+    while len(server.remotes) < count or any(client.player_id is None for client in clients):
+        server.poll()
+        for client in clients:
+            client.poll()
+    times = []
+    full = 0
+    for tick in range(ticks):
+        # every client holds its keys a few ticks later than the one before it, so they don't all move together
+        for number, client in enumerate(clients):
+            client.sendInput(PATTERN[(tick + number*7) % len(PATTERN)])
+        start = time.perf_counter()
+        server.tick()
+        times.append(time.perf_counter() - start)
+        full += len(netplay.encodeSnapshot(server.tick_number, server.level, server.history[server.tick_number]))
+        for client in clients:
+            client.poll()
+    seconds = ticks / tick_rate
+    down = sum(remote.bytes_sent for remote in server.remotes.values()) / count / seconds
+    snapshots = sum(client.snapshots for client in clients)
+    received = sum(client.bytes_received for client in clients)
+    up = sum(client.sequence for client in clients) * netplay.INPUT_MESSAGE.size / count / seconds
+    for client in clients:
+        client.leave()
+        client.socket.close()
+    server.socket.close()
+    times.sort()
+    return {
+        "tick": sum(times) / len(times) * 1000,
+        "slow": times[int(len(times)*0.95)] * 1000,
+        "down": down,
+        "snapshot": received / max(1, snapshots),
+        "full": full / ticks,
+        "up": up,
+        "lost": count*ticks - snapshots,
+    }
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    counts = [int(n) for n in kargs.get("clients", "2,4,8,16,32,64").split(',')]
+    ticks = int(kargs.get("ticks", 300))
+    tick_rate = int(kargs.get("tick_rate", 30))
+    level = kargs.get("level", "1")
+    settings = {
+        "levels": kargs.get("levels", "./resources/levels"),
+        "tile_width": int(kargs.get("tile_width", 32)),
+        "tile_height": int(kargs.get("tile_height", 32)),
+        "mob_speed": int(kargs.get("mob_speed", 2)),
+        "player_size": netplay.imageSize(kargs.get("player_images", "./resources/player")+"/idle/1.png"),
+        "mob_size": netplay.imageSize(kargs.get("mob_images", "./resources/mob")+"/idle/1.png"),
+        "item_size": netplay.imageSize(kargs.get("item_images", "./resources/item")+"/1.png"),
+    }
+    print(f"level {level}, {ticks} ticks at {tick_rate} ticks/sec (a tick has {1000/tick_rate:.1f} ms)")
+    print(f"{'clients':>7} {'tick ms':>8} {'95% ms':>7} {'down B/s':>9} {'snapshot B':>10} {'full B':>7} {'up B/s':>7} {'lost':>5}")
+    for count in counts:
+        result = run(settings, level, count, ticks, tick_rate)
+        print(f"{count:>7} {result['tick']:>8.3f} {result['slow']:>7.3f} {result['down']:>9.0f} {result['snapshot']:>10.1f} "
+              f"{result['full']:>7.0f} {result['up']:>7.0f} {result['lost']:>5}")
+
+if __name__ == '__main__':
+    main()
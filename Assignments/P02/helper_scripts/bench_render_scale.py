@@ -0,0 +1,84 @@
+# measures what one frame costs at bigger and bigger window sizes, drawn two ways:
+#       window    - everything painted at the window's size (the level image and sprites made that big ahead of time)
+#       scaled    - everything painted at the game's own size, then stretched to the window once (render_scale.py)
+#       smooth    - the same, stretched with blending (smooth=true)
+# each frame paints the level image plus `sprites` sprites, like main.py does
+#
+# run from the P02 folder:   python helper_scripts/bench_render_scale.py level=1 scales=1,2,3,4 frames=200 sprites=30
+#       it also accepts the same parameters as main.py (levels, tile_width, map_images, etc.)
+
+import os
+import sys
+import time
+import random
+
+# main.py, render_scale.py, and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# no window is needed, but pygame has to think it has one to load images
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# main.py reads its settings from the command line when it's imported, so fill in any that weren't given
+DEFAULTS = {"title": "bench", "levels": "./resources/levels", "tile_width": "32", "tile_height": "32", "width": "25",
+            "height": "16", "fps": "30", "player_images": "./resources/player", "map_images": "./resources/map_gen",
+            "mob_images": "./resources/mob", "item_images": "./resources/item", "sounds": "./resources/sounds"}
+given = {arg.split('=')[0] for arg in sys.argv if '=' in arg}
+sys.argv += [key+'='+value for key, value in DEFAULTS.items() if key not in given]
+
+import pygame
+import main as game
+from helper_module import mykwargs
+
+def timeFrames(frames, draw):
+    # the average milliseconds `draw()` takes
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start) / frames * 1000
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    level = kargs.get("level", "1")
+    scales = [int(n) for n in kargs.get("scales", "1,2,3,4").split(',')]
+    frames = int(kargs.get("frames", 200))
+    count = int(kargs.get("sprites", 30))
+    random.seed(int(kargs.get("seed", 1)))
+
+    pygame.init()
+    size = (game.WINDOW_WIDTH, game.WINDOW_HEIGHT)
+    pygame.display.set_mode(size)
+    game.loadSpriteFrames()
+    world = game.Level(level)
+    images = [random.choice(game.sprite_frames['mob_idle'] + game.sprite_frames['item'] + game.sprite_frames['player_walk'])
+              for _ in range(count)]
+    spots = [(random.randrange(size[0]), random.randrange(size[1])) for _ in range(count)]
+    internal = pygame.Surface(size).convert()
+
+    print(f"level {level}, drawn at {size[0]}x{size[1]} with {count} sprites, average of {frames} frames")
+    print(f"{'scale':>5} {'window':>11} {'window ms':>10} {'scaled ms':>10} {'smooth ms':>10}")
+    for scale in scales:
+        window_size = (size[0]*scale, size[1]*scale)
+        window = pygame.Surface(window_size).convert()
+        # the old way: every image already made `scale` times bigger, and painted straight on the big window
+        big_level = pygame.transform.scale_by(world.image, scale)
+        big_images = [pygame.transform.scale_by(image, scale) for image in images]
+        big_spots = [(x*scale, y*scale) for x, y in spots]
+        def drawWindow():
+            window.blit(big_level, (0, 0))
+            window.blits(list(zip(big_images, big_spots)), False)
+        # the new way: painted at the game's size, then stretched once (at scale 1 it's painted straight on the window)
+        def drawScaled(stretch):
+            target = window if scale == 1 else internal
+            target.blit(world.image, (0, 0))
+            target.blits(list(zip(images, spots)), False)
+            if scale != 1:
+                stretch(internal, window_size, window)
+        window_ms = timeFrames(frames, drawWindow)
+        scaled_ms = timeFrames(frames, lambda: drawScaled(pygame.transform.scale))
+        smooth_ms = timeFrames(frames, lambda: drawScaled(pygame.transform.smoothscale))
+        print(f"{scale:>5} {window_size[0]:>5}x{window_size[1]:<5} {window_ms:>10.3f} {scaled_ms:>10.3f} {smooth_ms:>10.3f}")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
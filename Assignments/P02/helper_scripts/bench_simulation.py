@@ -0,0 +1,48 @@
+# measures how many ticks per second simulation.py can run with no window open
+# and how many microseconds it takes to restore a snapshot (what restarting a level costs)
+# each level is played with the same repeating pattern of inputs (walk right, jump, walk left)
+#
+# run from the P02 folder:   python helper_scripts/bench_simulation.py ticks=50000
+
+import os
+import sys
+import time
+
+# simulation.py and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from helper_module import mykwargs
+from simulation import loadLevel, loadLevelInfo, Simulation, LEFT, RIGHT, JUMP
+
+# the rate the simulation has to keep up for batch testing and replays
+TARGET = 10000
+
+# how many times a snapshot is restored to time it
+RESTORES = 10000
+
+PATTERN = [RIGHT]*40 + [RIGHT | JUMP]*10 + [0]*10 + [LEFT]*40 + [LEFT | JUMP]*10 + [0]*10
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    levels = kargs.get("levels", "./resources/levels")
+    ticks = int(kargs.get("ticks", 50000))
+    level_info = loadLevelInfo(levels)
+
+    for level in sorted(level_info):
+        level_data = loadLevel(levels, level, 32, 32)
+        sim = Simulation(level_data, level_info[level]["objectives"]["points"], (54, 64), (32, 32), (39, 64))
+        start = time.perf_counter()
+        for tick in range(ticks):
+            sim.step(PATTERN[tick % len(PATTERN)])
+        rate = ticks / (time.perf_counter() - start)
+        # how long a restart takes: going back to a snapshot of the level's first tick
+        sim = Simulation(level_data, level_info[level]["objectives"]["points"], (54, 64), (32, 32), (39, 64))
+        snapshot = sim.snapshot()
+        start = time.perf_counter()
+        for _ in range(RESTORES):
+            sim.restore(snapshot)
+        restore = (time.perf_counter() - start) / RESTORES * 1e6
+        print(f"level {level:>3}  {rate:12,.0f} ticks/sec  {'ok' if rate >= TARGET else 'BELOW TARGET'}  restore {restore:6.1f} us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# measures how many tiles per second Level.setTile can change (each one repaints only that tile's part of the level
+#       image and updates the enemies' paths around it), compared to baking the whole level again
+#
+# run from the P02 folder:   python helper_scripts/bench_tiles.py level=1 edits=20000
+#       it also accepts the same parameters as main.py (levels, tile_width, map_images, etc.)
+
+import os
+import sys
+import time
+import random
+
+# main.py, simulation.py, and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# no window is needed, but pygame has to think it has one to load images
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# main.py reads its settings from the command line when it's imported, so fill in any that weren't given
+DEFAULTS = {"title": "bench", "levels": "./resources/levels", "tile_width": "32", "tile_height": "32", "width": "25",
+            "height": "16", "fps": "30", "player_images": "./resources/player", "map_images": "./resources/map_gen",
+            "mob_images": "./resources/mob", "item_images": "./resources/item", "sounds": "./resources/sounds"}
+given = {arg.split('=')[0] for arg in sys.argv if '=' in arg}
+sys.argv += [key+'='+value for key, value in DEFAULTS.items() if key not in given]
+
+import pygame
+import main as game
+from helper_module import mykwargs
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    level = kargs.get("level", "1")
+    edits = int(kargs.get("edits", 20000))
+    random.seed(int(kargs.get("seed", 1)))
+
+    pygame.init()
+    pygame.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    game.loadSpriteFrames()
+
+    start = time.perf_counter()
+    world = game.Level(level)
+    bake = time.perf_counter() - start
+    print(f"baking level {level} from scratch: {bake*1000:.2f} ms")
+
+    # a simulation so the enemies' paths are kept up to date too
+    sim = game.newSimulation(world)
+    data = world.data
+    changes = [(random.randrange(data.width), random.randrange(data.height), random.choice(('..', '01', '02')))
+               for _ in range(edits)]
+    start = time.perf_counter()
+    for col, row, code in changes:
+        world.setTile(col, row, code, sim)
+    elapsed = time.perf_counter() - start
+    print(f"setTile: {edits/elapsed:,.0f} tiles/sec ({elapsed/edits*1e6:.1f} us each, "
+          f"{bake/(elapsed/edits):,.0f}x cheaper than baking again)")
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
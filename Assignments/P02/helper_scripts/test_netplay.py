@@ -0,0 +1,192 @@
+# checks a netplay.py server and its clients on this computer (localhost): joining, picking up items,
+#       dying, leaving, the level starting over, and broken packets
+# the players are put right where things are instead of walking there, and the enemies stand still, so the
+#       same thing happens every run
+#
+# run from the P02 folder:   python -m pytest -q helper_scripts/test_netplay.py
+#                       or:  python helper_scripts/test_netplay.py
+
+import os
+import sys
+import time
+import socket
+
+# netplay.py, simulation.py, and helper_module.py live one folder up
+FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, FOLDER)
+
+import netplay
+
+SETTINGS = {
+    "levels": os.path.join(FOLDER, "resources", "levels"),
+    "tile_width": 32,
+    "tile_height": 32,
+    "mob_speed": 0,
+    "player_size": netplay.imageSize(os.path.join(FOLDER, "resources", "player", "idle", "1.png")),
+    "mob_size": netplay.imageSize(os.path.join(FOLDER, "resources", "mob", "idle", "1.png")),
+    "item_size": netplay.imageSize(os.path.join(FOLDER, "resources", "item", "1.png")),
+}
+# level 1 needs 3 points
+LEVEL = "1"
+# how long to wait (seconds) for packets that should already be on their way
+WAIT = 2.0
+
+def connect(count):
+    # starts a server and has `count` clients join it, once each of them has a snapshot
+    server = netplay.Server(SETTINGS, LEVEL)
+    clients = [netplay.Client(server.address) for _ in range(count)]
+    deadline = time.perf_counter() + WAIT
+    while any(client.player_id is None or client.level is None for client in clients):
+        assert time.perf_counter() < deadline, "the clients never got a snapshot"
+        for client in clients:
+            if client.player_id is None:
+                client.join()
+            else:
+                client.sendInput(0)
+        server.tick()
+        time.sleep(0.01)
+        for client in clients:
+            client.poll()
+    return server, clients
+
+def tick(server, clients, ticks=1):
+    # steps the server, then waits until every client has the newest snapshot
+    for _ in range(ticks):
+        for client in clients:
+            client.sendInput(0)
+        server.tick()
+        deadline = time.perf_counter() + WAIT
+        while any(client.latest < server.tick_number for client in clients):
+            assert time.perf_counter() < deadline, "a snapshot never arrived"
+            time.sleep(0.001)
+            for client in clients:
+                client.poll()
+
+def close(server, clients):
+    for client in clients:
+        client.socket.close()
+    server.socket.close()
+
+def bodyOf(server, client):
+    return next(remote.body for remote in server.remotes.values() if remote.player_id == client.player_id)
+
+def pickUp(server, clients, client, index):
+    # puts `client`'s player on top of item `index`, for one tick
+    body = bodyOf(server, client)
+    body.x, body.y = server.sim.items[index]
+    tick(server, clients)
+
+def newest(client):
+    return client.states[client.latest]
+
+def test_join():
+    server, clients = connect(2)
+    try:
+        assert len(server.remotes) == 2
+        assert len({client.player_id for client in clients}) == 2
+        for client in clients:
+            assert client.level == LEVEL
+            state = newest(client)
+            # every player, enemy, and item is in the first snapshot
+            assert all((netplay.PLAYER, other.player_id) in state for other in clients)
+            assert sum(1 for kind, _ in state if kind == netplay.MOB) == len(server.sim.mobs)
+            assert sum(1 for kind, _ in state if kind == netplay.ITEM) == len(server.sim.items)
+    finally:
+        close(server, clients)
+
+def test_pickup():
+    server, clients = connect(2)
+    try:
+        first, second = clients
+        pickUp(server, clients, first, 0)
+        assert server.sim.score() == 1
+        for client in clients:
+            state = newest(client)
+            assert state[(netplay.ITEM, 0)] == (0,)
+            assert state[(netplay.PLAYER, first.player_id)][4] == 1
+            assert state[(netplay.PLAYER, second.player_id)][4] == 0
+    finally:
+        close(server, clients)
+
+def test_leave_keeps_score():
+    # the points of a player who leaves still count towards finishing the level
+    server, clients = connect(2)
+    try:
+        first, second = clients
+        # (items far enough apart that the player only ever touches one of them)
+        pickUp(server, clients, first, 0)
+        pickUp(server, clients, first, 6)
+        first.leave()
+        deadline = time.perf_counter() + WAIT
+        while len(server.remotes) > 1:
+            assert time.perf_counter() < deadline, "the server never heard the client leave"
+            tick(server, [second])
+        assert (netplay.PLAYER, first.player_id) not in newest(second)
+        assert server.sim.score() == 2
+        pickUp(server, [second], second, 4)
+        assert second.level == server.level_info[LEVEL]["next_level"]
+    finally:
+        close(server, clients)
+
+def test_death():
+    server, clients = connect(2)
+    try:
+        first, second = clients
+        pickUp(server, clients, first, 0)
+        body = bodyOf(server, first)
+        body.x, body.y = server.sim.mobs[0]
+        tick(server, clients)
+        # the dead player leaves the simulation, but everybody still sees them (dying), and the points stay
+        assert body not in server.sim.players
+        assert newest(second)[(netplay.PLAYER, first.player_id)][3] & netplay.DYING
+        assert server.sim.score() == 1
+        # and comes back at the start of the level once the way is clear, still with its score
+        tick(server, clients, netplay.RESPAWN_TICKS)
+        assert body in server.sim.players and not body.dying
+        assert (body.x, body.y) == server.sim.level.player_pos
+        assert newest(second)[(netplay.PLAYER, first.player_id)][4] == 1
+    finally:
+        close(server, clients)
+
+def test_restart():
+    # the same level starting over doesn't slide anybody from where they were to the start
+    server, clients = connect(1)
+    try:
+        (client,) = clients
+        tick(server, clients, 3)
+        start = client.start
+        server.startLevel(LEVEL)
+        tick(server, clients)
+        assert client.level == LEVEL
+        assert client.start != start
+        assert list(client.states) == [server.tick_number]
+    finally:
+        close(server, clients)
+
+def test_broken_packets():
+    # packets that are empty, too short for their type, or garbled are dropped instead of crashing anybody
+    server, clients = connect(1)
+    try:
+        (client,) = clients
+        stranger = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        broken = [b'', bytes([netplay.INPUT]), bytes([netplay.SNAPSHOT]), b'\xff' * 3]
+        for packet in broken:
+            stranger.sendto(packet, server.address)
+            client.socket.send(packet)
+        stranger.close()
+        # and to the client, from the server's own address: the same, plus snapshots cut short or with made up records
+        full = netplay.encodeSnapshot(server.tick_number + 1, LEVEL, newest(client))
+        made_up = netplay.SNAPSHOT_HEADER.pack(netplay.SNAPSHOT, server.tick_number + 1, 0, b'1', 0, 1, 0) + b'\x00' * 8
+        for packet in broken + [bytes([netplay.WELCOME]), full[:-1], made_up]:
+            server.socket.sendto(packet, client.socket.getsockname())
+        tick(server, clients, 3)
+        assert len(server.remotes) == 1
+        assert client.level == LEVEL and client.latest == server.tick_number
+    finally:
+        close(server, clients)
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,115 @@
+# checks telemetry.py: logging never waits for a slow disk (events are dropped instead once the buffer is full),
+#       records that wrap around the end of the ring buffer are written in order, and what's written reads back
+#
+# run from the P02 folder:   python -m pytest -q helper_scripts/test_telemetry.py
+#                       or:  python helper_scripts/test_telemetry.py
+
+import os
+import sys
+import time
+import glob
+import tempfile
+import threading
+
+# telemetry.py and helper_module.py live one folder up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from telemetry import Telemetry, readLog
+
+KINDS = {"item": ("index", "score"), "death": ("x", "y", "score")}
+# the longest a single `log()` call may take (seconds). It packs one record, so this is very generous
+LOG_LIMIT = 0.005
+
+class StalledFile():
+    # a file whose writes wait until `release` is set, like a disk that has stopped answering
+    def __init__(self):
+        self.release = threading.Event()
+        self.writing = threading.Event()
+        self.data = []
+
+    def write(self, data):
+        self.writing.set()
+        self.release.wait()
+        self.data.append(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_log_never_waits_for_the_disk():
+    with tempfile.TemporaryDirectory() as folder:
+        telemetry = Telemetry(folder, "test", KINDS, capacity=64, flush_interval=0.01)
+        stalled = StalledFile()
+        def rotate():
+            telemetry.files += 1
+            telemetry.file = stalled
+            telemetry.file_bytes = 0
+        telemetry.rotate = rotate
+        telemetry.start()
+        # the first flush gets stuck writing
+        telemetry.log("item", 0, 0)
+        assert stalled.writing.wait(2), "the flushing thread never started writing"
+        slowest = 0
+        logged = 1
+        for number in range(1, 1000):
+            start = time.perf_counter()
+            telemetry.log("item", number, number)
+            slowest = max(slowest, time.perf_counter() - start)
+            logged += 1
+        assert slowest < LOG_LIMIT, f"log() took {slowest*1000:.2f} ms with the disk stalled"
+        # the buffer holds `capacity` events while the thread is stuck, the rest are dropped
+        assert telemetry.dropped == logged - 1 - telemetry.capacity
+        stalled.release.set()
+        telemetry.close()
+        assert not telemetry.thread.is_alive()
+        assert telemetry.written + telemetry.dropped == logged
+        assert telemetry.failed == 0
+
+def test_flush_wraps_around():
+    with tempfile.TemporaryDirectory() as folder:
+        telemetry = Telemetry(folder, "test", KINDS, capacity=8)
+        # no flushing thread: `flush()` is called here instead, so it runs exactly when the test wants.
+        #       (`log` only needs `thread` to be set)
+        telemetry.thread = threading.current_thread()
+        for number in range(6):
+            telemetry.log("item", number, number)
+        telemetry.flush()
+        # the next 5 records go in slots 6, 7, 0, 1, 2, so the unwritten part starts after where it ends
+        for number in range(6, 11):
+            telemetry.log("item", number, number)
+        assert telemetry.tail % telemetry.capacity >= telemetry.head % telemetry.capacity
+        telemetry.flush()
+        telemetry.file.close()
+        assert telemetry.written == 11 and telemetry.dropped == 0
+        (path,) = glob.glob(os.path.join(folder, "*.tlm"))
+        _, events = readLog(path)
+        assert [values["index"] for _, _, values, _ in events] == list(range(11))
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as folder:
+        telemetry = Telemetry(folder, "test", KINDS, flush_interval=0.01)
+        telemetry.start()
+        telemetry.log("item", 3, 1, label="level 1")
+        telemetry.log("death", -20, 640, 1, label="a label longer than sixteen bytes")
+        telemetry.close()
+        (path,) = glob.glob(os.path.join(folder, "test-*.tlm"))
+        header, events = readLog(path)
+        assert header["game"] == "test"
+        assert header["kinds"] == [[name, list(fields)] for name, fields in KINDS.items()]
+        assert [(kind, values, label) for _, kind, values, label in events] == [
+            ("item", {"index": 3, "score": 1}, "level 1"),
+            ("death", {"x": -20, "y": 640, "score": 1}, "a label longer t"),
+        ]
+        assert all(abs(when - time.time()) < 60 for when, _, _, _ in events)
+        # a record cut short (the game was killed mid-write) is left out
+        with open(path, 'r+b') as outfile:
+            outfile.truncate(os.path.getsize(path) - 1)
+        assert len(readLog(path)[1]) == 1
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
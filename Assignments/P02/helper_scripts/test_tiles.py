@@ -0,0 +1,92 @@
+# checks that changing tiles one at a time (Level.setTile) ends up the same as starting from scratch:
+#       the enemies' moves and the flow field match ones worked out from the whole edited level,
+#       and the repainted level image matches one baked from the whole edited level
+#
+# run from the P02 folder:   python -m pytest -q helper_scripts/test_tiles.py
+#                       or:  python helper_scripts/test_tiles.py
+
+import os
+import sys
+import random
+
+# main.py, simulation.py, and helper_module.py live one folder up
+FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, FOLDER)
+
+# no window is needed, but pygame has to think it has one to load images
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# main.py reads its settings from the command line when it's imported
+RESOURCES = os.path.join(FOLDER, "resources")
+sys.argv = [sys.argv[0], "title=test", "levels="+RESOURCES+"/levels", "tile_width=32", "tile_height=32", "width=25",
+            "height=16", "fps=30", "player_images="+RESOURCES+"/player", "map_images="+RESOURCES+"/map_gen",
+            "mob_images="+RESOURCES+"/mob", "item_images="+RESOURCES+"/item", "sounds="+RESOURCES+"/sounds"]
+
+import pygame
+import main as game
+from simulation import LevelData
+from flow_field import FlowField
+
+LEVELS = ("1", "2", "3", "5")
+# empty space, two plain tiles, and two banner tiles bigger than one space
+CODES = ('..', '01', '02', '69', '99')
+EDITS = 300
+
+def setup_module(module=None):
+    pygame.init()
+    pygame.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    game.loadSpriteFrames()
+
+def teardown_module(module=None):
+    pygame.quit()
+
+def edits(data, seed):
+    rng = random.Random(seed)
+    return [(rng.randrange(data.width), rng.randrange(data.height), rng.choice(CODES)) for _ in range(EDITS)]
+
+def reread(data):
+    # the same level as `data`, as if the edited level had been saved and read from its file
+    return LevelData("\n".join("".join(line) for line in data.grid), data.tile_width, data.tile_height)
+
+def test_paths_match_full_recompute():
+    for level in LEVELS:
+        world = game.Level(level)
+        sim = game.newSimulation(world)
+        data = world.data
+        for number, (col, row, code) in enumerate(edits(data, int(level))):
+            world.setTile(col, row, code, sim)
+            if number % 30:
+                continue
+            fresh = reread(data)
+            assert data.mobEdges() == fresh.mobEdges(), f"level {level}, edit {number}"
+            field = FlowField(fresh.width, fresh.height, fresh.mobEdges())
+            # every 7th standing spot as the goal, and two at once
+            cells = sorted(fresh.mobEdges())
+            for goal in cells[::7] + [tuple(cells[:2])]:
+                sim.flow_field.update(goal)
+                field.update(goal)
+                assert sim.flow_field.distance == field.distance, f"level {level}, edit {number}, goal {goal}"
+                assert sim.flow_field.next_cell == field.next_cell, f"level {level}, edit {number}, goal {goal}"
+        game.textures.unpin(world.cache_key)
+
+def test_repaint_matches_bake():
+    for level in LEVELS:
+        world = game.Level(level)
+        for col, row, code in edits(world.data, int(level)):
+            world.setTile(col, row, code)
+        # baked from the edited level read from scratch, so the tiles are pasted in the same order as from a file
+        edited = world.data
+        world.useData(reread(edited))
+        baked = world.bake()
+        world.useData(edited)
+        assert pygame.image.tobytes(world.image, "RGB") == pygame.image.tobytes(baked, "RGB"), f"level {level}"
+        game.textures.unpin(world.cache_key)
+
+if __name__ == '__main__':
+    setup_module()
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
+    teardown_module()
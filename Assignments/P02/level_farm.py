@@ -0,0 +1,207 @@
+# python level_farm.py levels="./resources/levels" runs=200 max_ticks=1800 bot=greedy workers=0 tile_width=32 tile_height=32 player_images="./resources/player" mob_images="./resources/mob" item_images="./resources/item"
+"""
+Level validation farm
+
+Description:
+
+    Plays every level in the `levels` folder many times with a bot, without opening a window,
+    spread over a pool of worker processes (one per core unless `workers` says otherwise).
+    For each level it reports how often the bot finished it, how many ticks that took,
+    how often it died or ran out of time, and how many ticks per second each core simulated.
+
+    Bots:
+        greedy - walks toward the closest item it hasn't picked up, jumping when the item is
+                 above it and wandering off when it stops getting closer
+        random - holds random keys down for random lengths of time
+    Every run uses its own random seed, so two runs of the same bot play differently.
+"""
+import os
+import sys
+import time
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# helper function that processes commandline arguments into key-value pairs or a list of arguments
+from helper_module import mykwargs
+
+from simulation import loadLevel, loadLevelInfo, Simulation, LEFT, RIGHT, JUMP
+
+# how many runs a worker process plays per job. Bigger chunks mean less time spent passing results between processes
+CHUNK_SIZE = 25
+
+# how far up a full jump takes the player: 7*7 + 6*6 + ... + 1*1 pixels
+JUMP_HEIGHT = sum(speed*speed for speed in range(1, 8))
+
+class GreedyBot():
+    """
+    Picks the inputs for each tick by chasing the closest item that hasn't been picked up.
+    How patient it is and how often it jumps for no reason are picked at random per run,
+    so runs with different seeds take different routes.
+    """
+    def __init__(self, rng):
+        self.rng = rng
+        # how many ticks without getting closer to the target before wandering off
+        self.patience = rng.randint(20, 80)
+        self.jump_chance = rng.uniform(0.01, 0.05)
+        self.stuck = 0
+        self.last_distance = None
+        # direction and ticks left while wandering
+        self.wander = 0
+        self.wander_ticks = 0
+
+    def __call__(self, sim):
+        p = sim.player
+        targets = [(abs(ix-p.x) + abs(iy-p.y), ix, iy) for (ix, iy), alive in zip(sim.items, sim.item_alive) if alive]
+        if not targets:
+            return 0
+        distance, ix, iy = min(targets)
+        if self.last_distance is not None and distance >= self.last_distance:
+            self.stuck += 1
+        else:
+            self.stuck = 0
+        self.last_distance = distance
+
+        # after being stuck for a while, wander off in a random direction for a bit
+        if self.wander_ticks == 0 and self.stuck > self.patience:
+            self.wander = self.rng.choice((LEFT, RIGHT))
+            self.wander_ticks = self.rng.randint(20, 80)
+            self.stuck = 0
+        if self.wander_ticks > 0:
+            self.wander_ticks -= 1
+            inputs = self.wander
+        elif ix > p.x + 2:
+            inputs = RIGHT
+        elif ix < p.x - 2:
+            inputs = LEFT
+        else:
+            inputs = 0
+        # jump for items above the player's head and every so often just because
+        if iy + sim.item_size[1] <= p.y or self.rng.random() < self.jump_chance:
+            inputs |= JUMP
+        # a jump that starts too close to the top of the level never comes down (the player stays
+        #       `jumping` in main.py), so don't start one there
+        if p.y < JUMP_HEIGHT:
+            inputs &= ~JUMP
+        return inputs
+
+class RandomBot():
+    """
+    Holds down a random set of keys for a random number of ticks
+    """
+    def __init__(self, rng):
+        self.rng = rng
+        self.held = 0
+        self.ticks_left = 0
+
+    def __call__(self, sim):
+        if self.ticks_left <= 0:
+            self.held = self.rng.choice((LEFT, RIGHT, LEFT | JUMP, RIGHT | JUMP, JUMP, 0))
+            self.ticks_left = self.rng.randint(5, 40)
+        self.ticks_left -= 1
+        return self.held
+
+BOTS = {"greedy": GreedyBot, "random": RandomBot}
+
+# each worker process parses a level once and keeps it here for all of its runs
+_level_cache = {}
+
+def playLevel(job):
+    """
+    Plays `runs` games of one level. Runs in a worker process.
+    Returns the outcome of every run plus how many ticks were simulated and how much CPU time that took.
+    """
+    settings, level, first_seed, runs = job
+    key = (settings["levels"], level)
+    if key not in _level_cache:
+        _level_cache[key] = loadLevel(settings["levels"], level, settings["tile_width"], settings["tile_height"])
+    level_data = _level_cache[key]
+    objectives = settings["level_info"][level]["objectives"]
+    outcomes = []
+    total_ticks = 0
+    start = time.process_time()
+    for seed in range(first_seed, first_seed+runs):
+        rng = random.Random(seed)
+        sim = Simulation(level_data, objectives["points"], settings["player_size"], settings["item_size"], settings["mob_size"], objectives["enemies"], settings["mob_speed"])
+        bot = BOTS[settings["bot"]](rng)
+        outcome = "timeout"
+        while sim.ticks < settings["max_ticks"]:
+            sim.step(bot(sim))
+            if sim.player.dying:
+                outcome = "died"
+                break
+            if sim.complete:
+                outcome = "complete"
+                break
+        outcomes.append((outcome, sim.ticks))
+        total_ticks += sim.ticks
+    return level, outcomes, total_ticks, time.process_time() - start
+
+def imageSize(path):
+    # PIL only reads the file header here, not the whole image
+    with Image.open(path) as image:
+        return image.size
+
+def report(level, info, outcomes, ticks, cpu_seconds):
+    """
+    Prints one level's results
+    """
+    runs = len(outcomes)
+    finished = sorted(t for outcome, t in outcomes if outcome == "complete")
+    died = sum(1 for outcome, _ in outcomes if outcome == "died")
+    timeouts = runs - len(finished) - died
+    line = f"level {level:>3}  runs {runs:>5}  complete {100*len(finished)/runs:5.1f}%  died {100*died/runs:5.1f}%  timeout {100*timeouts/runs:5.1f}%"
+    if finished:
+        p90 = finished[min(len(finished)-1, int(len(finished)*0.9))]
+        line += f"  ticks to complete min {finished[0]} median {statistics.median(finished):.0f} p90 {p90}"
+    line += f"  {ticks/max(cpu_seconds, 1e-9):,.0f} ticks/sec/core"
+    print(line)
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    settings = {
+        "levels": kargs.get("levels", "./resources/levels"),
+        "tile_width": int(kargs.get("tile_width", 32)),
+        "tile_height": int(kargs.get("tile_height", 32)),
+        "max_ticks": int(kargs.get("max_ticks", 1800)),
+        "bot": kargs.get("bot", "greedy"),
+        "mob_speed": int(kargs.get("mob_speed", 2)),
+        # the collision rectangles are the size of the first frame of each sprite, like in main.py
+        "player_size": imageSize(kargs.get("player_images", "./resources/player")+"/idle/1.png"),
+        "mob_size": imageSize(kargs.get("mob_images", "./resources/mob")+"/idle/1.png"),
+        "item_size": imageSize(kargs.get("item_images", "./resources/item")+"/1.png"),
+    }
+    settings["level_info"] = loadLevelInfo(settings["levels"])
+    runs = int(kargs.get("runs", 200))
+    workers = int(kargs.get("workers", 0)) or os.cpu_count()
+
+    jobs = []
+    for level, info in sorted(settings["level_info"].items()):
+        # splash screens disappear on their own, there's nothing to play
+        if info["stipulations"]["life"]:
+            print(f"level {level:>3}  splash screen, skipped")
+            continue
+        level_data = loadLevel(settings["levels"], level, settings["tile_width"], settings["tile_height"])
+        if len(level_data.item_locs) < info["objectives"]["points"]:
+            print(f"level {level:>3}  can't be completed: needs {info['objectives']['points']} points but only has {len(level_data.item_locs)} items")
+            continue
+        for first_seed in range(0, runs, CHUNK_SIZE):
+            jobs.append((settings, level, first_seed, min(CHUNK_SIZE, runs-first_seed)))
+
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for level, outcomes, ticks, cpu_seconds in pool.map(playLevel, jobs):
+            level_outcomes, level_ticks, level_cpu = results.get(level, ([], 0, 0.0))
+            results[level] = (level_outcomes + outcomes, level_ticks + ticks, level_cpu + cpu_seconds)
+    wall_seconds = time.perf_counter() - start
+
+    for level in sorted(results):
+        report(level, settings["level_info"][level], *results[level])
+    total_ticks = sum(ticks for _, ticks, _ in results.values())
+    print(f"{total_ticks:,} ticks in {wall_seconds:.2f}s on {workers} workers ({total_ticks/max(wall_seconds, 1e-9):,.0f} ticks/sec overall)")
+
+if __name__ == '__main__':
+    main()
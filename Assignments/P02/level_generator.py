@@ -0,0 +1,95 @@
+# python level_generator.py width=200 height=40 seed=1 items=0.05 enemies=0.02 out=./resources/levels/7.txt
+"""
+Makes random (but repeatable) levels of any size in the same format as the hand-made level files:
+two characters per space, '..' for empty space, '14' for an item, '00' for an enemy, '--' for the player,
+and tile codes for terrain. The same seed always makes the same level.
+
+Levels have solid ground along the bottom with a few pits, and floating platforms ('03', '04'..., '05')
+with room for the player to stand on every one of them. Items and enemies are placed on spaces something
+can stand on, `items` and `enemies` being the fraction of those spaces that get one.
+"""
+import sys
+import random
+
+from helper_module import mykwargs
+from simulation import EMPTY, ITEM, ENEMY, PLAYER
+
+# tile codes the generator builds with
+GROUND_TOP = '01'
+GROUND = '02'
+PLATFORM_LEFT = '03'
+PLATFORM = '04'
+PLATFORM_RIGHT = '05'
+
+# the player and enemies are two spaces tall, so platforms are at least this many rows apart
+PLATFORM_SPACING = 3
+
+def generateLevel(width, height, seed=0, item_density=0.05, enemy_density=0.02, platform_density=0.08, pit_density=0.03):
+    """
+    Returns the text of a `width` x `height` level (in spaces). The same arguments always give the same level.
+        item_density      - fraction of the spaces you can stand on that get an item
+        enemy_density     - fraction of the spaces you can stand on that get an enemy
+        platform_density  - chance of a platform starting at any space of a platform row
+        pit_density       - chance of a pit starting at any space of the ground
+    """
+    if width < 4 or height < 4:
+        raise ValueError("levels have to be at least 4x4 spaces")
+    rng = random.Random(seed)
+    grid = [[EMPTY]*width for _ in range(height)]
+
+    # the ground is the bottom two rows, with pits in it (but never under where the player starts)
+    ground = height - 2
+    col = 0
+    while col < width:
+        if col > 4 and rng.random() < pit_density:
+            col += rng.randint(2, 4)
+            continue
+        grid[ground][col] = GROUND_TOP
+        grid[ground+1][col] = GROUND
+        col += 1
+
+    # floating platforms, on every PLATFORM_SPACING-th row above the ground, leaving the top two rows empty
+    for row in range(ground - PLATFORM_SPACING, 1, -PLATFORM_SPACING):
+        col = 1
+        while col < width - 3:
+            if rng.random() < platform_density:
+                length = min(rng.randint(3, 8), width - 1 - col)
+                grid[row][col] = PLATFORM_LEFT
+                for middle in range(col+1, col+length-1):
+                    grid[row][middle] = PLATFORM
+                grid[row][col+length-1] = PLATFORM_RIGHT
+                col += length + 2
+            else:
+                col += 1
+
+    # the spaces something can stand on: empty, with terrain under it and room for a two space tall sprite
+    standable = [(col, row) for row in range(2, height-1) for col in range(width)
+                 if grid[row][col] == EMPTY and grid[row+1][col] != EMPTY and grid[row-1][col] == EMPTY]
+
+    # the player starts on the first one from the left of the ground
+    start = min((spot for spot in standable if spot[1] == ground-1), default=standable[0] if standable else (0, ground-1))
+    grid[start[1]][start[0]] = PLAYER
+    for col, row in standable:
+        # keep the spaces around the player's start clear
+        if abs(col - start[0]) < 5 and abs(row - start[1]) < 3:
+            continue
+        chance = rng.random()
+        if chance < enemy_density:
+            grid[row][col] = ENEMY
+        elif chance < enemy_density + item_density:
+            grid[row][col] = ITEM
+    return '\n'.join(''.join(line) for line in grid)
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    text = generateLevel(int(kargs.get("width", 25)), int(kargs.get("height", 16)), int(kargs.get("seed", 0)),
+                         float(kargs.get("items", 0.05)), float(kargs.get("enemies", 0.02)),
+                         float(kargs.get("platforms", 0.08)), float(kargs.get("pits", 0.03)))
+    if "out" in kargs:
+        with open(kargs["out"], 'w') as outfile:
+            outfile.write(text)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -19,7 +19,6 @@ import random
 import os
 import math
 import time
-from PIL import Image
 
 # Tells OS where to place the window
 os.environ['SDL_VIDEO_WINDOW_POS'] = str(460) + "," + str(40)
@@ -30,6 +29,44 @@ from helper_module import mykwargs
 # returns a dictionary of color names and their hex/rgb values
 from helper_module import load_json
 
+# every metadata file (animation and level info) checked and saved together, so it loads in one go
+from asset_manifest import loadManifest, checkLevels, ManifestError
+
+# the game rules (level layout, movement, pickups, enemy contact) without any graphics.
+#       The classes in this file only draw what the simulation says is happening.
+from simulation import loadLevel, Simulation, PlayerBody, LEFT, RIGHT, JUMP
+
+# plays animations at the `fps` in their info.json, no matter how fast the game loop runs
+from animation import AnimationScheduler, loadFrames
+
+# runs the game loop at full speed while things are happening, and skips drawing (and sleeps) while nothing is
+from frame_scheduler import FrameScheduler
+
+# collision masks for every animation frame, made once when the frames load, for pixel-accurate contact
+from mask_cache import MaskCache
+
+# notices when level, tile, and info files are saved, for reloading them in development mode
+from file_watcher import FileWatcher
+
+# plays sounds on a fixed set of channels, so a burst of pickups can't pile up copies of the same sound
+from sound_manager import SoundManager
+
+# keeps every image in one place, with a limit on how much memory they can take
+from texture_cache import TextureCache
+
+# draws the game at its own size and stretches it to fit the window
+from render_scale import RenderScaler
+
+# decides which enemies move each tick in a level bigger than the window: the ones on screen or near a player every tick,
+#       the ones farther away less often
+from ai_lod import AIScheduler
+
+# logs what happens in each game (levels played, items picked up, deaths) to files, from a background thread
+from telemetry import Telemetry
+
+# multiplayer: a client that sends the keys to a server running the game, and gets back what's happening
+import netplay
+
 # grab command line arguments using the helper function and put them into a dictionary
 _, ARGDICT = mykwargs(sys.argv)
 
@@ -42,85 +79,121 @@ WINDOW_WIDTH = WINDOW_WIDTH_TILE*TILE_WIDTH
 WINDOW_HEIGHT = WINDOW_HEIGHT_TILE*TILE_HEIGHT
 WINDOW_TITLE = ARGDICT["title"]
 GAME_FPS = int(ARGDICT["fps"])
+# how many pixels an enemy walks per frame while chasing the player (0 keeps them standing still)
+MOB_SPEED = int(ARGDICT.get("mob_speed", 2))
+# development mode (dev=true): level, tile, and info files are reloaded while the game runs as soon as they're saved
+DEV_MODE = ARGDICT.get("dev", "false").lower() == "true"
+# verbose=true prints how the collision masks (when they're made), the frame scheduler, sounds, image cache, telemetry,
+#       and (in multiplayer) the connection did (when the game ends)
+VERBOSE = ARGDICT.get("verbose", "false").lower() == "true"
+# how often (in milliseconds) development mode checks the files for changes
+POLL_INTERVAL = 500
+# the tile development mode places when you click on the level
+EDIT_TILE = '01'
+# multiplayer (connect=host:port): play on the server started by netplay.py instead of running the game here
+CONNECT = ARGDICT.get("connect")
+# how long (in milliseconds) to keep asking the server to let us join
+JOIN_TIMEOUT = 5000
+# how many MiB of images (baked levels, tiles, sprite frames) to keep before forgetting the ones used longest ago
+TEXTURE_BUDGET = float(ARGDICT.get("texture_budget", 64))
+# the game is always drawn at WINDOW_WIDTH x WINDOW_HEIGHT, then stretched `scale` times to fill the window
+#       (smooth=true blends pixels instead of repeating them, and fullscreen=true fills the screen).
+#       '+' and '-' change the scale while the game runs, F10 switches smoothing, and F11 switches fullscreen
+RENDER_SCALE = int(ARGDICT.get("scale", 1))
+SMOOTH_SCALE = ARGDICT.get("smooth", "false").lower() == "true"
+FULLSCREEN = ARGDICT.get("fullscreen", "false").lower() == "true"
+# enemies on screen or within half a window's diagonal of the player move every tick. Ones within twice that distance
+#       move every 4 ticks, and the rest every 16, with at most `ai_budget=` of those (default 100) moving in one tick.
+#       `ai_lod=false` moves every enemy every tick. (A level that fits in the window has every enemy on screen)
+AI_LOD = ARGDICT.get("ai_lod", "true").lower() == "true"
+AI_BUDGET = int(ARGDICT.get("ai_budget", 100))
+AI_NEAR = math.hypot(WINDOW_WIDTH, WINDOW_HEIGHT) / 2
+# the folder the game's telemetry (what happened while it was played) is saved in, or `telemetry=false` to not save it
+TELEMETRY_FOLDER = ARGDICT.get("telemetry", "./telemetry")
+if TELEMETRY_FOLDER.lower() == "false":
+    TELEMETRY_FOLDER = None
 
 # each set of sprite animation frames has an info file that contains the names of the frames, how many exist per set,
 #       and a value for adjusting the rate each frame plays. Since each animation is stored in its own folder, we only need to know
 #       how many frames there are and stick that value into the info file. We'll use a loop to iterate through each frame.
-player_animations = load_json(ARGDICT["player_images"]+"/info.json")
-mob_animations = load_json(ARGDICT["mob_images"]+"/info.json")
-level_info = load_json(ARGDICT["levels"]+"/info.json")
+# The info files are read through the manifest (`manifest=`, default assets.manifest), which checks them and is only built
+#       again when one of them changes. Anything missing or malformed stops the game here with a list of what's wrong
+#       (name -> (kind, file, the keys the game needs))
+ASSET_SOURCES = {
+    "player": ("animations", ARGDICT["player_images"]+"/info.json", ("idle", "walk", "dead")),
+    "mob": ("animations", ARGDICT["mob_images"]+"/info.json", ("idle",)),
+    "levels": ("levels", ARGDICT["levels"]+"/info.json", ()),
+}
+manifest = loadManifest(ASSET_SOURCES, ARGDICT.get("manifest", "assets.manifest"))
+player_animations = manifest["player"]
+mob_animations = manifest["mob"]
+level_info = manifest["levels"]
+
+# every animation frame of the player, enemies, and items, loaded once by `loadSpriteFrames`
+sprite_frames = {}
+# and the collision masks of all of them
+masks = MaskCache()
+
+# every sound in the game: the level music, and the sound effects loaded in `main`
+sounds = SoundManager()
+
+# every image in the game. The sprite frames and the level on screen are pinned, so they're never forgotten;
+#       the baked images of other levels and the tiles are kept for when they're needed again, as long as there's room
+textures = TextureCache(int(TEXTURE_BUDGET*1024*1024))
+
+# what happens in the game, by kind of event and the numbers saved with it. Every event is labeled with the level
+#       it happened in. `main` starts the thread that writes them
+telemetry = Telemetry(TELEMETRY_FOLDER, "P02", {
+    "level_start": (),
+    "item": ("index", "score"),
+    "death": ("x", "y", "score"),
+    "level_end": ("milliseconds", "score", "deaths", "completed"),
+})
+
+def loadSpriteFrames():
+    """
+    Loads every animation frame into `sprite_frames` and makes their collision masks.
+    This has to happen after the window is created. Walking left uses the frames flipped.
+    """
+    for name, folder, flipped in (('idle', 'idle', False), ('walk', 'walk', False), ('walk_left', 'walk', True), ('dead', 'dead', False)):
+        sprite_frames['player_'+name] = loadFrames(ARGDICT["player_images"]+'/'+folder+'/{}.png', player_animations[folder]["count"], flipped=flipped)
+    sprite_frames['mob_idle'] = loadFrames(ARGDICT["mob_images"]+'/idle/{}.png', mob_animations["idle"]["count"])
+    sprite_frames['mob_idle_left'] = loadFrames(ARGDICT["mob_images"]+'/idle/{}.png', mob_animations["idle"]["count"], flipped=True)
+    sprite_frames['item'] = loadFrames(ARGDICT["item_images"]+'/{}.png', 1)
+    for name, frames in sprite_frames.items():
+        masks.add(frames)
+        for number, frame in enumerate(frames):
+            textures.put(('frame', name, number), frame, "sprites", pinned=True)
 
 class Level(pygame.sprite.Sprite):
     """
     A class that loads a level
     """
     def __init__(self, level):
-        # open the level's background image
-        background = Image.open(ARGDICT["map_images"]+"/background.png")
-        # the level is stored in memory as a 2D array of tiles. The tile dimensions
-        #       are given as a command line argument
-        self.level = []
         # level objectives are stored here
         self.score_needed = level_info[level]["objectives"]["points"]
         self.enemy_needed = level_info[level]["objectives"]["enemies"]
-        # enemies, items, and the player locations are indicated in each level's .txt 
-        #       file and their positions are stored here. 
-        self.enemy_locs = []
-        self.item_locs = []
-        self.player_pos = ()
+        # the level's .txt file is a bunch of two character pairs that represent a part of the level.
+        #       Empty space is '..', enemies are '00', items are '14', the player is '--', and terrain is '01'/'02'/etc.
+        #       `loadLevel` reads it into a 2D array of those pairs (self.level) and finds where the
+        #       enemies, items, and the player start
+        self.useData(loadLevel(ARGDICT["levels"], level, TILE_WIDTH, TILE_HEIGHT))
         # this stored all text to be displayed in the level and was sorta hardcoded in...
         #       I was in a rush...
         self.text_locs = []
-        # opens the level's .txt file to begin creating it
-        with open(ARGDICT["levels"]+'/'+level+'.txt','r') as infile:
-            row = 0
-            map_data = infile.read()
-            map_data = map_data.split("\n")
-            # for every line in the .txt file
-            for line in map_data:
-                col = 0
-                sub = []
-                # the .txt file is a bunch of two character pairs that represent a part of the level
-                # Empty space is '..', enemies are '00', terrain is '01'/'02'/etc., etc.
-                for i in range(0,len(line),2):
-                    section = line[i]+line[i+1]
-                    # if the pair represents anything besides empty space (i.e. '..')
-                    if not '.' in section:
-                        # if we read in an item
-                        if '14' in section:
-                            sub.append('..')
-                            section = '..'
-                            self.item_locs.append((col*TILE_WIDTH, (row*TILE_HEIGHT)))
-                        # if we read in an ememy
-                        elif '00' in section:
-                            sub.append('..')
-                            section = '..'
-                            self.enemy_locs.append((col*TILE_WIDTH, (row*TILE_HEIGHT)-TILE_HEIGHT))
-                        # if we read in the player
-                        elif '--' in section:
-                            sub.append('..')
-                            self.player_pos = (col*TILE_WIDTH, (row*TILE_HEIGHT)-TILE_HEIGHT)
-                        # otherwise, we have read in terrain, so fill in the terrain by pasting it to
-                        #       the background image
-                        else:
-                            sub.append(section)
-                            tile = Image.open(ARGDICT["map_images"]+'/'+section+".png").convert("RGBA")
-                            tile_top_left = (col*TILE_WIDTH, row*TILE_HEIGHT)
-                            background.paste(tile, box=tile_top_left, mask=tile)
-                    # we read in empty space / air, so just stick it in the array
-                    else:
-                        sub.append(section)
-                    col += 1
-                self.level.append(sub)
-                row += 1
-            # save the background image with the new level tiles pasted on
-            background.save("level"+level+".png", quality=95)
-            # so now we have a 2D array with each two-character pair stored in each element. We will
-            #       use this array when we implement gravity and falling.
 
         pygame.sprite.Sprite.__init__(self)
-        # load the sprite as an image
-        self.image = pygame.image.load("level"+level+".png").convert()
+        # the level's background image with no tiles on it. It's kept so any part of the level can be painted again
+        self.background = textures.get(('image', 'background'), lambda: pygame.image.load(ARGDICT["map_images"]+"/background.png").convert(),
+                                       "backgrounds")
+        # the size of the biggest tile in the level (the tile images themselves are in `textures`, see `tile`)
+        self.biggest_tile = (TILE_WIDTH, TILE_HEIGHT)
+        for section in set(self.data.terrain.values()):
+            self.tile(section)
+        # the level image with every tile pasted on. A level that was played before (and hasn't been forgotten
+        #       to make room) is reused as it is. The level on screen stays pinned until `LevelInfoHolder.leave`
+        self.cache_key = ('level', level)
+        self.image = textures.get(self.cache_key, self.bake, "levels", pinned=True)
 
         # create a pygame rectangle from the dimensions of the background image
         self.rect = self.image.get_rect()
@@ -128,36 +201,80 @@ class Level(pygame.sprite.Sprite):
         # place it at 0, 0
         self.rect.topleft = (0, 0)
 
-    # sprite_bottom is a tuple of tuples. It's a tuple of the sprite's bottom left and bottom right corners, which are tuples.
-    # getFloor returns the nearest terrain element stored in the 2D level matrix that is directly under the player's sprite.
-    # If the player is falling, the function will loop down from the left and right edges of the sprite
-    #       until it either reaches the bottom of the window or a solid block. 
-    def getFloor(self, sprite_bottom):
-        # grabs the x-coord of the sprite's bottom left and right tuple
-        sprite_left = sprite_bottom[0][0] # grabs the x-coord of the bottom left
-        sprite_right = sprite_bottom[1][0] # grabs the x-coord of the bottom right
-        sprite_row = sprite_bottom[0][1] # grabs the y-coord of the bottom left (could just as well have been the bottom right; they're the same)
-
-        # returns the level matrix location the sprite's bottom left/right corner is in
-        sprite_col_l = math.floor(sprite_left / TILE_WIDTH)
-        sprite_col_r = math.floor(sprite_right / TILE_WIDTH)
-        # the tile the sprite's bottom side sits in
-        sprite_row = math.floor((sprite_bottom[0][1]-1) / TILE_HEIGHT)
-        for tile in range(sprite_row,WINDOW_HEIGHT_TILE):
-            if '.' not in self.level[tile][sprite_col_l] or '.' not in self.level[tile][sprite_col_r]:
-                return tile
-        # if the player has nothing under their feet, return the height of the window
-        return WINDOW_HEIGHT_TILE
-
+    def bake(self):
+        # fill in the terrain by pasting each tile to a copy of the background image
+        #       (tiles that start past its right or bottom edge wouldn't show up, so they're skipped)
+        image = self.background.copy()
+        image_width, image_height = image.get_size()
+        for (col, row), section in self.data.terrain.items():
+            if col*TILE_WIDTH < image_width and row*TILE_HEIGHT < image_height:
+                image.blit(self.tile(section), (col*TILE_WIDTH, row*TILE_HEIGHT))
+        return image
+
+    def useData(self, data):
+        # switches to the parsed contents of a level file (LevelData)
+        self.data = data
+        self.level = self.data.grid
+        self.enemy_locs = self.data.enemy_locs
+        self.item_locs = self.data.item_locs
+        self.player_pos = self.data.player_pos
+
+    def tile(self, code):
+        # the image of a tile, loaded the first time it's needed (and again if the cache forgot it)
+        image = textures.get(('tile', code), lambda: pygame.image.load(ARGDICT["map_images"]+'/'+code+".png").convert_alpha(), "tiles")
+        width, height = image.get_size()
+        self.biggest_tile = (max(self.biggest_tile[0], width), max(self.biggest_tile[1], height))
+        return image
+
+    def footprint(self, col, row, code):
+        # the part of the level image a tile at (col, row) covers. Some tiles (like the title text) are bigger than one space
+        if '.' in code:
+            return pygame.Rect(col*TILE_WIDTH, row*TILE_HEIGHT, TILE_WIDTH, TILE_HEIGHT)
+        return self.tile(code).get_rect(topleft=(col*TILE_WIDTH, row*TILE_HEIGHT))
+
+    def setTile(self, col, row, code, sim=None):
+        """
+        Changes the tile at (col, row) to `code` ('..' for empty space), for terrain that can be broken or edited.
+        Only the part of the level image the old and new tiles cover is painted again. If the level is being played,
+        pass its Simulation so the enemies' paths around that spot get updated too.
+        """
+        in_level = 0 <= row < len(self.level) and 0 <= col < len(self.level[row])
+        old_code = self.level[row][col] if in_level else '..'
+        # the level file doesn't have this change, so the next time the level starts it's baked from the file again
+        textures.discard(self.cache_key)
+        if sim is not None:
+            sim.setTile(col, row, code)
+        else:
+            self.data.setTile(col, row, code)
+        self.repaint(self.footprint(col, row, old_code).union(self.footprint(col, row, code)))
+
+    def repaint(self, area):
+        """
+        Paints `area` (a pygame Rect, in pixels) of the level image again: the clean background first,
+        then every tile that reaches into it, in the same order the whole level is painted in
+        """
+        self.image.set_clip(area)
+        self.image.blit(self.background, area, area)
+        # a tile can reach into the area from a few spaces up or to the left if it's bigger than one space
+        col_l = max(0, area.left // TILE_WIDTH - (self.biggest_tile[0]-1) // TILE_WIDTH)
+        row_t = max(0, area.top // TILE_HEIGHT - (self.biggest_tile[1]-1) // TILE_HEIGHT)
+        col_r = (area.right-1) // TILE_WIDTH
+        row_b = min(len(self.level)-1, (area.bottom-1) // TILE_HEIGHT)
+        for row in range(row_t, row_b+1):
+            line = self.level[row]
+            for col in range(col_l, min(col_r+1, len(line))):
+                if '.' not in line[col]:
+                    self.image.blit(self.tile(line[col]), (col*TILE_WIDTH, row*TILE_HEIGHT))
+        self.image.set_clip(None)
 
 class Enemy(pygame.sprite.Sprite):
     """
     A pygame sprite class visible on screen as an image
     A sprite in pygame is a moveable object on the screen
-    The sprite created with this class in this program will be unmovable, 
-        but will kill the player if they contact each other
+    The sprite created with this class in this program will chase the player along the floors
+        (the simulation decides where it goes) and will kill the player if they contact each other
     """
-    def __init__(self, enemy_loc):
+    def __init__(self, sim, index):
         pygame.sprite.Sprite.__init__(self)
         # load the sprite as an image
         # There is one animation that will play in this game: Idle, located in the `./resources/mob` folder
@@ -170,44 +287,38 @@ class Enemy(pygame.sprite.Sprite):
         # self.attack_imagenum = 1
         self.idle_imagelimit = mob_animations["idle"]["count"]
         # self.attack_imagelimit = mob_animations["attack"]["count"]
-        # this is how we will load any frame of an animation. (Here, we load the first `idle` frame)
-        # For example, the first image that loads will be at "./mob/+idle+/+1+.png". I kept the plus signs in so you can see how each part
-        #       of the below instruction contributes. The plus's aren't actually in the string.
-        self.image = pygame.image.load("./resources/mob/idle/"+str(self.idle_imagenum)+".png")
+        # the frames were all loaded by `loadSpriteFrames`. Frame number n is at index n-1
+        self.image = sprite_frames['mob_idle'][self.idle_imagenum-1]
 
         # create a pygame rectangle from the dimensions of the image
         self.rect = self.image.get_rect()
 
-        # set the position of the sprite on the window
-        #       but don't position the sprite just yet
-        self.x, self.y = enemy_loc
+        # the enemy's position lives in the simulation (`sim.mobs[index]`). This sprite follows it around
+        self.sim = sim
+        self.index = index
 
-        # place the sprite at the location determined above, record its actual position in world coordinates
+        # place the sprite at the enemy's position in the world
+        self.x, self.y = sim.mobs[index]
         self.rect.topleft = self.actual_position = (self.x, self.y)
 
         # hit will stay true if the sprite has NOT been hit by a Bullet. False, otherwise. We'll use this
         #       variable in the `update` member function
         self.hit = True
 
-    # # adds the offset calculated in the camera class to the enemy's actual position in the world (not with respect to the game window)
-    # def update(self, position):
-
-    #     # if the enemy has not been hit by a Bullet, play its 'idle' animation
-    #     if self.hit:
-    #         # We use the `max` function since there are no animation frames with a 0 in their name,
-    #         #       and the mod function will return a 0 if self.<animation>_imagenum = self.<animation>_imagelimit
-    #         self.idle_imagenum = max(1, (self.idle_imagenum + 1) % self.idle_imagelimit)
-    #         self.image = pygame.image.load("./mob/"+self.idle_pictureset["name"]+'/'+self.idle_pictureset["name"]+str(self.idle_imagenum)+".png")
-    #     # if it has been hit
-    #     elif not self.hit:
-    #         self.dead_imagenum += 1
-    #         # if the entire 'dead' animation has played, kill the enemy and remove it from view
-    #         if self.dead_imagenum == self.dead_imagelimit:
-    #             self.dead_imagenum = 1
-    #             self.kill()
-    #         # if the animation hasn't finished, play the next frame
-    #         else:
-    #             self.image = pygame.image.load("./mob/"+self.dead_pictureset["name"]+'/'+self.dead_pictureset["name"]+str(self.dead_imagenum)+".png")
+    # moves the sprite to where the simulation says the enemy is
+    def update(self):
+        position = tuple(self.sim.mobs[self.index])
+        # while the enemy is walking, loop-play its 'idle' frames (there are no walking frames for it), facing the way it walks.
+        #       If it's standing still, leave the current frame alone.
+        if position != self.actual_position and not self.sim.mob_falling[self.index]:
+            # We use the `max` function since there are no animation frames with a 0 in their name,
+            #       and the mod function will return a 0 if self.<animation>_imagenum = self.<animation>_imagelimit
+            self.idle_imagenum = max(1, (self.idle_imagenum + 1) % self.idle_imagelimit)
+            # the frames face right, so use the flipped ones when walking left
+            frames = sprite_frames['mob_idle_left'] if self.sim.mob_facing[self.index] < 0 else sprite_frames['mob_idle']
+            self.image = frames[self.idle_imagenum-1]
+        self.x, self.y = self.actual_position = position
+        self.rect.topleft = position
 
 class Player(pygame.sprite.Sprite):
     """
@@ -217,128 +328,99 @@ class Player(pygame.sprite.Sprite):
         and will not exit the window boundaries. The mouse must be hovering over the
         window for the sprite to move.
     """
-    def __init__(self, player_loc):
+    def __init__(self, body):
         pygame.sprite.Sprite.__init__(self)
 
         # load the sprite as an image
         # There are three animations that will play in this game: Idle, Dead, and Walk.
-        # Animations are loop-played, meaning, since each frame of every animation are numbered (e.g. `Dead (1).png`, `Dead (2).png`, etc.),
-        #       we can loop through them using the `<animation_name>_imagenum` variable. `<animation_name>_imagelimit`
-        #       keeps the program from trying to load an image that doesn't exist. (We don't want to open `Dead (17).png` if
-        #       there are only 16 frames in the Dead animation.) `<animation_name>_imagelimit` gets its value from the `info.json`
-        #       file in the `playersprites` folder.
-        self.idle_imagenum = 1
+        # Animations are loop-played, meaning, since each frame of every animation are numbered (e.g. `1.png`, `2.png`, etc.),
+        #       we can loop through them. Every frame was loaded once by `loadSpriteFrames`, and the scheduler keeps track of which
+        #       frame of the idle and walk animations is showing, moving them along at the `fps` found in the `info.json` file
+        #       in the player folder. (Walking left uses the walk frames flipped.)
+        self.animations = AnimationScheduler()
+        for name, folder in (('idle', 'idle'), ('walk', 'walk'), ('walk_left', 'walk')):
+            self.animations.add(name, sprite_frames['player_'+name], player_animations[folder]["fps"])
+        # the dead animation only plays once, so it counts its own frames. `dead_imagelimit` keeps the program from trying
+        #       to show a frame that doesn't exist, and `dead_waited` is how many milliseconds the current frame has been showing
+        self.dead_frames = sprite_frames['player_dead']
         self.dead_imagenum = 1
-        self.walk_imagenum = 1
-        # self.jump_imagenum = 1
-        self.idle_imagelimit = player_animations["idle"]["count"]
         self.dead_imagelimit = player_animations["dead"]["count"]
-        self.walk_imagelimit = player_animations["walk"]["count"]
-        # self.jump_imagelimit = player_animations["jump"]["count"]
-        # this is how we will load any frame of an animation (here, we load the first frame indicated in the commandline parameters)
-        self.image = pygame.image.load(ARGDICT["player_images"]+'/idle/'+str(self.idle_imagenum)+'.png')
+        self.dead_waited = 0
+        self.dead_frame_time = 1000 / player_animations["dead"]["fps"]
+        # which animation and frame is showing, so the image is only swapped when that changes,
+        #       and whether it changed during the last update
+        self.showing = None
+        self.changed = False
+        self.image = self.animations.frame('idle')
 
         # create a pygame rectangle from the dimensions of the image
         self.rect = self.image.get_rect()
 
-        # set the position of the sprite on the window in world coordinates
-        self.x, self.y = player_loc
-
-        # possible states the player can have are 'i' (idle), 'l' (walking left), and 'r' (walking right)
-        self.state = 'i'
-        # these states are true when the player is jumping, falling, or dying, respectively
-        self.jumping = False
-        self.falling = False
-        self.dying = False
-        # how high the player can jump
-        self.vertical_speed = 7
-        self.old_vertical_speed = self.vertical_speed
-        # how fast the player will fall
-        self.gravity = 5
-        # the player's score
-        self.score = 0
-
-        # place the sprite at the location determined above, record its actual position in world coordinates,
-        #       and lastly record that position as the last viable position it has been in (more on that in this class's
-        #       `update` member function)
-        self.rect.topleft = self.old_loc = (self.x, self.y)
-
-    def Move(self, floor_y):
-        """
-        Move controls the position of the sprite
-        """
-        self.old_loc = self.rect.topleft
-        # if the player is moving to the right
-        if self.state == 'r':
-            # prevents the player from leaving the window from the right side
-            if (self.rect.right + 4) <= WINDOW_WIDTH:
-                self.x += 4
-                self.rect.topleft = (self.x, self.rect.topleft[1])
-        # if the player is moving left
-        if self.state == 'l':
-            # prevents the player from leaving the window from the left side
-            if (self.rect.left - 4) >= 0:
-                self.x -= 4
-                self.rect.topleft = (self.x, self.rect.topleft[1])
-        # if the player is not falling AND is jumping, make them jump
-        if self.jumping and not self.falling:
-            # calculate the number of pixels to move the player upwards
-            energy = self.vertical_speed * self.vertical_speed
-            # if the jump won't put us outside the window, move the player upwards
-            if self.rect.topleft[1] - energy >= 0:
-                self.rect.topleft = (self.x, self.rect.topleft[1] - energy)
-                # decrease the jumping speed by one so the jump tapers off
-                self.vertical_speed -= 1
-            # if the player has hit the top of the window OR the jump speed has reached zero
-            #       # switch them from a jumping state to a falling state
-            if self.rect.topleft[1] < 0 or self.vertical_speed == 0:
-                self.falling = True
-                self.jumping = False
-        # if the player is falling
-        if self.falling:
-            # prevent them from falling below the floor (which was determined with the getFloor function)
-            if self.rect.bottom + self.gravity <= floor_y:
-                self.rect.bottom += self.gravity
-            # once the player has reached the floor, reset speed, 
-            else:
-                self.vertical_speed = self.old_vertical_speed
-                # stick the player on th ground
-                self.rect.bottom = floor_y
-                self.state = 'i'
-                self.falling = False
-        # this activates the falling state if the player has walked off an edge
-        if (not self.jumping) and (self.rect.bottom < floor_y):
-            self.falling = True
+        # the player's position, movement state (walking, jumping, falling, dying), and score live in the simulation.
+        #       This sprite only follows the body around and picks which animation frame to show
+        self.body = body
+        self.rect.topleft = (body.x, body.y)
 
     # applies changes to the player sprite, such as animation and position
-    def update(self):
+    # `milliseconds` is the time since the last update, which is how far the animations move along
+    def update(self, milliseconds):
+        body = self.body
+        self.rect.topleft = (body.x, body.y)
+        self.changed = False
+        self.animations.advance(milliseconds)
+        name = None
         # if the player isn't moving, play the idle animation
-        if self.rect.topleft == self.old_loc and not self.dying:
-            self.idle_imagenum = max(1, (self.idle_imagenum + 1) % self.idle_imagelimit)
-            self.image = pygame.image.load(ARGDICT["player_images"]+'/idle/'+str(self.idle_imagenum)+'.png')
+        if (body.x, body.y) == body.old_loc and not body.dying:
+            name = 'idle'
         # If the player isn't dying, play the walking right animation
-        elif self.state == 'r' and not self.dying:
-            self.walk_imagenum = max(1, (self.walk_imagenum + 1) % self.walk_imagelimit)
-            self.image = pygame.image.load(ARGDICT["player_images"]+'/walk/'+str(self.walk_imagenum)+'.png')
-            self.state = 'i'
-        # if the player isn't dying, play the walking left animation (we flip the image of the original frame here)
-        elif self.state == 'l' and not self.dying:
-            self.walk_imagenum = max(1, (self.walk_imagenum + 1) % self.walk_imagelimit)
-            image_unrot = pygame.image.load(ARGDICT["player_images"]+'/walk/'+str(self.walk_imagenum)+'.png')
-            self.image = pygame.transform.flip(image_unrot, True, False)
-            self.state = 'i'
+        elif body.walk_state == 'r' and not body.dying:
+            name = 'walk'
+        # if the player isn't dying, play the walking left animation (the walk frames flipped)
+        elif body.walk_state == 'l' and not body.dying:
+            name = 'walk_left'
+        # if the player's dying state is true, play the dying animation (even in the middle of a jump)
+        elif body.dying:
+            self.showing = None
+            self.dead_waited += milliseconds
+            steps = int(self.dead_waited // self.dead_frame_time)
+            self.dead_waited -= steps * self.dead_frame_time
+            if steps:
+                # After playing the entire animation, kill the sprite
+                if self.dead_imagenum >= self.dead_imagelimit:
+                    self.kill()
+                else:
+                    self.dead_imagenum = min(self.dead_imagelimit, self.dead_imagenum + steps)
+                    self.image = self.dead_frames[self.dead_imagenum-1]
+                self.changed = True
         # code to play the jumping animation (not done yet)
-        elif self.jumping:
+        elif body.jumping:
             pass
-        # if the player's dying state is true, play the dying animation.
-        elif self.dying:
-            if self.dead_imagenum < self.dead_imagelimit:
-                self.dead_imagenum = self.dead_imagenum + 1 % self.dead_imagelimit
-                self.image = pygame.image.load(ARGDICT["player_images"]+'/dead/'+str(self.dead_imagenum)+'.png')
-            # After playing the entire animation, kill the sprite
-            else:
-                self.dying = False
-                self.kill()
+        # only swap the image if the player should be showing a different frame than last update
+        if name is not None:
+            showing = (name, self.animations.clocks[name])
+            if showing != self.showing:
+                self.showing = showing
+                self.image = self.animations.frame(name)
+                self.changed = True
+
+    def reset(self):
+        # start over from the beginning of the animations, e.g. after the level restarts from a snapshot
+        self.dead_imagenum = 1
+        self.dead_waited = 0
+        self.showing = None
+        self.changed = True
+
+    def untilNextFrame(self):
+        """
+        Returns how many milliseconds until the player's animation shows its next frame (None if it isn't animating)
+        """
+        if not self.alive() or self.body.jumping and not self.body.dying:
+            return None
+        if self.body.dying:
+            return max(0, self.dead_frame_time - self.dead_waited)
+        if self.showing is None:
+            return None
+        return self.animations.untilNext(self.showing[0])
 
 class Item(pygame.sprite.Sprite):
     """
@@ -346,11 +428,14 @@ class Item(pygame.sprite.Sprite):
     A sprite in pygame is a moveable object on the screen
     This sprite will act as a collectible for the player
     """
-    def __init__(self,item_pos):
+    def __init__(self,item_pos,index):
         pygame.sprite.Sprite.__init__(self)
 
-        # there's only one sprite image for the item. Load it here.
-        self.image = pygame.image.load(ARGDICT["item_images"]+'/1.png')
+        # which of the simulation's items this sprite draws
+        self.index = index
+
+        # there's only one sprite image for the item (loaded by `loadSpriteFrames`)
+        self.image = sprite_frames['item'][0]
         # create a pygame rectangle from the dimensions of the image
         self.rect = self.image.get_rect()
         
@@ -370,22 +455,41 @@ class Item(pygame.sprite.Sprite):
         if self.hit:
             self.kill()
 
+# returns the (width, height) of an image file
+def imageSize(path):
+    return pygame.image.load(path).get_size()
+
+# returns a simulation of a Level from the start. The collision rectangles are the size of the first frame of each sprite,
+#       and enemies outside the window move less often (see AI_LOD)
+def newSimulation(level_world):
+    sim = Simulation(level_world.data, level_world.score_needed,
+                     imageSize(ARGDICT["player_images"]+'/idle/1.png'),
+                     imageSize(ARGDICT["item_images"]+'/1.png'),
+                     imageSize(ARGDICT["mob_images"]+'/idle/1.png'),
+                     level_world.enemy_needed, MOB_SPEED)
+    if AI_LOD:
+        sim.useAI(AIScheduler(AI_NEAR, 2*AI_NEAR, budget=AI_BUDGET), (0, 0, WINDOW_WIDTH, WINDOW_HEIGHT))
+    return sim
+
 class LevelInfoHolder():
     '''
     This class will hold all the session information for each level
     '''
     def __init__(self, level_type):
         # set up the background music unless the level is the splash screen
+        #       (`music` is the name it's played by, loaded the first time the level is played)
+        self.music = None
         if level_type != '6':
-            pygame.mixer.init(buffer=64)
-            self.background_music = pygame.mixer.Sound(ARGDICT["sounds"]+'/'+level_type+'.ogg')
-            # the sound was really finicky with volume, so these if/else statements are custom
-            #       just to fix that (I think). Did it? Nope...
-            if level_type == '2':
-                self.background_music.set_volume(0.01)
-            else:
-                self.background_music.set_volume(0.1)
-            self.background_music.play()
+            self.music = 'music'+level_type
+            if self.music not in sounds.sounds:
+                # the sound was really finicky with volume, so these if/else statements are custom
+                #       just to fix that (I think). Did it? Nope...
+                if level_type == '2':
+                    volume = 0.01
+                else:
+                    volume = 0.1
+                sounds.load(self.music, ARGDICT["sounds"]+'/'+level_type+'.ogg', "music", volume=volume)
+            sounds.play(self.music)
         # create sprite groups for the player, mobs, and items
         self.main_sprites = pygame.sprite.Group()
         self.item_sprites = pygame.sprite.Group()
@@ -393,108 +497,428 @@ class LevelInfoHolder():
         self.level_type = level_type
         # generate the level
         self.level_world = Level(self.level_type)
+        # start playing the level
+        self.sim = newSimulation(self.level_world)
         # create the player sprite and place them in the level
-        self.player = Player(self.level_world.player_pos)
-        # place the enemies about the level
-        for loc in self.level_world.enemy_locs:
-            self.mob_sprites.add(Enemy(loc))
-        # place the item about the level
-        for loc in self.level_world.item_locs:
-            self.item_sprites.add(Item(loc))
+        self.player = Player(self.sim.player)
+        # place the enemies about the level. The list keeps them in the same order as the simulation's enemies
+        self.mobs = [Enemy(self.sim, index) for index in range(len(self.sim.mobs))]
+        self.mob_sprites.add(self.mobs)
+        # place the item about the level. The list keeps them in the same order as the simulation's items
+        self.items = [Item(loc, index) for index, loc in enumerate(self.level_world.item_locs)]
+        self.item_sprites.add(self.items)
+        # the simulation only counts contact where the sprites' solid pixels overlap, not just their rectangles
+        self.sim.touching = self.touching
+        # the level as it starts, to restart from when the player dies, and the last checkpoint the player saved (F5 saves one, F9 loads it)
+        self.start = self.sim.snapshot()
+        self.checkpoint = self.start
         # stick the level and player into the main_sprite's group
         self.main_sprites.add(self.level_world)
         self.main_sprites.add(self.player)
+        # in multiplayer, everyone else's player sprite (player id -> Player), and the last state shown
+        self.others = {}
+        self.shown = None
         # if the level is true, it's a splash screen and will only appear for a little bit
         self.temporal = level_info[level_type]["stipulations"]['life']
         # store the next level after this one is passed
         self.next_level = level_info[level_type]["next_level"]
+        # when the level started and how many times the player died in it, for the telemetry
+        self.started = time.perf_counter()
+        self.deaths = 0
+        telemetry.log("level_start", label=level_type)
+
+    def restore(self, snapshot):
+        """
+        Puts the level back the way it was when `snapshot` (from `self.sim.snapshot()`) was taken:
+        picked up items come back, the player comes back to life, and the enemies go back where they were.
+        The level image and sprites are reused, so nothing is loaded again.
+        """
+        self.sim.restore(snapshot)
+        for item in self.items:
+            item.hit = not self.sim.item_alive[item.index]
+            if not item.hit and not item.alive():
+                self.item_sprites.add(item)
+        self.player.reset()
+        if not self.player.alive():
+            self.main_sprites.add(self.player)
+        for mob in self.mobs:
+            mob.update()
+        if self.music is not None:
+            sounds.stop(self.music)
+            sounds.play(self.music)
+
+    def reload(self, paths):
+        """
+        Development mode: reloads the files in `paths` (that were just saved) that matter to this level.
+            info.json        - the objectives, splash screen flag, and next level are updated in place
+            <level>.txt      - only the spaces whose tile changed are painted again. Items and enemies are only
+                               placed again if they were moved in the file
+            other .txt       - another level's baked image is forgotten, so it's baked again when that level starts
+            <code>.png tile  - every space with that tile is painted again
+            background.png   - the whole level is painted again
+        The player keeps their position, state, and score. Returns True if anything was reloaded.
+        """
+        level = self.level_world
+        reloaded = False
+        for path in paths:
+            start = time.perf_counter()
+            name = os.path.basename(path)
+            folder = os.path.normpath(os.path.dirname(path))
+            try:
+                if folder == os.path.normpath(ARGDICT["levels"]) and name == 'info.json':
+                    new_info = load_json(path)
+                    problems = checkLevels(new_info)
+                    if problems:
+                        raise ManifestError(problems)
+                    level_info.update(new_info)
+                    info = level_info[self.level_type]
+                    level.score_needed = self.sim.score_needed = info["objectives"]["points"]
+                    level.enemy_needed = self.sim.enemy_needed = info["objectives"]["enemies"]
+                    self.temporal = info["stipulations"]['life']
+                    self.next_level = info["next_level"]
+                    what = "objectives"
+                elif folder == os.path.normpath(ARGDICT["levels"]) and name == self.level_type+'.txt':
+                    what = self.reloadLevelFile()
+                elif folder == os.path.normpath(ARGDICT["levels"]) and name.endswith('.txt'):
+                    # another level: forget its baked image (if it has one), so it's baked from the new file when it's played
+                    textures.discard(('level', name[:-4]))
+                    what = "baked image dropped"
+                elif folder == os.path.normpath(ARGDICT["map_images"]) and name == 'background.png':
+                    level.background = textures.put(('image', 'background'), pygame.image.load(path).convert(), "backgrounds")
+                    level.repaint(level.image.get_rect())
+                    # the other levels that were already baked have the old background
+                    textures.clear("levels")
+                    what = "whole level repainted"
+                elif folder == os.path.normpath(ARGDICT["map_images"]) and ('tile', name[:-4]) in textures:
+                    code = name[:-4]
+                    spaces = [(col, row) for (col, row), section in level.data.terrain.items() if section == code]
+                    areas = [level.footprint(col, row, code) for col, row in spaces]
+                    # forget the old image so `tile` loads the new one, and the other levels that were baked with it
+                    textures.discard(('tile', code))
+                    textures.clear("levels")
+                    for (col, row), area in zip(spaces, areas):
+                        level.repaint(area.union(level.footprint(col, row, code)))
+                    what = f"{len(spaces)} spaces repainted"
+                else:
+                    continue
+            # a file that's only half saved (or has a typo) shouldn't crash the game. Try again next time it's saved
+            except (OSError, ValueError, KeyError, pygame.error) as error:
+                print(f"couldn't reload {path}: {error}")
+                continue
+            print(f"reloaded {path} ({what}) in {(time.perf_counter()-start)*1000:.1f} ms")
+            reloaded = True
+        return reloaded
+
+    def reloadLevelFile(self):
+        # reads this level's .txt file again and only changes what's different (see `reload`)
+        level = self.level_world
+        old = level.data
+        data = loadLevel(ARGDICT["levels"], self.level_type, TILE_WIDTH, TILE_HEIGHT)
+        # the spaces whose tile changed, and everything the old and new tiles there cover
+        areas = []
+        for row in range(max(old.height, data.height)):
+            for col in range(max(old.width, data.width)):
+                old_code = old.grid[row][col] if row < old.height and col < len(old.grid[row]) else '..'
+                new_code = data.grid[row][col] if row < data.height and col < len(data.grid[row]) else '..'
+                if old_code != new_code:
+                    areas.append(level.footprint(col, row, old_code).union(level.footprint(col, row, new_code)))
+        level.useData(data)
+        for area in areas:
+            level.repaint(area)
+        items_changed, mobs_changed = self.sim.changeLevel(data)
+        if items_changed:
+            self.item_sprites.empty()
+            self.items = [Item(loc, index) for index, loc in enumerate(self.sim.items)]
+            self.item_sprites.add(item for item in self.items if self.sim.item_alive[item.index])
+            for item in self.items:
+                item.hit = not self.sim.item_alive[item.index]
+        if mobs_changed:
+            self.mob_sprites.empty()
+            self.mobs = [Enemy(self.sim, index) for index in range(len(self.sim.mobs))]
+            self.mob_sprites.add(self.mobs)
+        # restarting should use the new layout. An old checkpoint may not have the same items and enemies any more
+        self.start = newSimulation(level).snapshot()
+        if items_changed or mobs_changed:
+            self.checkpoint = self.start
+        return f"{len(areas)} spaces repainted"
+
+    def follow(self, state, player_id):
+        """
+        Multiplayer: makes the level look like `state` (from netplay's `Client.interpolate`) instead of running
+        the simulation here. `player_id` is our own player; everyone else gets a sprite of their own.
+        Returns events like the simulation's: ('item', index) for each item somebody picked up, and ('mob',)
+        when our player starts dying.
+        """
+        events = []
+        seen = set()
+        for (kind, key), values in state.items():
+            if kind == netplay.PLAYER:
+                seen.add(key)
+                if key == player_id:
+                    sprite = self.player
+                elif key in self.others:
+                    sprite = self.others[key]
+                else:
+                    sprite = self.others[key] = Player(PlayerBody(values[:2], self.sim.player_size))
+                    self.main_sprites.add(sprite)
+                body = sprite.body
+                x, y, walk, flags, body.score = values
+                was_dying = body.dying
+                body.old_loc = (body.x, body.y)
+                body.x, body.y = x, y
+                body.walk_state = netplay.WALK_STATES[walk]
+                body.jumping = bool(flags & netplay.JUMPING)
+                body.falling = bool(flags & netplay.FALLING)
+                body.dying = bool(flags & netplay.DYING)
+                # the server brought a dead player back at the start of the level
+                if was_dying and not body.dying:
+                    sprite.reset()
+                    if not sprite.alive():
+                        self.main_sprites.add(sprite)
+                    if sprite is self.player and self.music is not None:
+                        sounds.stop(self.music)
+                        sounds.play(self.music)
+                elif body.dying and not was_dying and sprite is self.player:
+                    events.append(('mob',))
+            elif kind == netplay.MOB and key < len(self.sim.mobs):
+                x, y, flags = values
+                self.sim.mobs[key][:] = [x, y]
+                self.sim.mob_facing[key] = -1 if flags & netplay.FACING_LEFT else 1
+                self.sim.mob_falling[key] = bool(flags & netplay.MOB_FALLING)
+            elif kind == netplay.ITEM and key < len(self.items):
+                alive = bool(values[0])
+                if alive != self.sim.item_alive[key]:
+                    self.sim.item_alive[key] = alive
+                    self.items[key].hit = not alive
+                    if alive:
+                        # the level started over
+                        self.item_sprites.add(self.items[key])
+                    else:
+                        events.append(('item', key))
+        # players that left
+        for key in [key for key in self.others if key not in seen]:
+            self.others.pop(key).kill()
+        self.sim.still = state == self.shown
+        self.shown = state
+        return events
+
+    def leave(self, completed=True):
+        # stops the level's music and lets the cache forget the level's image once it needs the room.
+        #       `completed` is False if the game is closing in the middle of the level
+        sounds.stop(self.music)
+        textures.unpin(self.level_world.cache_key)
+        telemetry.log("level_end", int((time.perf_counter() - self.started) * 1000), self.sim.score(), self.deaths,
+                      int(completed), label=self.level_type)
+
+    def touching(self, kind, index, dx, dy):
+        # whether the player's current frame and item/enemy number `index`'s frame overlap, with the other
+        #       sprite (dx, dy) away from the player
+        other = self.items[index] if kind == 'item' else self.mobs[index]
+        return masks.overlap(self.player.image, (0, 0), other.image, (dx, dy))
 
 def main():
     pygame.init()
+    telemetry.start()
 
-    # initialize the mixer and load the sounds effects
-    pygame.mixer.init(buffer=64)
-    snowball_hit = pygame.mixer.Sound(ARGDICT["sounds"]+"/hit.ogg")
-    santa_death = pygame.mixer.Sound(ARGDICT["sounds"]+"/death.ogg")
-    santa_death.set_volume(0.1)
-    snowball_hit.set_volume(0.1)
+    # initialize the mixer and load the sounds effects. At most two pickup sounds play at once (a third cuts
+    #       off the oldest), and the death sound plays once all the way through, taking a channel from a pickup if it has to
+    sounds.load("hit", ARGDICT["sounds"]+"/hit.ogg", "sfx", priority=0, max_voices=2, volume=0.1)
+    sounds.load("death", ARGDICT["sounds"]+"/death.ogg", "sfx", priority=1, max_voices=1, volume=0.1, steal=False)
 
     # sets the window title using title found in command line instruction
     pygame.display.set_caption(WINDOW_TITLE)
 
-    # Set up the drawing window
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-
-    # for controlling frames per second
-    clock = pygame.time.Clock()
+    # Set up the drawing window. The game draws on `renderer.surface`, which is always WINDOW_WIDTH x WINDOW_HEIGHT
+    renderer = RenderScaler((WINDOW_WIDTH, WINDOW_HEIGHT), RENDER_SCALE, SMOOTH_SCALE, FULLSCREEN)
+
+    # load every animation frame and its collision mask
+    loadSpriteFrames()
+    if VERBOSE:
+        print(masks.report())
+
+    # for controlling frames per second. It skips drawing frames where nothing changed
+    #       (in development mode it still wakes up often enough to look for changed files)
+    frames = FrameScheduler(GAME_FPS, max_wait=POLL_INTERVAL if DEV_MODE else 1000)
+
+    # in development mode, watch every level, info, and tile file for changes
+    watcher = None
+    if DEV_MODE:
+        watcher = FileWatcher(interval=POLL_INTERVAL)
+        for folder in (ARGDICT["levels"], ARGDICT["map_images"]):
+            for name in sorted(os.listdir(folder)):
+                if name.endswith(('.txt', '.json', '.png')):
+                    watcher.watch(folder+'/'+name)
+
+    # in multiplayer, join the server and start on whatever level it's playing
+    client = None
+    if CONNECT:
+        host, port = CONNECT.rsplit(':', 1)
+        client = netplay.Client((host, int(port)))
+        waited = 0
+        while client.player_id is None or client.level is None:
+            if waited >= JOIN_TIMEOUT:
+                print(f"no answer from the server at {CONNECT}")
+                pygame.quit()
+                return
+            client.join()
+            # snapshots only come once the server hears our keys
+            if client.player_id is not None:
+                client.sendInput(0)
+            pygame.time.wait(100)
+            waited += 100
+            client.poll()
 
     # the level the player is in currently
-    current_level = LevelInfoHolder("6")
+    current_level = LevelInfoHolder(client.level if client else "6")
+
+    # true when a new level was just loaded, so its first frame gets drawn
+    new_level = True
 
     # Run until the user asks to quit game loop
     running = True
     while running:
-        # sets frames per second to what's found in commandline instruction
-        clock.tick(GAME_FPS)
+        # sets frames per second to what's found in commandline instruction (if the last frame changed nothing,
+        #       this waits for input or the player's next animation frame instead). `elapsed` is in milliseconds
+        until_next = current_level.player.untilNextFrame()
+        # in multiplayer, a new snapshot could arrive every server tick
+        if client is not None:
+            until_next = min(until_next or math.inf, 1000 / client.tick_rate)
+        elapsed = frames.tick(until_next)
+        sounds.tick()
 
-        # grab the nearest floor the player could stand on. If no floor is below, return the window height
-        current_floor = current_level.level_world.getFloor((current_level.player.rect.bottomleft,current_level.player.rect.bottomright))
-        # convert the floor from number of tiles to pixels
-        floor_y = current_floor*TILE_HEIGHT
         # Did the user click the window close button?
+        had_events = False
         for event in pygame.event.get():
+            had_events = True
             if event.type == pygame.QUIT:
                 running = False
+            # in development mode, left clicking places a block of terrain and right clicking removes it
+            if DEV_MODE and event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+                # (clicks on the black bars around the game in fullscreen don't land on any tile)
+                position = renderer.toInternal(event.pos)
+                if position is not None:
+                    col, row = position[0] // TILE_WIDTH, position[1] // TILE_HEIGHT
+                    if 0 <= row < len(current_level.level_world.level) and 0 <= col < len(current_level.level_world.level[row]):
+                        current_level.level_world.setTile(col, row, EDIT_TILE if event.button == 1 else '..', current_level.sim)
+            # F5 saves a checkpoint and F9 goes back to it (not in multiplayer, where the server runs the level)
+            if client is None and event.type == pygame.KEYDOWN and event.key == pygame.K_F5 and not current_level.sim.player.dying:
+                current_level.checkpoint = current_level.sim.snapshot()
+            if client is None and event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                current_level.restore(current_level.checkpoint)
+            # change how big the game is stretched (the whole frame is drawn again since there was an event)
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                renderer.setScale(renderer.scale + 1)
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                renderer.setScale(renderer.scale - 1)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F10:
+                renderer.toggleSmooth()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+                renderer.toggleFullscreen()
+        # development mode: reload any level files that were just saved
+        if watcher is not None:
+            changed_files = watcher.poll()
+            if changed_files and current_level.reload(changed_files):
+                new_level = True
+
         key_depressed = pygame.key.get_pressed()
-        # set the state to move the player right
+        # turn the keys being held down into inputs for the simulation
+        inputs = 0
+        # move the player right
         if key_depressed[pygame.K_d]:
-            current_level.player.state = 'r'
-        # set the state to move the player left
+            inputs |= RIGHT
+        # move the player left
         if key_depressed[pygame.K_a]:
-            current_level.player.state = 'l'
-        # set the state to make player jump
+            inputs |= LEFT
+        # make the player jump
         if key_depressed[pygame.K_SPACE]:
-            current_level.player.jumping = True
-        # actually move the player
-        current_level.player.Move(floor_y)
-
-        # loop through all item and mob sprites and check for collisions between items/mob and the player
-        for item in current_level.item_sprites:
+            inputs |= JUMP
+        # actually move the player and check for collisions between the player and the items/mobs
+        if client is None:
+            sim_events = current_level.sim.step(inputs)
+        # in multiplayer, send the keys to the server and show what it says is happening
+        else:
+            sim_events = []
+            client.sendInput(inputs)
+            client.poll()
+            if client.level != current_level.level_type:
+                current_level.leave()
+                current_level = LevelInfoHolder(client.level)
+                new_level = True
+            state = client.interpolate(elapsed)
+            if state is not None:
+                sim_events = current_level.follow(state, client.player_id)
+        for sim_event in sim_events:
             # if the player hits an item
-            if item.rect.colliderect(current_level.player.rect):
+            if sim_event[0] == 'item':
                 # play the sound
-                snowball_hit.play()
-                item.hit = True
-                current_level.player.score += 1
-        for mob in current_level.mob_sprites:
-            if mob.rect.colliderect(current_level.player.rect):
-                current_level.background_music.stop()
-                santa_death.play()
-                current_level.player.dying = True
+                sounds.play("hit")
+                current_level.items[sim_event[1]].hit = True
+                telemetry.log("item", sim_event[1], current_level.sim.score(), label=current_level.level_type)
+            # if the player hits a mob
+            elif sim_event[0] == 'mob':
+                sounds.stop(current_level.music)
+                sounds.play("death")
+                current_level.deaths += 1
+                body = current_level.player.body
+                telemetry.log("death", int(body.x), int(body.y), current_level.sim.score(), label=current_level.level_type)
 
         # loop through all sprites in all groups and apply the camera offset to them
-        for sprite in current_level.main_sprites:
-            sprite.update()
+        if current_level.player.alive():
+            current_level.player.update(elapsed)
+        for other in current_level.others.values():
+            if other.alive():
+                other.update(elapsed)
         for sprite in current_level.item_sprites:
             sprite.update()
-
-        # # draw the sprites to the screen
-        current_level.main_sprites.draw(screen)
-        current_level.item_sprites.draw(screen)
-        current_level.mob_sprites.draw(screen)
-        
-        # show screen
-        pygame.display.flip()
+        current_level.mob_sprites.update()
+
+        # only draw if something changed: input, movement, an item picked up, or a new animation frame
+        changed = (new_level or had_events or inputs or not current_level.sim.still or current_level.player.changed
+                   or any(other.changed for other in current_level.others.values()))
+        new_level = False
+        if frames.endTick(changed):
+            # # draw the sprites to the screen
+            screen = renderer.surface
+            current_level.main_sprites.draw(screen)
+            current_level.item_sprites.draw(screen)
+            current_level.mob_sprites.draw(screen)
+
+            # show screen (stretched to the window)
+            renderer.present()
+            frames.frameShown()
+
+        # in multiplayer the server decides when the player comes back and when the level changes
+        if client is not None:
+            continue
+
+        # once the player's death animation is over, restart the level
+        if not current_level.player.alive():
+            current_level.restore(current_level.start)
+            new_level = True
 
         # if the gamer has gotten enough canes, move them to the next level
-        if current_level.player.score >= current_level.level_world.score_needed:
-            current_level.background_music.stop()
+        if current_level.sim.complete:
+            current_level.leave()
             current_level = LevelInfoHolder(current_level.next_level)
+            new_level = True
 
         if current_level.temporal:
+            current_level.leave()
             current_level = LevelInfoHolder(current_level.next_level)
+            new_level = True
             pygame.time.wait(2000)
     # Done! Time to quit.
+    current_level.leave(completed=False)
+    telemetry.close()
+    if client is not None:
+        client.leave()
+    if VERBOSE:
+        if client is not None:
+            print(f"received {client.snapshots} snapshots, {client.bytes_received} bytes")
+        print(frames.report())
+        print(sounds.report())
+        print(textures.report())
+        print(telemetry.report())
     pygame.quit()
 
 if __name__=='__main__':
@@ -0,0 +1,56 @@
+"""
+Pixel-accurate collisions without building masks during the game.
+
+Rectangles are cheap to test but count the transparent corners of a sprite as part of it, so a snowball
+that only clips the empty space around a snowman still hits it. A `pygame.mask.Mask` marks which pixels
+of an image are actually solid. Making one is slow, so the MaskCache makes a mask for every animation
+frame once, when the frames are loaded, and `collide()` only compares masks when the rectangles overlap.
+"""
+import pygame
+
+class MaskCache():
+    """
+    Masks for images, keyed by the image (Surface) itself.
+    Add every frame with `add(frames)` when it's loaded. `get(image)` still works for an image that was
+    never added (it makes and keeps its mask), but that's the slow path the cache is there to avoid.
+    """
+    def __init__(self):
+        self.masks = {}
+        # how many masks had to be made during the game because their image wasn't added ahead of time
+        self.misses = 0
+
+    def add(self, frames):
+        for image in frames:
+            if image not in self.masks:
+                self.masks[image] = pygame.mask.from_surface(image)
+
+    def get(self, image):
+        mask = self.masks.get(image)
+        if mask is None:
+            self.misses += 1
+            mask = self.masks[image] = pygame.mask.from_surface(image)
+        return mask
+
+    def overlap(self, image_a, position_a, image_b, position_b):
+        """
+        True if any solid pixel of `image_a` drawn at `position_a` lands on a solid pixel of `image_b` drawn at `position_b`
+        """
+        offset = (int(position_b[0] - position_a[0]), int(position_b[1] - position_a[1]))
+        return self.get(image_a).overlap(self.get(image_b), offset) is not None
+
+    def collide(self, sprite_a, sprite_b):
+        """
+        True if two sprites touch. The rectangle test runs first and the masks are only compared if the rectangles overlap
+        """
+        if not sprite_a.rect.colliderect(sprite_b.rect):
+            return False
+        return self.overlap(sprite_a.image, sprite_a.rect.topleft, sprite_b.image, sprite_b.rect.topleft)
+
+    def memory(self):
+        """
+        Returns about how many bytes the masks take up (one bit per pixel)
+        """
+        return sum((mask.get_size()[0] * mask.get_size()[1] + 7) // 8 for mask in self.masks.values())
+
+    def report(self):
+        return f"{len(self.masks)} collision masks, {self.memory()/1024:.1f} KiB ({self.misses} made during play)"
@@ -0,0 +1,430 @@
+# python netplay.py port=5000 level=1 tick_rate=30 levels="./resources/levels" tile_width=32 tile_height=32 player_images="./resources/player" mob_images="./resources/mob" item_images="./resources/item"
+"""
+Multiplayer over UDP
+
+Description:
+
+    One server runs the only real copy of the game (a Simulation with one player per client). Clients
+    never move anything themselves: they send the keys they're holding down, and draw whatever the server
+    says is happening.
+
+    Every tick the server sends each client a snapshot of the players, enemies, and items. A snapshot only
+    holds what changed since the last one that client said it received (its baseline), so a level where
+    most things are standing still costs a few bytes a tick. If a packet gets lost, the client never
+    acknowledges it, and the next snapshot is built against an older baseline the client does have.
+
+    Snapshots arrive `tick_rate` times a second, which is slower than the screen is drawn, so clients
+    show the world slightly in the past and slide everything smoothly between the two snapshots on either side.
+
+    Run this file to start a server, then connect to it with `python main.py ... connect=127.0.0.1:5000`.
+"""
+import sys
+import time
+import socket
+import struct
+
+# helper function that processes commandline arguments into key-value pairs or a list of arguments
+from helper_module import mykwargs
+
+from simulation import loadLevel, loadLevelInfo, Simulation, PlayerBody, overlaps
+
+# message types (the first byte of every packet)
+HELLO = 1      # client -> server: let me join
+INPUT = 2      # client -> server: keys held down, and the newest snapshot received
+BYE = 3        # client -> server: I'm leaving
+WELCOME = 4    # server -> client: your player id, and how many ticks a second to expect
+SNAPSHOT = 5   # server -> client: what changed since your baseline
+
+# packet layouts (little endian). Level names are sent as up to 8 bytes
+TYPE = struct.Struct('<B')
+INPUT_MESSAGE = struct.Struct('<BIBI')               # type, input number, keys, tick of the newest snapshot received
+WELCOME_MESSAGE = struct.Struct('<BHH')              # type, player id, tick rate
+SNAPSHOT_HEADER = struct.Struct('<BII8sBHH')         # type, tick, baseline tick (0 = none), level, start, records changed, records removed
+# a record is one thing in the world: a kind byte, its id, then its values
+RECORD_HEADER = struct.Struct('<BH')
+RECORDS = {
+    ord('P'): struct.Struct('<iiBBH'),               # player: x, y, walking state, flags, score
+    ord('M'): struct.Struct('<iiB'),                 # enemy: x, y, flags
+    ord('I'): struct.Struct('<B'),                   # item: still waiting to be picked up
+}
+PLAYER, MOB, ITEM = ord('P'), ord('M'), ord('I')
+# the shortest packet of each type. Anything shorter (or of a type nobody sends) is dropped
+MESSAGE_SIZES = {HELLO: TYPE.size, INPUT: INPUT_MESSAGE.size, BYE: TYPE.size,
+                 WELCOME: WELCOME_MESSAGE.size, SNAPSHOT: SNAPSHOT_HEADER.size}
+
+# a player's walking state as a number, and back
+WALK_STATES = ('i', 'l', 'r')
+# player flags
+JUMPING, FALLING, DYING = 1, 2, 4
+# enemy flags
+FACING_LEFT, MOB_FALLING = 1, 2
+
+# how many past snapshots are kept to build deltas against (a client that's further behind gets everything)
+HISTORY = 64
+# how many ticks a player lies dead before coming back at the start of the level (once no enemy is standing there,
+#       or when everybody is dead and the level starts over)
+RESPAWN_TICKS = 60
+# how long (seconds) a client can go without sending anything before it's dropped
+TIMEOUT = 5.0
+# the biggest UDP packet
+MAX_PACKET = 65507
+
+def worldState(sim, players):
+    """
+    Returns everything clients need to draw `sim`, as a dict of (kind, id) -> tuple of values.
+    `players` maps each player id to its PlayerBody (including dead players, who aren't in the simulation).
+    """
+    state = {}
+    for player_id, body in players.items():
+        flags = (JUMPING if body.jumping else 0) | (FALLING if body.falling else 0) | (DYING if body.dying else 0)
+        state[(PLAYER, player_id)] = (int(body.x), int(body.y), WALK_STATES.index(body.walk_state), flags, body.score)
+    for index, (mx, my) in enumerate(sim.mobs):
+        flags = (FACING_LEFT if sim.mob_facing[index] < 0 else 0) | (MOB_FALLING if sim.mob_falling[index] else 0)
+        state[(MOB, index)] = (int(mx), int(my), flags)
+    for index, alive in enumerate(sim.item_alive):
+        state[(ITEM, index)] = (int(alive),)
+    return state
+
+def encodeSnapshot(tick, level, state, baseline_tick=0, baseline=None, start=0):
+    """
+    Packs the records of `state` that are different from `baseline` (everything if there's no baseline),
+    plus the ids of the ones that are gone, into one packet. `start` counts the levels the server has started
+    (mod 256), so clients can tell a level that started over from the same level going on.
+    """
+    baseline = baseline or {}
+    changed = [key for key, values in state.items() if baseline.get(key) != values]
+    removed = [key for key in baseline if key not in state]
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT, tick, baseline_tick, level.encode(), start % 256, len(changed), len(removed))]
+    for kind, key in changed:
+        parts.append(RECORD_HEADER.pack(kind, key))
+        parts.append(RECORDS[kind].pack(*state[(kind, key)]))
+    for kind, key in removed:
+        parts.append(RECORD_HEADER.pack(kind, key))
+    return b''.join(parts)
+
+def messageKind(packet):
+    # the type of a packet, or None if it's empty, of an unknown type, or too short for its type
+    if not packet or len(packet) < MESSAGE_SIZES.get(packet[0], len(packet)+1):
+        return None
+    return packet[0]
+
+def decodeSnapshot(packet, baselines):
+    """
+    Unpacks a snapshot. `baselines` is a dict of tick -> state the client already has.
+    Returns (tick, level, start, state), or None if its baseline is one the client doesn't have (anymore),
+    or if the packet is cut short or garbled.
+    """
+    _, tick, baseline_tick, level, start, changed, removed = SNAPSHOT_HEADER.unpack_from(packet)
+    if baseline_tick and baseline_tick not in baselines:
+        return None
+    state = dict(baselines[baseline_tick]) if baseline_tick else {}
+    offset = SNAPSHOT_HEADER.size
+    try:
+        for _ in range(changed):
+            kind, key = RECORD_HEADER.unpack_from(packet, offset)
+            offset += RECORD_HEADER.size
+            state[(kind, key)] = RECORDS[kind].unpack_from(packet, offset)
+            offset += RECORDS[kind].size
+        for _ in range(removed):
+            kind, key = RECORD_HEADER.unpack_from(packet, offset)
+            offset += RECORD_HEADER.size
+            state.pop((kind, key), None)
+        level = level.rstrip(b'\0').decode()
+    # fewer bytes than the header says there are records, a kind of record that doesn't exist, or a level name that isn't text
+    except (struct.error, KeyError, UnicodeDecodeError):
+        return None
+    return tick, level, start, state
+
+def imageSize(path):
+    # PIL only reads the file header here, not the whole image. It's imported here, so main.py (which imports this
+    #       file for the Client) doesn't need Pillow installed
+    from PIL import Image
+    with Image.open(path) as image:
+        return image.size
+
+class Remote():
+    """
+    What the server knows about one connected client
+    """
+    def __init__(self, player_id, address, body):
+        self.player_id = player_id
+        self.address = address
+        self.body = body
+        # keys held down, and the number of the newest INPUT message (older ones that arrive late are ignored)
+        self.keys = 0
+        self.sequence = 0
+        # the newest snapshot tick the client received (0 = none yet)
+        self.acked = 0
+        self.heard = time.perf_counter()
+        self.dead_ticks = 0
+        self.bytes_sent = 0
+
+class Server():
+    """
+    Runs a level for every client connected to (host, port). `settings` has the same entries as level_farm.py's
+    (levels, tile sizes, sprite sizes, mob_speed). Call `tick()` `tick_rate` times a second, or `run()` to do that forever.
+    """
+    def __init__(self, settings, level, host='127.0.0.1', port=0, tick_rate=30):
+        self.settings = settings
+        self.level_info = loadLevelInfo(settings["levels"])
+        self.first_level = level
+        self.tick_rate = tick_rate
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        # address -> Remote
+        self.remotes = {}
+        self.next_id = 1
+        self.tick_number = 0
+        # tick -> state, for the last HISTORY ticks
+        self.history = {}
+        # how many times a level has been started (including the same one starting over)
+        self.starts = 0
+        self.startLevel(level)
+
+    def startLevel(self, level):
+        # splash screens are skipped. Everyone starts the new level at its start, keeping their player id
+        while self.level_info[level]["stipulations"]["life"]:
+            level = self.level_info[level]["next_level"]
+        self.level = level
+        self.starts += 1
+        settings = self.settings
+        objectives = self.level_info[level]["objectives"]
+        self.sim = Simulation(loadLevel(settings["levels"], level, settings["tile_width"], settings["tile_height"]),
+                              objectives["points"], settings["player_size"], settings["item_size"], settings["mob_size"],
+                              objectives["enemies"], settings["mob_speed"])
+        # nobody plays the simulation's own first player; every client gets one of their own
+        self.sim.removePlayer(self.sim.player)
+        for remote in self.remotes.values():
+            remote.body = self.sim.addPlayer()
+            remote.acked = 0
+            remote.dead_ticks = 0
+        # old snapshots are of a different level, so nobody can build on them
+        self.history = {}
+
+    def spawnClear(self):
+        # whether a player could come back at the start of the level without landing on an enemy
+        x, y = self.sim.level.player_pos
+        width, height = self.settings["player_size"]
+        mob_width, mob_height = self.sim.mob_size
+        return not any(overlaps(mx, my, mob_width, mob_height, x, y, width, height)
+                       for mx, my in (self.sim.mobs[index] for index in self.sim.mob_buckets.query(x, y, width, height)))
+
+    def send(self, remote, packet):
+        self.socket.sendto(packet, remote.address)
+        remote.bytes_sent += len(packet)
+
+    def poll(self):
+        """
+        Reads every packet waiting on the socket
+        """
+        now = time.perf_counter()
+        while True:
+            try:
+                packet, address = self.socket.recvfrom(MAX_PACKET)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            # anybody can send anything to the server's port, so a broken packet is dropped before it's read
+            kind = messageKind(packet)
+            if kind is None:
+                continue
+            remote = self.remotes.get(address)
+            if kind == HELLO:
+                if remote is None:
+                    remote = Remote(self.next_id, address, self.sim.addPlayer())
+                    self.next_id += 1
+                    self.remotes[address] = remote
+                # (a client that didn't get its WELCOME asks again)
+                self.send(remote, WELCOME_MESSAGE.pack(WELCOME, remote.player_id, self.tick_rate))
+            elif remote is None:
+                continue
+            elif kind == INPUT:
+                _, sequence, keys, acked = INPUT_MESSAGE.unpack_from(packet)
+                if sequence > remote.sequence:
+                    remote.sequence = sequence
+                    remote.keys = keys
+                remote.acked = max(remote.acked, acked)
+            elif kind == BYE:
+                self.disconnect(remote)
+                continue
+            remote.heard = now
+
+    def disconnect(self, remote):
+        del self.remotes[remote.address]
+        if remote.body in self.sim.players:
+            self.sim.removePlayer(remote.body)
+
+    def tick(self):
+        """
+        Reads the clients' keys, steps the level once, and sends every client its snapshot
+        """
+        self.poll()
+        now = time.perf_counter()
+        for remote in [remote for remote in self.remotes.values() if now - remote.heard > TIMEOUT]:
+            self.disconnect(remote)
+        keys = {remote.body: remote.keys for remote in self.remotes.values()}
+        self.sim.step([keys.get(body, 0) for body in self.sim.players])
+        # a player that dies leaves the simulation (so enemies stop chasing them), and comes back at the start
+        #       of the level after a while, keeping their score
+        for remote in self.remotes.values():
+            if not remote.body.dying:
+                continue
+            if remote.body in self.sim.players:
+                self.sim.removePlayer(remote.body)
+            remote.dead_ticks += 1
+            if remote.dead_ticks >= RESPAWN_TICKS and self.spawnClear():
+                score = remote.body.score
+                vars(remote.body).update(vars(PlayerBody(self.sim.level.player_pos, self.settings["player_size"])))
+                remote.body.score = score
+                remote.dead_ticks = 0
+                self.sim.addPlayer(remote.body)
+        # once everybody is dead, nobody is left to clear the way, so the level starts over (like it does for one player)
+        if self.remotes and all(remote.dead_ticks >= RESPAWN_TICKS for remote in self.remotes.values()):
+            self.startLevel(self.level)
+        elif self.sim.complete:
+            self.startLevel(self.level_info[self.level]["next_level"] or self.first_level)
+
+        self.tick_number += 1
+        state = worldState(self.sim, {remote.player_id: remote.body for remote in self.remotes.values()})
+        self.history[self.tick_number] = state
+        self.history.pop(self.tick_number - HISTORY, None)
+        for remote in self.remotes.values():
+            baseline = self.history.get(remote.acked)
+            baseline_tick = remote.acked if baseline is not None else 0
+            self.send(remote, encodeSnapshot(self.tick_number, self.level, state, baseline_tick, baseline, self.starts))
+
+    def run(self):
+        # ticks forever at `tick_rate`
+        tick_time = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+        while True:
+            self.tick()
+            next_tick += tick_time
+            time.sleep(max(0, next_tick - time.perf_counter()))
+
+class Client():
+    """
+    A connection to a Server at `address` (host, port). Call `join()` once, then every frame `sendInput(keys)`,
+    `poll()`, and `interpolate(milliseconds)` for the state to draw.
+        player_id   - this client's player, once the server welcomed it (None before that)
+        level       - the level the server is playing (None until the first snapshot)
+        start       - changes every time the server starts a level, even the same one over again
+    `interpolation_delay` is how many ticks behind the newest snapshot the world is shown.
+    """
+    def __init__(self, address, interpolation_delay=2):
+        self.address = address
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect(address)
+        self.socket.setblocking(False)
+        self.interpolation_delay = interpolation_delay
+        self.player_id = None
+        self.tick_rate = None
+        self.level = None
+        self.start = None
+        self.sequence = 0
+        # tick -> state of the snapshots received, the newest tick, and the tick being shown right now
+        self.states = {}
+        self.latest = 0
+        self.render_tick = None
+        self.bytes_received = 0
+        self.snapshots = 0
+
+    def join(self):
+        # asks to join (call it again if no WELCOME arrives; the server answers every HELLO)
+        self.socket.send(TYPE.pack(HELLO))
+
+    def leave(self):
+        self.socket.send(TYPE.pack(BYE))
+
+    def sendInput(self, keys):
+        self.sequence += 1
+        self.socket.send(INPUT_MESSAGE.pack(INPUT, self.sequence, keys, self.latest))
+
+    def poll(self):
+        """
+        Reads every packet waiting on the socket. Returns True if a new snapshot arrived.
+        """
+        new = False
+        while True:
+            try:
+                packet = self.socket.recv(MAX_PACKET)
+            except (BlockingIOError, ConnectionRefusedError, ConnectionResetError):
+                break
+            self.bytes_received += len(packet)
+            kind = messageKind(packet)
+            if kind == WELCOME:
+                _, self.player_id, self.tick_rate = WELCOME_MESSAGE.unpack_from(packet)
+            elif kind == SNAPSHOT:
+                decoded = decodeSnapshot(packet, self.states)
+                # an old packet that arrived late, or one built on a baseline that's already been thrown away
+                if decoded is None or decoded[0] <= self.latest:
+                    continue
+                tick, level, start, state = decoded
+                if level != self.level or start != self.start:
+                    # a new level (or the same one starting over): nothing from before is worth sliding between
+                    self.level = level
+                    self.start = start
+                    self.states = {}
+                    self.render_tick = None
+                self.states[tick] = state
+                # the server never builds on a snapshot this old
+                for old in [old for old in self.states if old <= tick - HISTORY]:
+                    del self.states[old]
+                self.latest = tick
+                self.snapshots += 1
+                new = True
+        return new
+
+    def interpolate(self, milliseconds):
+        """
+        Moves the shown time `milliseconds` forward and returns the state to draw: the same kind of dict as
+        `worldState`, with player and enemy positions slid between the two snapshots around the shown tick
+        (as floats). Everything else comes from the older of the two. Returns None before the first snapshot.
+        """
+        if not self.states:
+            return None
+        target = self.latest - self.interpolation_delay
+        if self.render_tick is None:
+            self.render_tick = target
+        else:
+            self.render_tick += milliseconds * self.tick_rate / 1000
+            # don't drift too far from the snapshots that are actually here
+            self.render_tick = min(max(self.render_tick, target - self.interpolation_delay), self.latest)
+        ticks = sorted(self.states)
+        before = max((tick for tick in ticks if tick <= self.render_tick), default=ticks[0])
+        after = min((tick for tick in ticks if tick > self.render_tick), default=before)
+        older, newer = self.states[before], self.states[after]
+        if after == before:
+            return dict(older)
+        blend = (self.render_tick - before) / (after - before)
+        state = {}
+        for key, values in older.items():
+            other = newer.get(key)
+            if other is not None and key[0] in (PLAYER, MOB):
+                values = (values[0] + (other[0] - values[0]) * blend, values[1] + (other[1] - values[1]) * blend) + values[2:]
+            state[key] = values
+        return state
+
+def main():
+    _, kargs = mykwargs(sys.argv)
+    settings = {
+        "levels": kargs.get("levels", "./resources/levels"),
+        "tile_width": int(kargs.get("tile_width", 32)),
+        "tile_height": int(kargs.get("tile_height", 32)),
+        "mob_speed": int(kargs.get("mob_speed", 2)),
+        # the collision rectangles are the size of the first frame of each sprite, like in main.py
+        "player_size": imageSize(kargs.get("player_images", "./resources/player")+"/idle/1.png"),
+        "mob_size": imageSize(kargs.get("mob_images", "./resources/mob")+"/idle/1.png"),
+        "item_size": imageSize(kargs.get("item_images", "./resources/item")+"/1.png"),
+    }
+    server = Server(settings, kargs.get("level", "1"), kargs.get("host", "127.0.0.1"), int(kargs.get("port", 5000)),
+                    int(kargs.get("tick_rate", 30)))
+    print(f"serving level {server.level} on {server.address[0]}:{server.address[1]} at {server.tick_rate} ticks/sec")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Drawing the game at one fixed size, whatever the size of the window.
+
+Everything in a frame (the level image, the player, the items, the enemies) is painted at the window's
+size, so a window twice as wide and twice as tall paints four times as many pixels every frame. The
+RenderScaler gives the game a Surface of a fixed size (the level's own 800x512, say) to draw on, and once
+per frame stretches it to the window in one call: `pygame.transform.scale` (blocky, exact at whole-number
+scales) or `pygame.transform.smoothscale` (blended). Drawing then costs the same at any window size, and only
+that one stretch grows with it. When the window is the same size as the game, the game draws straight on it.
+"""
+import pygame
+
+class RenderScaler():
+    """
+    The game draws on `surface` (always `internal_size`) and calls `present()` to show it.
+        scale       - how many window pixels each game pixel takes up (the window is internal_size * scale)
+        smooth      - blend pixels when stretching instead of repeating them
+        fullscreen  - fill the screen, stretching the game as much as it fits without changing its shape
+                      (the rest of the screen is black)
+    `setScale`, `toggleSmooth`, and `toggleFullscreen` change these while the game runs (the window is
+    opened again, so the next frame has to be drawn in full). `toInternal(position)` turns a mouse position
+    in the window into one in the game (None if it is on the black bars around the game).
+    """
+    def __init__(self, internal_size, scale=1, smooth=False, fullscreen=False):
+        self.internal_size = internal_size
+        self.scale = scale
+        self.smooth = smooth
+        self.fullscreen = fullscreen
+        # the window, the part of it the game is stretched onto (as a Rect and as a Surface that shares the window's pixels),
+        #       and the Surface the game draws on
+        self.display = None
+        self.target = None
+        self.stretched = None
+        self.surface = None
+        # the biggest window that fits on the screen (known once pygame starts)
+        info = pygame.display.Info()
+        self.screen_size = (info.current_w, info.current_h)
+        self.resize()
+
+    def resize(self):
+        # (re)opens the window for the current settings
+        width, height = self.internal_size
+        if self.fullscreen:
+            self.display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            screen_width, screen_height = self.display.get_size()
+            fit = min(screen_width / width, screen_height / height)
+            # blocky stretching only looks right at a whole-number scale
+            if not self.smooth and fit >= 1:
+                fit = int(fit)
+        else:
+            fit = self.scale
+            self.display = pygame.display.set_mode((round(width*fit), round(height*fit)))
+        size = (round(width*fit), round(height*fit))
+        self.target = pygame.Rect((0, 0), size)
+        self.target.center = self.display.get_rect().center
+        self.display.fill((0, 0, 0))
+        self.stretched = self.display.subsurface(self.target)
+        if size == self.display.get_size() and size == tuple(self.internal_size):
+            # nothing to stretch: the game draws on the window itself
+            self.surface = self.display
+        else:
+            self.surface = pygame.Surface(self.internal_size).convert()
+
+    def maxScale(self):
+        # the biggest whole-number scale whose window still fits on the screen
+        width, height = self.internal_size
+        return max(1, min(self.screen_size[0] // width, self.screen_size[1] // height))
+
+    def setScale(self, scale):
+        self.scale = max(1, min(scale, self.maxScale()))
+        self.fullscreen = False
+        self.resize()
+
+    def toggleSmooth(self):
+        self.smooth = not self.smooth
+        self.resize()
+
+    def toggleFullscreen(self):
+        self.fullscreen = not self.fullscreen
+        self.resize()
+
+    def present(self):
+        """
+        Stretches what the game drew onto the window, and shows it
+        """
+        if self.surface is not self.display:
+            # stretching straight into the window saves making a new Surface every frame
+            if self.smooth:
+                pygame.transform.smoothscale(self.surface, self.target.size, self.stretched)
+            else:
+                pygame.transform.scale(self.surface, self.target.size, self.stretched)
+        pygame.display.flip()
+
+    def toInternal(self, position):
+        # where a point in the window (like a mouse click) is in the game, or None if it's in the black bars around it
+        if not self.target.collidepoint(position):
+            return None
+        x = (position[0] - self.target.left) * self.internal_size[0] / self.target.width
+        y = (position[1] - self.target.top) * self.internal_size[1] / self.target.height
+        return int(x), int(y)
@@ -0,0 +1,652 @@
+"""
+The Sleigher game rules, without any graphics.
+
+Everything here is plain Python data (no pygame, no images). `main.py` steps a Simulation once per
+frame and only draws what it says is happening, and tools like `level_farm.py` step it with no window
+at all, tens of thousands of times a second. The rules:
+the player walks 4 pixels a tick, jumps by `vertical_speed` squared pixels a tick (tapering off),
+falls `gravity` pixels a tick onto the nearest floor under their feet, picks up items by touching
+them, and starts dying when they touch an enemy. Enemies walk along the floors (and drop off ledges)
+toward the player, following a flow field that is searched again only when the player reaches a new tile.
+
+Inputs are a bitmask of LEFT, RIGHT, and JUMP for the keys held down that tick.
+"""
+import re
+import json
+import math
+from sys import intern
+
+# one shared search that tells every enemy which way to walk to reach the player
+from flow_field import FlowField, UNREACHABLE
+
+# two-character codes used in the level .txt files
+EMPTY = '..'
+ITEM = '14'
+ENEMY = '00'
+PLAYER = '--'
+# runs of characters in a level line that could be something other than empty space
+NOT_EMPTY = re.compile(r'[^.]+')
+
+# inputs that can be held down during a tick. Combine them with | (e.g. RIGHT | JUMP)
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+
+class LevelData():
+    """
+    The parsed contents of a level .txt file
+        grid        - 2D list of the two-character codes, with items/enemies/player replaced by '..'
+        terrain     - (col, row) -> code of every terrain tile
+        item_locs   - top left pixel of every item
+        enemy_locs  - top left pixel of every enemy (they stand one tile above where they're written)
+        player_pos  - top left pixel of the player (also one tile above where it's written)
+    """
+    def __init__(self, text, tile_width, tile_height):
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.grid = []
+        self.terrain = {}
+        self.item_locs = []
+        self.enemy_locs = []
+        self.player_pos = (0, 0)
+        for row, line in enumerate(text.split("\n")):
+            # every two characters is one space. Levels are mostly empty space, so the codes are interned
+            #       (all the '..'s are one string instead of one each) and only the runs of characters with no
+            #       '.' in them are looked at closely, since only those can be terrain, items, enemies, or the player
+            sub = [intern(line[col:col+2]) for col in range(0, len(line)-1, 2)]
+            for run in NOT_EMPTY.finditer(line, 0, len(sub)*2):
+                # the spaces that start inside the run and end before it does
+                for col in range((run.start()+1)//2, run.end()//2):
+                    section = sub[col]
+                    if section == ITEM:
+                        sub[col] = EMPTY
+                        self.item_locs.append((col*tile_width, row*tile_height))
+                    elif section == ENEMY:
+                        sub[col] = EMPTY
+                        self.enemy_locs.append((col*tile_width, row*tile_height-tile_height))
+                    elif section == PLAYER:
+                        sub[col] = EMPTY
+                        self.player_pos = (col*tile_width, row*tile_height-tile_height)
+                    else:
+                        self.terrain[(col, row)] = section
+            self.grid.append(sub)
+        self.height = len(self.grid)
+        self.width = max((len(sub) for sub in self.grid), default=0)
+        # the moves enemies can make between tiles. The terrain never changes, so this is only worked out once
+        self.mob_edges = None
+
+    def isSolid(self, col, row):
+        # anything that isn't empty space (and isn't outside the level) is terrain
+        return 0 <= row < self.height and col < len(self.grid[row]) and '.' not in self.grid[row][col]
+
+    def isStandable(self, col, row):
+        # an empty tile with terrain (or the bottom of the level) right under it
+        return (0 <= col < self.width and 0 <= row < self.height and not self.isSolid(col, row)
+                and (row+1 == self.height or self.isSolid(col, row+1)))
+
+    def landingRow(self, col, row):
+        """
+        Returns the first row at or below `row` that something falling down column `col` would stand in
+        (None if the column is outside the level or `row` is inside terrain)
+        """
+        if not 0 <= col < self.width:
+            return None
+        # the same checks as isSolid/isStandable, written out since this runs for every floor when a level loads
+        grid = self.grid
+        height = self.height
+        while 0 <= row < height:
+            line = grid[row]
+            if col < len(line) and '.' not in line[col]:
+                return None
+            if row+1 == height:
+                return row
+            below = grid[row+1]
+            if col < len(below) and '.' not in below[col]:
+                return row
+            row += 1
+        return None
+
+    def mobEdges(self):
+        """
+        Returns the moves enemies can make, as edges for a FlowField: from a tile they stand on, they can walk
+        left or right onto the next tile if it's empty, falling down to wherever they land. They can't jump or climb.
+        It's a dict of cell -> list of cells, with only the cells that have moves in it.
+        """
+        if self.mob_edges is None:
+            # enemies can only stand right on top of terrain or on the bottom row, so only those tiles are checked
+            #       (in order of their cell numbers, so the paths come out the same every time)
+            spots = {(row-1, col) for col, row in self.terrain if row > 0}
+            spots.update((self.height-1, col) for col in range(self.width))
+            self.mob_edges = {}
+            for row, col in sorted(spots):
+                edges = self.cellEdges(col, row)
+                if edges:
+                    self.mob_edges[row*self.width + col] = edges
+        return self.mob_edges
+
+    def cellEdges(self, col, row):
+        # the tiles an enemy standing at (col, row) can move to (see `mobEdges`)
+        edges = []
+        if self.isStandable(col, row):
+            for next_col in (col-1, col+1):
+                landing = self.landingRow(next_col, row)
+                if landing is not None:
+                    edges.append(landing*self.width + next_col)
+        return edges
+
+    def setTile(self, col, row, code):
+        """
+        Changes the tile at (col, row) to `code` ('..' for empty space).
+        Only the enemy moves that could be different are worked out again: the ones starting in this column
+        (the tile may be floor or wall now) and in the columns on either side (they may land somewhere else in this one).
+        Returns a dict of cell -> new edges for the cells whose moves changed, for `FlowField.setEdges`.
+        """
+        if not (0 <= row < self.height and 0 <= col < len(self.grid[row])):
+            raise IndexError(f"tile ({col}, {row}) is outside the level")
+        self.grid[row][col] = code
+        if '.' in code:
+            self.terrain.pop((col, row), None)
+        else:
+            self.terrain[(col, row)] = code
+        changed = {}
+        if self.mob_edges is not None:
+            for edge_col in range(max(0, col-1), min(self.width, col+2)):
+                for edge_row in range(self.height):
+                    cell = edge_row*self.width + edge_col
+                    edges = self.cellEdges(edge_col, edge_row)
+                    if edges != self.mob_edges.get(cell, []):
+                        if edges:
+                            self.mob_edges[cell] = edges
+                        else:
+                            del self.mob_edges[cell]
+                        changed[cell] = edges
+        return changed
+
+def loadLevel(levels_folder, level, tile_width, tile_height):
+    """
+    Reads `<levels_folder>/<level>.txt` and returns its LevelData
+    """
+    with open(levels_folder+'/'+level+'.txt', 'r') as infile:
+        return LevelData(infile.read(), tile_width, tile_height)
+
+def loadLevelInfo(levels_folder):
+    """
+    Reads `<levels_folder>/info.json` (objectives, splash screen flag, and next level for every level)
+    """
+    with open(levels_folder+'/info.json', 'r') as infile:
+        return json.load(infile)
+
+def overlaps(ax, ay, aw, ah, bx, by, bw, bh):
+    # same test as pygame's Rect.colliderect: touching edges don't count
+    return ax < bx+bw and bx < ax+aw and ay < by+bh and by < ay+ah
+
+class TileBuckets():
+    """
+    Remembers which things (by index) cover each tile of the level, so a collision check only has to look
+    at the things in the few tiles a rectangle covers, no matter how many there are in the whole level.
+    Things that move call `move` and only change buckets when they cross into a different tile.
+    """
+    def __init__(self, tile_width, tile_height):
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        # (col, row) -> set of indices, and index -> (first col, first row, last col, last row) it covers
+        self.buckets = {}
+        self.spans = {}
+
+    def span(self, x, y, width, height):
+        # the tiles a rectangle covers. Its right and bottom edges aren't part of it, same as `overlaps`
+        #       (-(-a // b) is a rounded up division)
+        tw, th = self.tile_width, self.tile_height
+        return (int(x // tw), int(y // th), int(-(-(x + width) // tw)) - 1, int(-(-(y + height) // th)) - 1)
+
+    def insert(self, index, x, y, width, height):
+        span = self.spans[index] = self.span(x, y, width, height)
+        for col in range(span[0], span[2]+1):
+            for row in range(span[1], span[3]+1):
+                self.buckets.setdefault((col, row), set()).add(index)
+
+    def remove(self, index):
+        span = self.spans.pop(index, None)
+        if span is None:
+            return
+        for col in range(span[0], span[2]+1):
+            for row in range(span[1], span[3]+1):
+                bucket = self.buckets[(col, row)]
+                bucket.discard(index)
+                if not bucket:
+                    del self.buckets[(col, row)]
+
+    def move(self, index, x, y, width, height):
+        if self.spans.get(index) != self.span(x, y, width, height):
+            self.remove(index)
+            self.insert(index, x, y, width, height)
+
+    def copy(self):
+        # a separate TileBuckets with the same contents
+        clone = TileBuckets(self.tile_width, self.tile_height)
+        clone.buckets = {tile: set(bucket) for tile, bucket in self.buckets.items()}
+        clone.spans = dict(self.spans)
+        return clone
+
+    def query(self, x, y, width, height):
+        """
+        Returns the indices of everything in the tiles a rectangle covers, in index order
+        """
+        buckets = self.buckets
+        if not buckets:
+            return ()
+        found = None
+        col_l, row_t, col_r, row_b = self.span(x, y, width, height)
+        for col in range(col_l, col_r+1):
+            for row in range(row_t, row_b+1):
+                bucket = buckets.get((col, row))
+                if bucket:
+                    found = bucket if found is None else found | bucket
+        return sorted(found) if found else ()
+
+class PlayerBody():
+    """
+    The player's position and movement state, without any images.
+    (x, y) is the top left corner and (width, height) the size of the player's rectangle.
+    """
+    def __init__(self, position, size):
+        self.x, self.y = position
+        self.width, self.height = size
+        # 'i' (idle), 'l' (walking left), or 'r' (walking right)
+        self.state = 'i'
+        # the state the player moved with during the last tick (`state` itself goes back to 'i' after every step)
+        self.walk_state = 'i'
+        self.jumping = False
+        self.falling = False
+        self.dying = False
+        # how high the player can jump
+        self.vertical_speed = 7
+        self.old_vertical_speed = self.vertical_speed
+        # how fast the player will fall
+        self.gravity = 5
+        self.score = 0
+        # the position before the last move, used to tell whether the player moved this tick
+        self.old_loc = (self.x, self.y)
+
+class Snapshot():
+    """
+    Everything about a Simulation that changes while it's played, saved by `Simulation.snapshot()`.
+    The level itself (tile grid, terrain, flow field edges) is shared, not copied, so restoring a snapshot
+    doesn't undo tiles changed with `setTile`.
+    """
+    def __init__(self, sim):
+        self.players = [dict(vars(player)) for player in sim.players]
+        self.item_alive = list(sim.item_alive)
+        self.item_buckets = sim.item_buckets.copy()
+        self.mobs = [tuple(mob) for mob in sim.mobs]
+        self.mob_facing = list(sim.mob_facing)
+        self.mob_falling = list(sim.mob_falling)
+        self.mob_buckets = sim.mob_buckets.copy()
+        self.ticks = sim.ticks
+        self.collected = sim.collected
+        self.complete = sim.complete
+
+class Simulation():
+    """
+    One level being played. Call `step(inputs)` once per game tick.
+    `step` returns a list of events that happened that tick:
+        ('item', index, player)  - player number `player` picked up item number `index`
+        ('mob', index, player)   - player number `player` touched enemy number `index` and starts dying (once)
+        ('complete',)            - the players reached the score needed for the level
+    There's one player to start with (`player`, also `players[0]`). More can join with `addPlayer` (for
+        multiplayer, see netplay.py); they all share one score, and enemies chase whichever is closest.
+    After every step, `still` is True if nothing changed during it (nobody moved and nothing was picked up).
+        Another step with no keys held down won't change anything either, so there's nothing new to draw.
+    `mob_speed` is how many pixels an enemy walks per tick while chasing the player (0 keeps them standing still).
+    Contact is decided with rectangles. To make it pixel accurate, set `touching` to a function
+        touching(kind, index, dx, dy) -> bool
+    that is called only when the rectangles overlap, with kind 'item' or 'mob' and (dx, dy) being how far that
+        item/enemy's top left corner is from the player's.
+    In a level bigger than the window, `useAI` lets the enemies that are off screen and far from every player work
+        out where to go less often (see ai_lod.py).
+    """
+    def __init__(self, level_data, score_needed, player_size, item_size, mob_size, enemy_needed=0, mob_speed=2):
+        self.level = level_data
+        self.tile_width = level_data.tile_width
+        self.tile_height = level_data.tile_height
+        self.score_needed = score_needed
+        self.enemy_needed = enemy_needed
+        self.pixel_width = level_data.width*self.tile_width
+        self.player_size = player_size
+        self.player = PlayerBody(level_data.player_pos, player_size)
+        self.players = [self.player]
+        self.item_size = item_size
+        self.mob_size = mob_size
+        self.mob_speed = mob_speed
+        # the AIScheduler that picks which enemies move each tick (None moves all of them), and the part of the level on screen
+        self.ai = None
+        self.view = None
+        self.placeItems(level_data.item_locs)
+        self.placeMobs(level_data.enemy_locs)
+        self.flow_field = FlowField(level_data.width, level_data.height, level_data.mobEdges())
+        self.ticks = 0
+        # items picked up in this level by anybody, including players who have died or left since
+        self.collected = 0
+        self.complete = False
+        self.still = False
+        self.touching = None
+
+    def placeItems(self, item_locs, picked_up=()):
+        # positions of the items, plus whether each item is still waiting to be picked up (the ones at a
+        #       position in `picked_up` already were), and which tiles each one covers, so only the ones near
+        #       the player are checked for contact. Items leave their buckets when they're picked up
+        self.items = list(item_locs)
+        self.item_alive = [loc not in picked_up for loc in self.items]
+        self.item_buckets = TileBuckets(self.tile_width, self.tile_height)
+        for index, (ix, iy) in enumerate(self.items):
+            if self.item_alive[index]:
+                self.item_buckets.insert(index, ix, iy, self.item_size[0], self.item_size[1])
+
+    def placeMobs(self, enemy_locs):
+        # positions of the enemies, which way each last walked (-1 left, 1 right), whether it's falling,
+        #       and which tiles each one covers. Enemies change buckets as they walk into new tiles
+        self.mobs = [list(loc) for loc in enemy_locs]
+        self.mob_facing = [1]*len(self.mobs)
+        self.mob_falling = [False]*len(self.mobs)
+        self.mob_buckets = TileBuckets(self.tile_width, self.tile_height)
+        for index, (mx, my) in enumerate(self.mobs):
+            self.mob_buckets.insert(index, mx, my, self.mob_size[0], self.mob_size[1])
+        if self.ai is not None:
+            self.ai.clear()
+            for index in range(len(self.mobs)):
+                self.ai.add(index)
+
+    def useAI(self, ai, view=None):
+        """
+        Has `ai` (an AIScheduler, or None to move every enemy every tick) pick which enemies move each tick.
+        Enemies in `view` (the (x, y, width, height) part of the level on screen) or within the scheduler's near
+        distance of a player move every tick, and the rest every few ticks, catching up on the ticks they missed.
+        """
+        self.ai = ai
+        self.view = view
+        if ai is not None:
+            ai.clear()
+            for index in range(len(self.mobs)):
+                ai.add(index)
+
+    def changeLevel(self, level_data):
+        """
+        Switches to an edited version of the level (a new LevelData) without starting over. The player keeps their
+        position, state, and score. Items that are in the same place as before stay picked up, and if the enemies
+        were moved around in the file, they start over from their new places.
+        Returns a tuple (items changed, enemies changed).
+        """
+        old = self.level
+        self.level = level_data
+        self.pixel_width = level_data.width*self.tile_width
+        # the terrain may be different, so the enemies' paths have to be worked out again
+        self.flow_field = FlowField(level_data.width, level_data.height, level_data.mobEdges())
+        items_changed = level_data.item_locs != old.item_locs
+        if items_changed:
+            self.placeItems(level_data.item_locs, {loc for loc, alive in zip(self.items, self.item_alive) if not alive})
+        mobs_changed = level_data.enemy_locs != old.enemy_locs
+        if mobs_changed:
+            self.placeMobs(level_data.enemy_locs)
+        self.still = False
+        return items_changed, mobs_changed
+
+    def setTile(self, col, row, code):
+        """
+        Changes the tile at (col, row) to `code` ('..' for empty space) while the level is being played.
+        Floors are always read straight from the tile grid, so the only thing to update is the enemies' moves
+        around that column, and the flow field searches again the next time enemies move.
+        """
+        changed = self.level.setTile(col, row, code)
+        if changed:
+            self.flow_field.setEdges(changed)
+        self.still = False
+
+    def getFloor(self, left, right, bottom):
+        """
+        Returns the row of the nearest terrain tile under the bottom left or bottom right corner of a rectangle.
+        Returns the level height (in tiles) if there is nothing under it.
+        """
+        grid = self.level.grid
+        col_l = math.floor(left / self.tile_width)
+        col_r = math.floor(right / self.tile_width)
+        for tile in range(math.floor((bottom-1) / self.tile_height), self.level.height):
+            row = grid[tile]
+            if '.' not in row[col_l] or '.' not in row[col_r]:
+                return tile
+        return self.level.height
+
+    def snapshot(self):
+        """
+        Saves where everything is (player, score, items left, enemies). Pass it to `restore` to go back to this moment,
+        e.g. to restart the level when the player dies or to load a checkpoint. Restoring doesn't read any files.
+        """
+        return Snapshot(self)
+
+    def restore(self, snapshot):
+        """
+        Puts the simulation back the way it was when `snapshot` was taken. The same snapshot can be restored any number of times.
+        The player body and enemy position lists are changed in place, so sprites following them keep working.
+        """
+        for player, saved in zip(self.players, snapshot.players):
+            vars(player).update(saved)
+        self.item_alive[:] = snapshot.item_alive
+        self.item_buckets = snapshot.item_buckets.copy()
+        for mob, saved in zip(self.mobs, snapshot.mobs):
+            mob[:] = saved
+        self.mob_facing[:] = snapshot.mob_facing
+        self.mob_falling[:] = snapshot.mob_falling
+        self.mob_buckets = snapshot.mob_buckets.copy()
+        self.ticks = snapshot.ticks
+        self.collected = snapshot.collected
+        self.complete = snapshot.complete
+        self.still = False
+
+    def addPlayer(self, player=None):
+        """
+        Adds another player (a new one at the level's starting point unless a PlayerBody is given) and returns its PlayerBody
+        """
+        if player is None:
+            player = PlayerBody(self.level.player_pos, self.player_size)
+        self.players.append(player)
+        self.still = False
+        return player
+
+    def removePlayer(self, player):
+        # takes a PlayerBody out of the level. With no players left, the enemies stand still
+        self.players.remove(player)
+        self.still = False
+
+    def score(self):
+        # the points every player has picked up together (players that left take their own score, but not the level's, with them)
+        return self.collected
+
+    def playerState(self):
+        # everything about the players that can change during a step
+        return [(p.x, p.y, p.jumping, p.falling, p.dying, p.vertical_speed, p.score) for p in self.players]
+
+    def step(self, inputs):
+        """
+        Runs one tick. `inputs` are the keys the player is holding down, or a list of them with one per player
+        (players that aren't in the list hold nothing down)
+        """
+        events = []
+        self.ticks += 1
+        before = self.playerState()
+        if not isinstance(inputs, (list, tuple)):
+            inputs = (inputs,)
+        for number, p in enumerate(self.players):
+            held = inputs[number] if number < len(inputs) else 0
+            # the floor under the player before they move
+            floor_y = self.getFloor(p.x, p.x+p.width, p.y+p.height)*self.tile_height
+            # keys held down this tick (left wins if both are held)
+            if held & RIGHT:
+                p.state = 'r'
+            if held & LEFT:
+                p.state = 'l'
+            if held & JUMP:
+                p.jumping = True
+            self.movePlayer(floor_y, p)
+        mobs_moved = self.mob_speed > 0 and self.mobs and self.moveMobs()
+
+        # items and enemies touching each player. Only the ones in the tiles the player covers can be touching them
+        touching = self.touching
+        for number, p in enumerate(self.players):
+            for index in self.item_buckets.query(p.x, p.y, p.width, p.height):
+                ix, iy = self.items[index]
+                if (overlaps(ix, iy, self.item_size[0], self.item_size[1], p.x, p.y, p.width, p.height)
+                        and (touching is None or touching('item', index, ix - p.x, iy - p.y))):
+                    self.item_alive[index] = False
+                    self.item_buckets.remove(index)
+                    p.score += 1
+                    self.collected += 1
+                    events.append(('item', index, number))
+            # a player who is already dying can't die again, however long they lie on an enemy
+            if p.dying:
+                continue
+            for index in self.mob_buckets.query(p.x, p.y, p.width, p.height):
+                mx, my = self.mobs[index]
+                if (overlaps(mx, my, self.mob_size[0], self.mob_size[1], p.x, p.y, p.width, p.height)
+                        and (touching is None or touching('mob', index, mx - p.x, my - p.y))):
+                    p.dying = True
+                    events.append(('mob', index, number))
+                    break
+
+        if not self.complete and self.score() >= self.score_needed:
+            self.complete = True
+            events.append(('complete',))
+        # (every event changes a player's score or starts them dying, so it shows up in their state)
+        self.still = not mobs_moved and self.playerState() == before
+        return events
+
+    def moveMobs(self):
+        """
+        Moves every enemy (or the ones the AI scheduler picks, see `useAI`) one tick: falling if there's nothing
+        under it, otherwise walking the way the flow field says leads to the player. Returns True if any enemy moved.
+        """
+        moved = False
+        level = self.level
+        tw, th = self.tile_width, self.tile_height
+        # the field leads to the tile each player is standing on (or will land on), so enemies go after the closest one
+        goals = {}
+        for p in self.players:
+            player_col = int((p.x + p.width/2) // tw)
+            landing = level.landingRow(player_col, int((p.y + p.height - 1) // th))
+            if landing is not None:
+                goals.setdefault(landing*level.width + player_col, p)
+        field = self.flow_field
+        if len(goals) > 1:
+            field.update(tuple(goals))
+        else:
+            field.update(next(iter(goals), None))
+        if self.ai is None:
+            moving = ((index, 1) for index in range(len(self.mobs)))
+        else:
+            moving = self.ai.plan(self.nearMobs(), self.mobDistance)
+        for index, ticks in moving:
+            if self.moveMob(index, goals, ticks):
+                moved = True
+        return moved
+
+    def moveMob(self, index, goals, ticks=1):
+        """
+        Moves enemy number `index` for `ticks` ticks (more than one if it hasn't moved for a while, see `useAI`),
+        toward the players standing on the tiles in `goals`. Returns True if it moved.
+        """
+        level = self.level
+        tw, th = self.tile_width, self.tile_height
+        mw, mh = self.mob_size
+        field = self.flow_field
+        mob = self.mobs[index]
+        mx, my = mob
+        # enemies stand on whatever is under their middle, so they drop as soon as they walk halfway off a ledge
+        floor_y = self.getFloor(mx + mw/2, mx + mw/2, my+mh)*th
+        # fall until the enemy lands on something
+        if my + mh < floor_y:
+            mob[1] = min(my + self.player.gravity*ticks, floor_y - mh)
+            self.mob_falling[index] = True
+            self.mob_buckets.move(index, mob[0], mob[1], mw, mh)
+            return True
+        self.mob_falling[index] = False
+        col = int((mx + mw/2) // tw)
+        row = int((my + mh - 1) // th)
+        cell = field.cell(col, row)
+        if cell is not None and level.isStandable(col, row):
+            target = field.next_cell.get(cell, UNREACHABLE)
+            if target != UNREACHABLE:
+                step = 1 if target % level.width > col else -1
+            # on a player's tile, walk straight at them
+            elif cell in goals and abs(goals[cell].x + goals[cell].width/2 - (mx + mw/2)) > self.mob_speed:
+                step = 1 if goals[cell].x + goals[cell].width/2 > mx + mw/2 else -1
+            else:
+                return False
+        # not on a tile the field knows about (e.g. standing inside terrain), keep going the same way
+        else:
+            step = self.mob_facing[index]
+        self.mob_facing[index] = step
+        # an enemy catching up walks the ticks it missed, but never more than a tile at once, so it can't skip past a turn
+        distance = max(self.mob_speed, min(self.mob_speed*ticks, tw))
+        # stay inside the level
+        mob[0] = max(0, min(self.pixel_width - mw - 1, mx + step*distance))
+        if mob[0] != mx:
+            self.mob_buckets.move(index, mob[0], my, mw, mh)
+            return True
+        return False
+
+    def nearMobs(self):
+        # the enemies on screen or within the AI scheduler's near distance of a player, which move every tick
+        reach = self.ai.near_distance
+        areas = [self.view] if self.view is not None else []
+        areas += [(p.x - reach, p.y - reach, p.width + 2*reach, p.height + 2*reach) for p in self.players]
+        # with only a few enemies, checking each one is quicker than looking through every tile those areas cover
+        if len(self.mobs) <= self.ai.budget:
+            mw, mh = self.mob_size
+            return [index for index, (mx, my) in enumerate(self.mobs) if any(overlaps(mx, my, mw, mh, *area) for area in areas)]
+        near = set()
+        for area in areas:
+            near.update(self.mob_buckets.query(*area))
+        return sorted(near)
+
+    def mobDistance(self, index):
+        # how far enemy number `index` is from the closest player (center to center)
+        mx, my = self.mobs[index]
+        cx, cy = mx + self.mob_size[0]/2, my + self.mob_size[1]/2
+        return min((math.hypot(p.x + p.width/2 - cx, p.y + p.height/2 - cy) for p in self.players), default=math.inf)
+
+    def movePlayer(self, floor_y, p=None):
+        """
+        Moves a player (the first one unless `p` is given) one tick, using the floor found before the move
+        """
+        if p is None:
+            p = self.player
+        p.old_loc = (p.x, p.y)
+        # walking right or left without leaving the level
+        if p.state == 'r' and p.x + p.width + 4 <= self.pixel_width:
+            p.x += 4
+        if p.state == 'l' and p.x - 4 >= 0:
+            p.x -= 4
+        # jumping, as long as the player isn't already falling
+        if p.jumping and not p.falling:
+            energy = p.vertical_speed * p.vertical_speed
+            if p.y - energy >= 0:
+                p.y -= energy
+                p.vertical_speed -= 1
+            # the jump ends at the top of the level or once it runs out of speed
+            if p.y < 0 or p.vertical_speed == 0:
+                p.falling = True
+                p.jumping = False
+        # falling until the floor is reached
+        if p.falling:
+            if p.y + p.height + p.gravity <= floor_y:
+                p.y += p.gravity
+            else:
+                p.vertical_speed = p.old_vertical_speed
+                p.y = floor_y - p.height
+                p.state = 'i'
+                p.falling = False
+        # walked off an edge
+        if (not p.jumping) and (p.y + p.height < floor_y):
+            p.falling = True
+        # the player goes back to idle after every step they take, so a key has to be held down to keep walking
+        p.walk_state = p.state
+        if (p.x, p.y) != p.old_loc and p.state in ('l', 'r') and not p.dying:
+            p.state = 'i'
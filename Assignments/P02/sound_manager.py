@@ -0,0 +1,127 @@
+"""
+Sound effects on a fixed set of mixer channels.
+
+Calling `Sound.play()` for every hit starts another copy of the sound on any free channel, so a
+burst of hits stacks up dozens of copies of the same effect, which costs CPU to mix and clips.
+The SoundManager gives each category of sound (music, sound effects, menu sounds) its own channels,
+limits how many copies of one sound can play at once, plays each sound at most once per game tick,
+and when a category runs out of channels, takes one from a sound that matters less (or the oldest one).
+"""
+import time
+import pygame
+
+# channels for each category unless told otherwise
+CATEGORIES = {"music": 1, "sfx": 6, "ui": 1}
+
+# channels left over for anything that still calls `Sound.play()` itself
+SPARE_CHANNELS = 4
+
+class SoundManager():
+    """
+    Load each sound once with `load`, then `play` it by name. Call `tick()` once per game tick, so a sound
+    triggered several times in the same tick only plays once.
+        categories  - category name -> how many channels it gets
+    `report()` describes how many plays were skipped, cut short, or refused.
+    """
+    def __init__(self, categories=CATEGORIES, buffer=64):
+        self.categories = dict(categories)
+        self.buffer = buffer
+        # category -> list of its pygame Channels (made by `setUp` once the mixer is running)
+        self.pools = {}
+        # name -> (Sound, category, priority, max_voices, steal)
+        self.sounds = {}
+        # channel -> (name, priority, when it started) for whatever it played last
+        self.voices = {}
+        # names played this tick
+        self.played = set()
+        # statistics for `report()`
+        self.plays = 0
+        self.duplicates = 0
+        self.stolen = 0
+        self.refused = 0
+
+    def setUp(self):
+        # starts the mixer if it isn't already, and hands out the channels. The managed channels are reserved,
+        #       so a `Sound.play()` somewhere else can never take one of them
+        if self.pools:
+            return
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(buffer=self.buffer)
+        total = sum(self.categories.values())
+        pygame.mixer.set_num_channels(total + SPARE_CHANNELS)
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for category, count in self.categories.items():
+            self.pools[category] = [pygame.mixer.Channel(number) for number in range(first, first+count)]
+            first += count
+
+    def load(self, name, sound, category="sfx", priority=0, max_voices=2, volume=None, steal=True):
+        """
+        Adds a sound, from a file path or a pygame Sound, under `name`.
+            priority    - a sound can only take a channel from a sound with the same or a lower priority
+            max_voices  - how many copies of it can play at the same time
+            steal       - when `max_voices` copies are already playing, True cuts the oldest one off to start
+                          again, and False ignores the new play (for long sounds that shouldn't restart)
+        Returns the pygame Sound.
+        """
+        self.setUp()
+        if isinstance(sound, str):
+            sound = pygame.mixer.Sound(sound)
+        if volume is not None:
+            sound.set_volume(volume)
+        self.sounds[name] = (sound, category, priority, max_voices, steal)
+        return sound
+
+    def tick(self):
+        # a new game tick: every sound can play again
+        self.played.clear()
+
+    def playing(self, name):
+        # the channels that are playing `name` right now
+        return [channel for channel, voice in self.voices.items() if voice[0] == name and channel.get_busy()]
+
+    def play(self, name, loops=0):
+        """
+        Plays the sound called `name`. Returns the Channel it's playing on, or None if it didn't play
+        (it already played this tick, too many copies are playing, or every channel of its category is busy
+        with sounds that matter more).
+        """
+        if name in self.played:
+            self.duplicates += 1
+            return None
+        sound, category, priority, max_voices, steal = self.sounds[name]
+        pool = self.pools[category]
+        channel = None
+        copies = self.playing(name)
+        if len(copies) >= max_voices:
+            if not steal:
+                self.refused += 1
+                return None
+            # cut off the oldest copy
+            channel = min(copies, key=lambda busy: self.voices[busy][2])
+            self.stolen += 1
+        else:
+            channel = next((free for free in pool if not free.get_busy()), None)
+            if channel is None:
+                # take the channel of the least important sound, the oldest one if there's a tie
+                candidates = [busy for busy in pool if self.voices[busy][1] <= priority]
+                if not candidates:
+                    self.refused += 1
+                    return None
+                channel = min(candidates, key=lambda busy: self.voices[busy][1:])
+                self.stolen += 1
+        channel.play(sound, loops)
+        self.voices[channel] = (name, priority, time.perf_counter())
+        self.played.add(name)
+        self.plays += 1
+        return channel
+
+    def stop(self, name):
+        # stops every copy of `name` that's playing. It can be played again in the same tick afterwards
+        for channel in self.playing(name):
+            channel.stop()
+        self.played.discard(name)
+
+    def report(self):
+        return (f"{self.plays} sounds played, {self.duplicates} repeats in the same tick skipped, "
+                f"{self.stolen} cut short for a newer sound, {self.refused} refused")
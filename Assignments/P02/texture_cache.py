@@ -0,0 +1,113 @@
+"""
+Every image the game keeps around, in one place, with a limit on how much memory they can take.
+
+Each level bakes its own full-window image, tiles and sprite frames are loaded once and kept, and nothing
+ever let go of any of them, so the longer the game ran the more memory its images took without anyone
+knowing how much. The TextureCache keeps images by key, counts the bytes each one takes
+(width x height x bytes per pixel), and when the total goes over its budget, forgets the ones that were
+used the longest time ago. Images that must stay (like the level on screen) are pinned and never forgotten.
+"""
+from collections import OrderedDict
+
+class TextureCache():
+    """
+    Images (pygame Surfaces) by key, up to `budget` bytes.
+    `get(key, load, category)` returns the image, calling `load()` to make it if it isn't in the cache.
+    `pin(key)` keeps an image from being forgotten until `unpin(key)`.
+    `hits`, `misses`, and `evictions` count what happened, `bytes` is the total size, and `category_bytes`
+    is the size of each category (e.g. "levels", "tiles", "sprites"). `report()` describes all of it.
+    An image that's forgotten is only freed once nothing else (like a sprite) is still using it.
+    """
+    def __init__(self, budget=64*1024*1024):
+        self.budget = budget
+        # key -> (Surface, category, bytes), the least recently used first
+        self.entries = OrderedDict()
+        self.pinned = set()
+        self.bytes = 0
+        self.category_bytes = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def surfaceBytes(surface):
+        # how much memory a Surface's pixels take
+        width, height = surface.get_size()
+        return width * height * surface.get_bytesize()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, load=None, category="misc", pinned=False):
+        """
+        Returns the image stored under `key`, and marks it as just used. If it isn't there, `load()` makes it
+        and it's added under `category` (returns None if there's no `load`).
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            if pinned:
+                self.pinned.add(key)
+            return entry[0]
+        self.misses += 1
+        if load is None:
+            return None
+        return self.put(key, load(), category, pinned)
+
+    def put(self, key, surface, category="misc", pinned=False):
+        """
+        Stores `surface` under `key` (replacing whatever was there), then forgets the least recently used
+        unpinned images until the cache fits in its budget again. Returns `surface`.
+        """
+        self.discard(key)
+        size = self.surfaceBytes(surface)
+        self.entries[key] = (surface, category, size)
+        self.bytes += size
+        self.category_bytes[category] = self.category_bytes.get(category, 0) + size
+        if pinned:
+            self.pinned.add(key)
+        self.shrink()
+        return surface
+
+    def pin(self, key):
+        # keeps `key` in the cache no matter how long ago it was used
+        if key in self.entries:
+            self.pinned.add(key)
+
+    def unpin(self, key):
+        # lets `key` be forgotten again, and makes room if the cache went over its budget while it was pinned
+        self.pinned.discard(key)
+        self.shrink()
+
+    def discard(self, key):
+        # forgets `key` (pinned or not), e.g. because the file it came from changed
+        entry = self.entries.pop(key, None)
+        self.pinned.discard(key)
+        if entry is not None:
+            self.bytes -= entry[2]
+            self.category_bytes[entry[1]] -= entry[2]
+
+    def clear(self, category=None):
+        # forgets every unpinned image (only the ones in `category`, if it's given)
+        for key, (_, entry_category, _) in list(self.entries.items()):
+            if key not in self.pinned and (category is None or entry_category == category):
+                self.discard(key)
+
+    def shrink(self):
+        # forgets the least recently used unpinned images until the cache fits in its budget (or only pinned ones are left)
+        if self.bytes <= self.budget:
+            return
+        for key in [key for key in self.entries if key not in self.pinned]:
+            self.discard(key)
+            self.evictions += 1
+            if self.bytes <= self.budget:
+                break
+
+    def report(self):
+        """
+        Returns a line describing the cache's size (by category) and how often it had what was asked for
+        """
+        categories = ", ".join(f"{category} {size/1024/1024:.1f}" for category, size in sorted(self.category_bytes.items()) if size)
+        return (f"{len(self.entries)} images, {self.bytes/1024/1024:.1f} of {self.budget/1024/1024:.0f} MiB ({categories or 'empty'}), "
+                f"{len(self.pinned)} pinned; {self.hits} hits, {self.misses} misses, {self.evictions} evicted")